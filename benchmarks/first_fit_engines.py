@@ -0,0 +1,41 @@
+"""Compares the First-Fit engines as the number of open servers grows.
+
+VMs are sampled with replacement from data/vm_data.csv, so that a run with n VMs opens about n / 11 servers.
+Run from the root of the repository, with it on the Python path so that `vm_placement` is importable:
+    PYTHONPATH=. python benchmarks/first_fit_engines.py --sizes 10000 50000 100000 200000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from vm_placement.algorithms.approximation import FirstFitAlgo
+from vm_placement.data_handling import Data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--engines', nargs='+', default=FirstFitAlgo.engines)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data(
+        vm_filepath='data/vm_data.csv',
+        server_specs=server_capacity,
+        n_servers=max(args.sizes)
+    )
+
+    print(f"{'n_vms':>8} {'engine':>6} {'servers':>8} {'seconds':>8} {'VMs/s':>8}")
+    for n_vms in args.sizes:
+        vms = data.vm_data.sample(n_vms, replace=True, random_state=args.seed).reset_index(drop=True)
+        server_capacities = data.server_data[:n_vms]
+        for engine in args.engines:
+            start = time.perf_counter()
+            solution = FirstFitAlgo(engine=engine).solve(vms, server_capacities)
+            elapsed = time.perf_counter() - start
+            print(f"{n_vms:>8} {engine:>6} {solution.n_servers:>8} {elapsed:>8.2f} {n_vms / elapsed:>8.0f}")
@@ -0,0 +1,58 @@
+"""Compares the packing quality and decision time of the harmonic online placer with First-Fit.
+
+The first run places data/vm_data.csv itself, the next ones VMs sampled with replacement from it. The online
+placers receive the VMs one at a time, in file order, and the time per VM covers the `place` calls only.
+Run from the root of the repository, with it on the Python path so that `vm_placement` is importable:
+    PYTHONPATH=. python benchmarks/harmonic_placer.py --sizes 10000 100000 --size-classes 4 6 10
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from vm_placement.algorithms.approximation import FirstFitAlgo
+from vm_placement.algorithms.online import OnlinePlacer
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 100000])
+    parser.add_argument('--size-classes', type=int, nargs='+', default=[4, 6, 10])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data(
+        vm_filepath='data/vm_data.csv',
+        server_specs=server_capacity
+    )
+    # As many servers as needed
+    server_pool = ServerPool(server_capacity)
+
+    print(f"{'n_vms':>8} {'placer':>18} {'servers':>8} {'vs FF':>7} {'us/VM':>7}")
+    for n_vms in [len(data.vm_data)] + args.sizes:
+        vms = data.vm_data if n_vms == len(data.vm_data) else \
+            data.vm_data.sample(n_vms, replace=True, random_state=args.seed).reset_index(drop=True)
+        first_fit_servers = FirstFitAlgo().solve(vms, server_pool).n_servers
+        print(f"{n_vms:>8} {'first_fit (offline)':>18} {first_fit_servers:>8} {1:>7.3f} {'':>7}")
+
+        demands = vms[resource_columns].to_numpy(dtype=float)
+        placers = {'online first_fit': lambda: OnlinePlacer(server_pool)}
+        for n_size_classes in args.size_classes:
+            placers[f"harmonic[{n_size_classes}]"] = \
+                lambda n_size_classes=n_size_classes: OnlinePlacer(server_pool, policy='harmonic',
+                                                                   n_size_classes=n_size_classes)
+        for name, make_placer in placers.items():
+            placer = make_placer()
+            start = time.perf_counter()
+            for vm_id, demand in enumerate(demands):
+                placer.place(vm_id, demand)
+            elapsed = time.perf_counter() - start
+            print(f"{n_vms:>8} {name:>18} {placer.n_active_servers:>8} "
+                  f"{placer.n_active_servers / first_fit_servers:>7.3f} {elapsed / n_vms * 1e6:>7.1f}")
@@ -0,0 +1,117 @@
+"""Times and memory-profiles the placement algorithms on generated instances.
+
+The instances mimic data/vm_data.csv (see vm_placement.data_handling.generator) and are placed in 64 vCPU / 512 Memory /
+2048 Storage servers. Each benchmark reports its wall time and, with --memory, the peak of the memory allocated by
+Python and NumPy during the run (traced with tracemalloc, which slows the run down). Results are written as JSON,
+to compare runs across changes. Run from the root of the repository, with it on the Python path so that
+`vm_placement` is importable:
+    PYTHONPATH=. python benchmarks/placement_suite.py --sizes 1000 10000 100000 --output results.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation import BestFitAlgo, FirstFitAlgo, FirstFitDivideAlgo
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.generator import generate_vm_data
+from vm_placement.data_handling.sorting import calculate_scarcity_ratio, sort_by_scarcity_ratio
+from vm_placement.lp_models.nominal_model import NominalModel
+
+
+def make_benchmarks(data: Data) -> Dict[str, Callable[[], object]]:
+    """Benchmarks on the data, by name. The scarcity ratio is computed once for the ones that need it."""
+    scarcity_ratio = calculate_scarcity_ratio(data)
+    return {
+        'first_fit[array]': lambda: FirstFitAlgo(engine='array').solve(data.vm_data, data.server_pool),
+        'first_fit[tree]': lambda: FirstFitAlgo(engine='tree').solve(data.vm_data, data.server_pool),
+        'best_fit[Storage]': lambda: BestFitAlgo(criterion='Storage').solve(data.vm_data, data.server_pool),
+        'best_fit[Storage, boxed]': lambda: BestFitAlgo(criterion='Storage', index='boxed').solve(
+            data.vm_data, data.server_pool),
+        'best_fit[weighted_resources]': lambda: BestFitAlgo(criterion='weighted_resources').solve(
+            data.vm_data, data.server_pool, scarcity_ratio),
+        'first_fit_divide[array]': lambda: FirstFitDivideAlgo().solve(data.vm_data, data.server_pool),
+        'first_fit_divide[stream]': lambda: FirstFitDivideAlgo(engine='stream').solve(data.vm_data, data.server_pool),
+        'calculate_scarcity_ratio': lambda: calculate_scarcity_ratio(data),
+        'sort_by_scarcity_ratio': lambda: sort_by_scarcity_ratio(data.vm_data.copy(), scarcity_ratio),
+        'nominal_model_build': lambda: NominalModel(verbose=0, symmetry_breaking=True)._create_instance(
+            data, FirstFitAlgo().solve(data.vm_data, data.server_pool)),
+    }
+
+
+def run_benchmark(benchmark: Callable[[], object], memory: bool) -> dict:
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = benchmark()
+    seconds = time.perf_counter() - start
+    record = {'seconds': seconds, 'peak_memory_mb': None}
+    if memory:
+        record['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    if isinstance(result, Solution):
+        record['n_servers'] = result.n_servers
+    return record
+
+
+def environment() -> dict:
+    try:
+        commit: Optional[str] = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                               check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--benchmarks', nargs='+', default=None,
+                        help="Names of the benchmarks to run, among the ones of make_benchmarks (all by default)")
+    parser.add_argument('--max-model-vms', type=int, default=300,
+                        help="Largest instance on which the nominal model gets built, as it has n_vms x n_servers "
+                             "variables")
+    parser.add_argument('--memory', action='store_true', help="Trace the peak memory of each benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="JSON file for the results (standard output by default)")
+    args = parser.parse_args()
+
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    results: List[dict] = []
+    for n_vms in args.sizes:
+        data = Data.from_frame(generate_vm_data(n_vms, seed=args.seed), server_capacity)
+        for name, benchmark in make_benchmarks(data).items():
+            if args.benchmarks is not None and name not in args.benchmarks:
+                continue
+            if name == 'nominal_model_build' and n_vms > args.max_model_vms:
+                continue
+            record = {'benchmark': name, 'n_vms': n_vms, **run_benchmark(benchmark, args.memory)}
+            print(f"{name:>30} {n_vms:>9} {record['seconds']:>9.3f}s", file=sys.stderr)
+            results.append(record)
+
+    report = json.dumps({'environment': environment(), 'seed': args.seed, 'results': results}, indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(report)
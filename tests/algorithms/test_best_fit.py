@@ -1,8 +1,11 @@
+import numpy as np
 import pandas as pd
 import pytest
 
 from vm_placement.algorithms.approximation.best_fit import BestFitAlgo
+from vm_placement.algorithms.approximation.scoring import scoring_rules
 from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.server_pool import ServerPool
 
 
 @pytest.mark.parametrize("criterion", ["vCPU", "Memory", "Storage"])
@@ -33,6 +36,80 @@ def test_solve(criterion):
     pd.testing.assert_frame_equal(expected_server_fillings, solution.server_fillings)
     assert solution.n_servers == 2
 
+def test_solve_separates_anti_affinity_groups():
+    # Given
+    best_fit: BestFitAlgo = BestFitAlgo(criterion='vCPU')
+    vms = pd.DataFrame({
+        'vCPU': [6, 2, 2, 1],
+        'Memory': [5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10],
+        'AntiAffinityGroup': [-1, 0, 0, -1]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 4,
+        'Memory': [100] * 4,
+        'Storage': [100] * 4
+    })
+
+    # When
+    solution: Solution = best_fit.solve(vms, server_capacities)
+
+    # Then
+    # The second VM of group 0 skips server 0, where it would fit best
+    assert solution.assignment.tolist() == [0, 0, 1, 0]
+    assert solution.n_servers == 2
+
+
+def test_solve_segregates_classes():
+    # Given
+    best_fit: BestFitAlgo = BestFitAlgo(criterion='vCPU', segregate_classes=True)
+    vms = pd.DataFrame({
+        'vCPU': [6, 5, 4, 20, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10],
+        'Class': [1, 2, 3, 1, 2]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 5,
+        'Memory': [14] * 5,
+        'Storage': [100] * 5
+    })
+
+    # When
+    solution: Solution = best_fit.solve(vms, server_capacities)
+
+    # Then
+    # The class 3 VM skips server 0, which hosts a class 1 VM
+    assert solution.assignment.tolist() == [0, 1, 1, -1, 0]
+
+
+@pytest.mark.parametrize("segregate_classes", [False, True])
+def test_solve_with_boxed_index_matches_sorted_index(segregate_classes):
+    # Given
+    rng = np.random.default_rng(0)
+    vms = pd.DataFrame({
+        'vCPU': rng.integers(1, 8, size=200),
+        'Memory': rng.integers(1, 8, size=200),
+        'Storage': rng.integers(1, 40, size=200),
+        'Class': rng.integers(1, 4, size=200),
+        'AntiAffinityGroup': rng.integers(-1, 3, size=200)
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [16],
+        'Memory': [16],
+        'Storage': [100]
+    })
+
+    # When
+    solution: Solution = BestFitAlgo('Storage', segregate_classes=segregate_classes).solve(
+        vms, ServerPool(server_capacities))
+    boxed_solution: Solution = BestFitAlgo('Storage', segregate_classes=segregate_classes, index='boxed').solve(
+        vms, ServerPool(server_capacities))
+
+    # Then
+    assert boxed_solution.assignment.tolist() == solution.assignment.tolist()
+
+
 def test_find_best_fitting_server():
     # Given
     best_fit: BestFitAlgo = BestFitAlgo(criterion='weighted_resources')
@@ -109,3 +186,57 @@ def test_find_best_fitting_server_returns_none_if_no_fit():
 
     # Then
     assert best_server_index is None
+
+
+@pytest.mark.parametrize("criterion, last_server", [('dot_product', 0), ('l2_norm', 1)])
+def test_solve_with_scoring_rule_picks_best_scored_server(criterion, last_server):
+    # Given
+    best_fit: BestFitAlgo = BestFitAlgo(criterion=criterion)
+    vms = pd.DataFrame({
+        'vCPU': [6, 3, 1],
+        'Memory': [2, 6, 2],
+        'Storage': [2, 2, 1]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [8] * 3,
+        'Memory': [8] * 3,
+        'Storage': [8] * 3
+    })
+
+    # When
+    solution: Solution = best_fit.solve(vms, server_capacities)
+
+    # Then
+    # Space left before the last VM: [2, 6, 6] and [5, 2, 6]. The dot product favors the server with the most
+    # Memory to spare, the one resource the VM needs most, the L2 norm the one it leaves the most even
+    assert solution.assignment.tolist() == [0, 1, last_server]
+    np.testing.assert_allclose(scoring_rules[criterion](
+        np.array([1., 2., 1.]), np.array([[2., 6., 6.], [5., 2., 6.]]), np.full((2, 3), 8.), np.ones(3)),
+        [20 / 64, 15 / 64] if criterion == 'dot_product' else [-42 / 64, -41 / 64])
+
+
+def test_solve_with_scoring_rule_turns_on_servers_only_when_needed():
+    # Given
+    best_fit: BestFitAlgo = BestFitAlgo(criterion='scarcity_weighted')
+    scarcity_ratio = pd.Series({'vCPU': 1., 'Memory': 0.5, 'Storage': 0.})
+    vms = pd.DataFrame({
+        'vCPU': [6, 6, 4, 2, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10],
+        'AntiAffinityGroup': [np.nan, np.nan, 0, np.nan, 0]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 4,
+        'Memory': [100] * 4,
+        'Storage': [100] * 4
+    })
+
+    # When
+    solution: Solution = best_fit.solve(vms, server_capacities, scarcity_ratio)
+
+    # Then
+    # The last VM would fill server 0 up, but it hosts the other VM of group 0
+    assert solution.assignment.tolist() == [0, 1, 0, 1, 1]
+    assert solution.n_servers == 2
+    with pytest.raises(ValueError):
+        best_fit.solve(vms, server_capacities)
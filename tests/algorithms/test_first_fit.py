@@ -1,10 +1,251 @@
 from typing import Optional
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from vm_placement.algorithms.approximation.first_fit import FirstFitDivideAlgo
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo, FirstFitDivideAlgo
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.server_pool import ServerPool
 
+@pytest.mark.parametrize("engine", FirstFitAlgo.engines)
+def test_first_fit_solve(engine):
+    # Given
+    algo = FirstFitAlgo(engine=engine)
+    vms = pd.DataFrame({
+        'vCPU': [6, 5, 4, 20, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10.5],
+        'Class': [1, 2, 3, 1, 2]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 5,
+        'Memory': [14] * 5,
+        'Storage': [100] * 5
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    expected_server_fillings = pd.DataFrame({
+        'vCPU': [10, 7],
+        'Memory': [10, 10],
+        'Storage': [20., 20.5],
+    })
+    pd.testing.assert_frame_equal(expected_server_fillings, solution.server_fillings)
+    assert solution.n_servers == 2
+    assert solution.oversize_vms.index.tolist() == [3]
+    assert solution.assignment.tolist() == [0, 1, 0, -1, 1]
+
+
+
+@pytest.mark.parametrize("engine", FirstFitAlgo.engines)
+def test_first_fit_solve_separates_anti_affinity_groups(engine):
+    # Given
+    algo = FirstFitAlgo(engine=engine)
+    vms = pd.DataFrame({
+        'vCPU': [2, 2, 2, 2, 3],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10],
+        'AntiAffinityGroup': [0, 0, 0, -1, 1]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 5,
+        'Memory': [100] * 5,
+        'Storage': [100] * 5
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    assert solution.assignment.tolist() == [0, 1, 2, 0, 0]
+    assert solution.n_servers == 3
+
+
+@pytest.mark.parametrize("engine", FirstFitAlgo.engines)
+def test_first_fit_solve_segregates_classes(engine):
+    # Given
+    algo = FirstFitAlgo(engine=engine, segregate_classes=True)
+    vms = pd.DataFrame({
+        'vCPU': [6, 5, 4, 20, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10.5],
+        'Class': [1, 2, 3, 1, 2]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 5,
+        'Memory': [14] * 5,
+        'Storage': [100] * 5
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    # The class 3 VM skips server 0, which hosts a class 1 VM
+    assert solution.assignment.tolist() == [0, 1, 1, -1, 0]
+
+
+def test_first_fit_solve_prefers_open_servers_of_loaded_fleet():
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [4, 4, 4],
+        'Memory': [1, 1, 1],
+        'Storage': [1, 1, 1]
+    })
+    pool = ServerPool.fleet(
+        pd.DataFrame({
+            'vCPU': [10, 20, 10],
+            'Memory': [10, 20, 10],
+            'Storage': [10, 20, 10]
+        }),
+        initial_loads=pd.DataFrame({
+            'vCPU': [0, 10, 2],
+            'Memory': [0, 1, 1],
+            'Storage': [0, 1, 1]
+        })
+    )
+
+    # When
+    solution: Solution = FirstFitAlgo().solve(vms, pool)
+    preferring_solution: Solution = FirstFitAlgo(prefer_open_servers=True).solve(vms, pool)
+
+    # Then
+    assert solution.assignment.tolist() == [0, 0, 1]
+    assert solution.n_servers == 3
+    # The empty server 0 stays off
+    assert preferring_solution.assignment.tolist() == [1, 1, 2]
+    assert preferring_solution.n_servers == 2
+    assert preferring_solution.server_fillings['vCPU'].tolist() == [18, 6]
+    assert preferring_solution.server_capacities['vCPU'].tolist() == [20, 10]
+
+
+def test_first_fit_divide_solve_segregates_classes():
+    # Given
+    algo = FirstFitDivideAlgo(segregate_classes=True)
+    vms = pd.DataFrame({
+        'vCPU': [6, 6, 6],
+        'Memory': [5, 5, 5],
+        'Storage': [10, 10, 10],
+        'Class': [1, 3, 1]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 3,
+        'Memory': [100] * 3,
+        'Storage': [100] * 3
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    # The last VM is split between the class 1 servers 0 and 2, around the class 3 server 1
+    assert solution.assignment.tolist() == [0, 1, -2]
+    assert solution.fragments['server'].tolist() == [0, 2]
+    assert solution.fragments['fraction'].tolist() == pytest.approx([2 / 3, 1 / 3])
+
+
+@pytest.mark.parametrize("chunksize", [2, 65536])
+def test_first_fit_divide_stream_engine_matches_array_engine(chunksize):
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [6, 6, 2, 0, 9, 3, 4],
+        'Memory': [5, 9, 1, 3, 2, 8, 5],
+        'Storage': [10, 10, 10, 10, 10, 10, 10]
+    })
+    server_pool = ServerPool.fleet(
+        pd.DataFrame({
+            'vCPU': [10, 8, 10, 10, 10, 10],
+            'Memory': [14, 14, 7, 14, 14, 14],
+            'Storage': [100] * 6
+        }),
+        initial_loads=pd.DataFrame({
+            'vCPU': [2],
+            'Memory': [0],
+            'Storage': [0]
+        })
+    )
+
+    # When
+    solution: Solution = FirstFitDivideAlgo().solve(vms, server_pool)
+    stream_solution: Solution = FirstFitDivideAlgo(engine='stream', chunksize=chunksize).solve(vms, server_pool)
+
+    # Then
+    assert stream_solution.assignment.tolist() == solution.assignment.tolist()
+    assert stream_solution.fragments[['vm', 'server']].values.tolist() == \
+        solution.fragments[['vm', 'server']].values.tolist()
+    np.testing.assert_allclose(stream_solution.fragments['fraction'], solution.fragments['fraction'])
+    np.testing.assert_allclose(stream_solution.server_fillings.to_numpy(float),
+                               solution.server_fillings.to_numpy(float))
+
+
+def test_first_fit_divide_stream_engine_raises_when_pool_is_exhausted():
+    # Given
+    algo = FirstFitDivideAlgo(engine='stream')
+    vms = pd.DataFrame({
+        'vCPU': [6, 6],
+        'Memory': [5, 5],
+        'Storage': [10, 10]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    })
 
+    # When / Then
+    with pytest.raises(ValueError):
+        algo.solve(vms, server_capacities)
+
+
+def test_first_fit_solve_instrumented():
+    # Given
+    algo = FirstFitAlgo(instrument=True)
+    vms = pd.DataFrame({
+        'vCPU': [6, 5, 4, 20, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10.5]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 5,
+        'Memory': [14] * 5,
+        'Storage': [100] * 5
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    # The opened servers are probed by blocks: 0, 1, 2, 2 and 2 servers for the successive VMs
+    assert solution.stats.servers_probed == 7
+    assert solution.stats.servers_opened == 2
+    assert solution.stats.splits == 0
+    assert list(solution.stats.phase_seconds) == ['prepare', 'place', 'build_solution']
+    assert FirstFitAlgo().solve(vms, server_capacities).stats is None
+
+
+def test_first_fit_divide_solve_instrumented():
+    # Given
+    algo = FirstFitDivideAlgo(instrument=True)
+    vms = pd.DataFrame({
+        'vCPU': [6, 6],
+        'Memory': [5, 5],
+        'Storage': [10, 10]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 2,
+        'Memory': [14] * 2,
+        'Storage': [100] * 2
+    })
+
+    # When
+    solution: Solution = algo.solve(vms, server_capacities)
+
+    # Then
+    assert solution.stats.splits == 1
+    assert solution.stats.servers_opened == 2
 
 def test_fit_and_partition_vm_returns_remainder():
     # Given
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.algorithms.local_search import Improvement, LocalSearchImprover
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+def make_vms() -> pd.DataFrame:
+    return pd.DataFrame({
+        'vCPU': [4, 4, 3, 3, 6],
+        'Memory': [1, 1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1, 1]
+    })
+
+
+def make_server_pool() -> ServerPool:
+    return ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [100],
+        'Storage': [100]
+    }))
+
+
+def test_improve_empties_a_server():
+    # Given
+    vms = make_vms()
+    # First-Fit: [4, 4] [3, 3] [6], where [4, 6] [4, 3, 3] is enough
+    solution = FirstFitAlgo().solve(vms, make_server_pool())
+    improvements = []
+    improver = LocalSearchImprover(time_limit=5, callback=improvements.append)
+
+    # When
+    improved_solution = improver.improve(solution)
+
+    # Then
+    assert solution.n_servers == 3
+    assert improved_solution.n_servers == 2
+    assert improved_solution.assignment.tolist() == [1, 2, 1, 1, 2]
+    assert improved_solution.server_fillings['vCPU'].tolist() == [10, 10]
+    assert [improvement.n_servers for improvement in improvements] == [2]
+    assert improver.history == improvements
+    assert improver.history_frame().columns.tolist() == list(Improvement._fields)
+
+
+def test_improve_keeps_anti_affinity_groups_apart():
+    # Given
+    vms = make_vms()
+    vms['AntiAffinityGroup'] = [0, 0, np.nan, np.nan, 0]
+    solution = FirstFitAlgo().solve(vms, make_server_pool())
+
+    # When
+    improved_solution = LocalSearchImprover(time_limit=5).improve(solution)
+
+    # Then
+    assert improved_solution.n_servers == 3
+    assert len(set(improved_solution.assignment[[0, 1, 4]].tolist())) == 3
+
+
+def test_improve_stops_at_lower_bound():
+    # Given
+    vms = make_vms()
+    solution = FirstFitAlgo().solve(vms, make_server_pool())
+    improver = LocalSearchImprover(time_limit=5, lower_bound=3)
+
+    # When
+    improved_solution = improver.improve(solution)
+
+    # Then
+    assert improved_solution.n_servers == 3
+    assert improver.history == []
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vm_placement.algorithms.online import OnlinePlacer
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+@pytest.fixture
+def server_pool() -> ServerPool:
+    return ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }))
+
+
+@pytest.mark.parametrize("policy", OnlinePlacer.policies)
+def test_released_space_is_reused(server_pool, policy):
+    # Given
+    placer = OnlinePlacer(server_pool, policy=policy)
+    placer.place('a', [6, 5, 10])
+    placer.place('b', [5, 5, 10])
+
+    # When
+    placer.release('a')
+    server = placer.place('c', [6, 5, 10])
+
+    # Then
+    assert server == 0
+    assert placer.servers.n_servers == 2
+    assert placer.n_active_servers == 2
+
+
+@pytest.mark.parametrize("policy", ['first_fit', 'best_fit'])
+def test_loaded_servers_are_used_and_keep_their_load(policy):
+    # Given
+    server_pool = ServerPool.fleet(
+        pd.DataFrame({
+            'vCPU': [10, 10, 10],
+            'Memory': [10, 10, 10],
+            'Storage': [10, 10, 10]
+        }),
+        initial_loads=pd.DataFrame({
+            'vCPU': [6, 2],
+            'Memory': [1, 1],
+            'Storage': [1, 1]
+        })
+    )
+    placer = OnlinePlacer(server_pool, policy=policy, criterion='vCPU')
+
+    # When
+    first_server = placer.place('a', [4, 1, 1])
+    placer.release('a')
+    second_server = placer.place('b', [5, 1, 1])
+
+    # Then
+    assert first_server == 0
+    # Server 0 is back to its initial load, where the VM does not fit
+    assert placer.servers.fillings[0].tolist() == [6, 1, 1]
+    assert second_server == 1
+    assert placer.servers.n_servers == 2
+
+
+def test_best_fit_places_in_tightest_server(server_pool):
+    # Given
+    placer = OnlinePlacer(server_pool, policy='best_fit', criterion='vCPU')
+    placer.place('a', [6, 1, 1])
+    placer.place('b', [8, 1, 1])
+
+    # When
+    server = placer.place('c', [2, 1, 1])
+
+    # Then
+    assert server == 1
+
+
+def test_replay_returns_servers_of_events(server_pool):
+    # Given
+    placer = OnlinePlacer(server_pool)
+    events = pd.DataFrame({
+        'event': ['arrival', 'arrival', 'departure', 'arrival', 'arrival'],
+        'vm_id': [0, 1, 0, 2, 3],
+        'vCPU': [6, 6, 0, 6, 20],
+        'Memory': [1, 1, 0, 1, 1],
+        'Storage': [1, 1, 0, 1, 1]
+    })
+
+    # When
+    servers = placer.replay(events)
+
+    # Then
+    assert servers.tolist() == [0, 1, 0, 0, -1]
+    assert set(placer.placements) == {1, 2}
+
+
+def test_harmonic_dedicates_servers_to_size_classes(server_pool):
+    # Given
+    placer = OnlinePlacer(server_pool, policy='harmonic', n_size_classes=3)
+    vms = [[6, 1, 1], [4, 1, 1], [5.5, 1, 1], [1, 1, 1], [1, 1, 1], [4, 1, 1]]
+
+    # When
+    servers = [placer.place(vm_id, vm) for vm_id, vm in enumerate(vms)]
+
+    # Then
+    # Sizes 0.6 and 0.55 get a server each (class 1), the two 0.4 share one (class 2), the small ones another
+    assert [placer.size_class(np.array(vm, dtype=float)) for vm in vms] == [1, 2, 1, 3, 3, 2]
+    assert servers == [0, 1, 2, 3, 3, 1]
+    assert placer.place('large', [11, 1, 1]) is None
+
+
+def test_harmonic_reuses_freed_slots_and_servers(server_pool):
+    # Given
+    placer = OnlinePlacer(server_pool, policy='harmonic', n_size_classes=3)
+    for vm_id in range(3):
+        placer.place(vm_id, [4, 1, 1])
+
+    # When
+    placer.release(0)
+    # Server 1 still has its second slot, server 0 gets queued behind it
+    freed_slot_server = placer.place(3, [4, 1, 1])
+    placer.release(1)
+    emptied_server = placer.place(4, [6, 1, 1])
+
+    # Then
+    assert freed_slot_server == 1
+    assert emptied_server == 0
+    assert placer.servers.n_servers == 2
+    assert placer.n_active_servers == 2
+
+
+def test_harmonic_queues_do_not_grow_with_history(server_pool):
+    # Given
+    placer = OnlinePlacer(server_pool, policy='harmonic', n_size_classes=3)
+    placer.place('long-lived', [1, 1, 1])
+
+    # When
+    for vm_id in range(1000):
+        placer.place(vm_id, [1, 1, 1])
+        placer.release(vm_id)
+
+    # Then
+    # The next-fit server of the small VMs is queued once, however many departures it had
+    assert sum(len(slots) for slots in placer._open_slots.values()) == 1
+    assert placer.servers.n_servers == 1
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from vm_placement.algorithms.portfolio import PortfolioConfig, PortfolioRunner, default_portfolio
+
+
+def make_vms() -> pd.DataFrame:
+    return pd.DataFrame({
+        'vCPU': [1, 5, 4, 5, 6, 20],
+        'Memory': [5, 5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10, 10],
+        'Class': [1, 2, 3, 1, 2, 3]
+    })
+
+
+def make_server_capacities() -> pd.DataFrame:
+    return pd.DataFrame({
+        'vCPU': [10] * 6,
+        'Memory': [14] * 6,
+        'Storage': [100] * 6
+    })
+
+
+def test_solve_keeps_best_configuration():
+    # Given
+    vms = make_vms()
+    configs = [PortfolioConfig('first_fit'), PortfolioConfig('first_fit', 'decreasing_vCPU')]
+    runner = PortfolioRunner(configs, max_workers=2)
+
+    # When
+    solution, report = runner.solve(vms, make_server_capacities())
+
+    # Then
+    # Two VMs per server at most (Memory), original order: [1, 5] [4, 5] [6], decreasing order: [6, 4] [5, 5] [1]
+    assert report['n_servers'].tolist() == [3, 3]
+    assert report['n_oversize'].tolist() == [1, 1]
+    assert (report['status'] == 'done').all()
+    assert solution.n_servers == 3
+    assert solution.assignment.tolist() == [0, 0, 1, 1, 2, -1]
+    assert solution.oversize_vms.index.tolist() == [5]
+
+
+def test_solve_stops_at_lower_bound():
+    # Given
+    vms = make_vms()
+    runner = PortfolioRunner(default_portfolio(n_random_orders=5), max_workers=1, lower_bound=3)
+
+    # When
+    solution, report = runner.solve(vms, make_server_capacities())
+
+    # Then
+    assert solution.n_servers == 3
+    assert (report['status'] == 'cancelled').any()
+
+
+def test_solve_keeps_anti_affinity_groups_and_classes_apart():
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [1, 1, 1, 1],
+        'Memory': [1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1],
+        'AntiAffinityGroup': [0, 0, -1, -1],
+        'Class': [2, 2, 1, 3]
+    })
+    configs = [PortfolioConfig('first_fit'), PortfolioConfig('best_fit', criterion='vCPU')]
+    runner = PortfolioRunner(configs, max_workers=1, segregate_classes=True)
+
+    # When
+    solution, report = runner.solve(vms, make_server_capacities())
+
+    # Then
+    # The VMs of group 0 use different servers, and the class 3 VM doesn't join the class 1 one
+    assert report['n_servers'].tolist() == [2, 2]
+    assert solution.assignment[0] != solution.assignment[1]
+    assert solution.assignment[2] != solution.assignment[3]
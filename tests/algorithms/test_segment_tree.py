@@ -0,0 +1,43 @@
+import numpy as np
+
+from vm_placement.algorithms.approximation.segment_tree import MaxResidualTree
+
+
+def test_find_first_fitting_server_skips_complementary_space_left():
+    # Given
+    space_left = np.array([
+        [10, 0, 100],
+        [0, 14, 100],
+        [2, 2, 2],
+        [10, 14, 100],
+        [10, 14, 100],
+    ], dtype=float)
+    tree = MaxResidualTree(space_left, scale=np.array([10, 14, 100]))
+    demand = [4, 8, 10]
+
+    # When
+    first_server = tree.find_first_fitting_server(demand)
+
+    # Then
+    assert first_server == 3
+
+
+def test_find_first_fitting_server_after_update_and_extend():
+    # Given
+    space_left = np.array([
+        [10, 14, 100],
+        [10, 14, 100],
+    ], dtype=float)
+    tree = MaxResidualTree(space_left)
+    demand = [4, 8, 10]
+
+    # When
+    tree.update(0, [6, 6, 90])
+    tree.update(1, [6, 6, 90])
+    no_server = tree.find_first_fitting_server(demand)
+    tree.extend(np.array([[1, 1, 1], [10, 14, 100]], dtype=float))
+    first_server = tree.find_first_fitting_server(demand)
+
+    # Then
+    assert no_server is None
+    assert first_server == 3
@@ -0,0 +1,42 @@
+import numpy as np
+
+from vm_placement.algorithms.approximation.service_classes import ClassStateSpaceLeftIndexes, ServiceClassIndex
+
+
+def test_add_moves_server_to_state_of_its_classes():
+    # Given
+    index = ServiceClassIndex(np.array([1, 2, 3]))
+
+    # When
+    index.add(0, 2)
+    index.add(1, 1)
+    index.add(2, 3)
+    index.add(3, 1)
+
+    # Then
+    assert [index.state_of(server) for server in range(5)] == [0, 1, 2, 1, 0]
+    assert index.allowed_mask(3, 5).tolist() == [True, False, True, False, True]
+    assert index.allowed_mask(2, 5).all()
+
+
+def test_find_best_fitting_server_searches_compatible_states():
+    # Given
+    class_index = ServiceClassIndex(np.array([1, 2, 3]))
+    indexes = ClassStateSpaceLeftIndexes(class_index, key_weights=np.array([1., 0., 0.]))
+    space_left = np.array([
+        [2, 10, 10],
+        [4, 10, 10],
+        [8, 10, 10],
+    ], dtype=float)
+    class_index.add(0, 1)
+    class_index.add(2, 3)
+    for server in range(len(space_left)):
+        indexes.add(server, space_left[server])
+    demand = np.array([1, 1, 1], dtype=float)
+
+    # When
+    best_servers = [indexes.find_best_fitting_server(demand, space_left, vm_class=vm_class)
+                    for vm_class in [1, 2, 3]]
+
+    # Then
+    assert best_servers == [0, 0, 1]
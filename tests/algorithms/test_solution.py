@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation import FirstFitDivideAlgo
+from vm_placement.algorithms.solution import OVERSIZE, SPLIT, Solution
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+def make_vms() -> pd.DataFrame:
+    return pd.DataFrame({
+        'vCPU': [6, 5, 4, 20, 2],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10.5],
+        'Class': [1, 2, 3, 1, 2]
+    })
+
+
+def make_server_pool() -> ServerPool:
+    return ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }))
+
+
+def test_from_assignment_derives_server_tables():
+    # Given
+    vms = make_vms()
+    assignment = np.array([0, 1, 0, OVERSIZE, 1])
+
+    # When
+    solution = Solution.from_assignment(vms, make_server_pool(), assignment)
+
+    # Then
+    expected_server_fillings = pd.DataFrame({
+        'vCPU': [10, 7],
+        'Memory': [10, 10],
+        'Storage': [20., 20.5],
+    })
+    pd.testing.assert_frame_equal(expected_server_fillings, solution.server_fillings)
+    assert solution.assignment.dtype == np.int32
+    assert solution.n_servers == 2
+    assert solution.oversize_vms.index.tolist() == [3]
+
+
+
+def test_from_assignment_is_not_affected_by_later_changes_of_the_vms():
+    # Given
+    vms = make_vms()
+    assignment = np.array([0, 1, 0, OVERSIZE, 1])
+    solution = Solution.from_assignment(vms, make_server_pool(), assignment)
+
+    # When
+    vms['vCPU'] = 1
+    vms.drop(index=[4], inplace=True)
+
+    # Then
+    assert solution.server_fillings['vCPU'].tolist() == [10, 7]
+    assert solution.oversize_vms['vCPU'].tolist() == [20]
+    assert len(solution.vms) == 5
+
+def test_first_fit_divide_records_fragments():
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [6, 6],
+        'Memory': [5, 5],
+        'Storage': [10, 10]
+    })
+    server_capacities = pd.DataFrame({
+        'vCPU': [10] * 2,
+        'Memory': [14] * 2,
+        'Storage': [100] * 2
+    })
+
+    # When
+    solution = FirstFitDivideAlgo().solve(vms, server_capacities)
+
+    # Then
+    assert solution.assignment.tolist() == [0, SPLIT]
+    assert solution.fragments['vm'].tolist() == [1, 1]
+    assert solution.fragments['server'].tolist() == [0, 1]
+    np.testing.assert_allclose(solution.fragments['fraction'], [4 / 6, 2 / 6])
+    np.testing.assert_allclose(solution.server_fillings['vCPU'], [10, 2])
+
+
+def test_save_load_and_diff(tmp_path):
+    # Given
+    vms = make_vms()
+    previous = Solution.from_assignment(vms, make_server_pool(), np.array([0, 1, 0, OVERSIZE, 1]))
+    path = str(tmp_path / 'plan.npz')
+
+    # When
+    previous.save(path)
+    loaded = Solution.load(path, vms)
+    solution = Solution.from_assignment(vms, make_server_pool(), np.array([0, 1, 1, OVERSIZE, 0]))
+
+    # Then
+    assert loaded.assignment.tolist() == previous.assignment.tolist()
+    pd.testing.assert_frame_equal(previous.server_fillings, loaded.server_fillings)
+    assert loaded.diff(previous).empty
+    moves = solution.diff(previous)
+    assert moves['vm'].tolist() == [2, 4]
+    assert moves['previous_server'].tolist() == [0, 1]
+    assert moves['server'].tolist() == [1, 0]
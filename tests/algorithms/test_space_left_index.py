@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from vm_placement.algorithms.approximation.space_left_index import BoxedSpaceLeftIndex, SpaceLeftIndex
+
+index_types = [SpaceLeftIndex, BoxedSpaceLeftIndex]
+
+
+@pytest.mark.parametrize("index_type", index_types)
+def test_find_best_fitting_server_returns_smallest_key_that_fits(index_type):
+    # Given
+    index = index_type(key_weights=np.array([0., 0., 1.]))
+    space_left = np.array([
+        [10, 14, 92],
+        [4, 12, 100],
+        [2, 2, 101],
+        [1, 1, 50],
+    ], dtype=float)
+    for server in range(len(space_left)):
+        index.add(server, space_left[server])
+    demand = np.array([4, 8, 60], dtype=float)
+
+    # When
+    best_server = index.find_best_fitting_server(demand, space_left)
+
+    # Then
+    assert best_server == 0
+
+
+@pytest.mark.parametrize("index_type", index_types)
+def test_update_reorders_server(index_type):
+    # Given
+    index = index_type(key_weights=np.array([0., 0., 1.]))
+    space_left = np.array([
+        [10, 14, 92],
+        [10, 14, 100],
+    ], dtype=float)
+    for server in range(len(space_left)):
+        index.add(server, space_left[server])
+    demand = np.array([4, 8, 60], dtype=float)
+
+    # When
+    space_left[0] -= demand
+    index.update(0, space_left[0])
+    best_server = index.find_best_fitting_server(demand, space_left)
+
+    # Then
+    assert best_server == 1
+
+
+@pytest.mark.parametrize("index_type", index_types)
+def test_find_best_fitting_server_returns_none_if_no_fit(index_type):
+    # Given
+    index = index_type(key_weights=np.array([1., 0., 0.]))
+    space_left = np.array([
+        [10, 2, 92],
+        [3, 14, 100],
+    ], dtype=float)
+    for server in range(len(space_left)):
+        index.add(server, space_left[server])
+    demand = np.array([4, 8, 60], dtype=float)
+
+    # When
+    best_server = index.find_best_fitting_server(demand, space_left)
+
+    # Then
+    assert best_server is None
+
+
+def test_boxed_index_finds_same_servers_as_sorted_index():
+    # Given
+    rng = np.random.default_rng(0)
+    key_weights = np.array([[0., 0., 1.], [1., 0., 0.]])
+    sorted_index = SpaceLeftIndex(key_weights)
+    # Small blocks, to split and empty them
+    boxed_index = BoxedSpaceLeftIndex(key_weights, block_size=2)
+    space_left = rng.integers(0, 10, size=(40, 3)).astype(float)
+    for server in range(len(space_left)):
+        sorted_index.add(server, space_left[server])
+        boxed_index.add(server, space_left[server])
+
+    for _ in range(200):
+        # When
+        demand = rng.integers(0, 6, size=3).astype(float)
+        server = sorted_index.find_best_fitting_server(demand, space_left)
+
+        # Then
+        assert boxed_index.find_best_fitting_server(demand, space_left) == server
+        if server is not None:
+            space_left[server] = rng.integers(0, 10, size=3)
+            sorted_index.update(server, space_left[server])
+            boxed_index.update(server, space_left[server])
+    assert len(boxed_index) == len(space_left)
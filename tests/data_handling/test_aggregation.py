@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling.aggregation import aggregate_vm_types, expand_type_placements
+
+
+def test_aggregate_vm_types():
+    # Given
+    vm_data = pd.DataFrame({
+        'vCPU': [4, 2, 4, 4, 2],
+        'Memory': [8, 4, 8, 8, 4],
+        'Storage': [10, 32, 10, 10, 32],
+        'Class': [1, 1, 1, 2, 1]
+    })
+
+    # When
+    vm_types, vm_type = aggregate_vm_types(vm_data)
+
+    # Then
+    expected_vm_types = pd.DataFrame({
+        'vCPU': [4, 2, 4],
+        'Memory': [8, 4, 8],
+        'Storage': [10, 32, 10],
+        'Class': [1, 1, 2],
+        'count': [2, 2, 1]
+    })
+    pd.testing.assert_frame_equal(expected_vm_types, vm_types)
+    np.testing.assert_array_equal(vm_type, [0, 1, 0, 2, 1])
+
+
+def test_expand_type_placements():
+    # Given
+    vm_type = np.array([0, 1, 0, 0, 1])
+    placement_types = np.array([1, 0, 0])
+    placement_servers = np.array([3, 0, 2])
+    placement_counts = np.array([2, 1, 2])
+
+    # When
+    assignment = expand_type_placements(vm_type, placement_types, placement_servers, placement_counts)
+
+    # Then
+    np.testing.assert_array_equal(assignment, [0, 3, 2, 2, 3])
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from vm_placement.data_handling.generator import duplicate_rate, generate_vm_data
+
+
+def make_source() -> pd.DataFrame:
+    return pd.DataFrame({
+        'vCPU': [4, 8, 2, 2],
+        'Memory': [8., 16., 4., 4.],
+        'Storage': [10.23, 100., 10.23, 10.23],
+        'Class': [1, 2, 3, 3]
+    })
+
+
+def test_duplicate_rate():
+    # Given
+    source = make_source()
+
+    # When
+    rate = duplicate_rate(source)
+
+    # Then
+    assert rate == 0.25
+
+
+def test_generate_vm_data_mimics_source():
+    # Given
+    source = make_source()
+
+    # When
+    vm_data = generate_vm_data(10000, seed=0, source=source, duplicates=0.5)
+
+    # Then
+    assert len(vm_data) == 10000
+    assert (vm_data.dtypes == source.dtypes).all()
+    assert abs(duplicate_rate(vm_data) - 0.5) < 0.01
+    assert abs((vm_data['Class'] == 3).mean() - 0.5) < 0.05
+    pd.testing.assert_frame_equal(vm_data, generate_vm_data(10000, seed=0, source=source, duplicates=0.5))
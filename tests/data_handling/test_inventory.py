@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vm_placement.data_handling.inventory import iter_vm_chunks, load_vm_data
+
+
+def write_inventory(filepath) -> pd.DataFrame:
+    vm_data = pd.DataFrame({
+        'vCPU': [4, 8, 2, 2, 16],
+        'Memory': [8., 15.62, 4., 4., 64.],
+        'Storage': [10.23, 100., 10.23, 0.5, 2000.],
+        'Class': [1, 2, 3, 3, 1]
+    })
+    # Header prefixed with a byte order mark, as in data/vm_data.csv
+    vm_data.to_csv(filepath, sep=';', index=False, encoding='utf-8-sig')
+    return vm_data
+
+
+def test_iter_vm_chunks_streams_compact_dtypes(tmp_path):
+    # Given
+    vm_data = write_inventory(tmp_path / 'vms.csv')
+
+    # When
+    chunks = list(iter_vm_chunks(tmp_path / 'vms.csv', chunksize=2))
+
+    # Then
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(chunks[0].columns) == ['vCPU', 'Memory', 'Storage', 'Class']
+    assert chunks[0].dtypes.tolist() == [np.int32, np.float64, np.float64, np.int8]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), vm_data, check_dtype=False)
+
+
+def test_load_vm_data_maps_cached_columns(tmp_path):
+    # Given
+    vm_data = write_inventory(tmp_path / 'vms.csv')
+    cache_dir = tmp_path / 'cache'
+
+    # When
+    first_load = load_vm_data(tmp_path / 'vms.csv', cache_dir, chunksize=2)
+    first_load.loc[0, 'vCPU'] = 64
+    second_load = load_vm_data(tmp_path / 'vms.csv', cache_dir)
+
+    # Then
+    assert len(os.listdir(cache_dir)) == 1
+    assert isinstance(second_load['Memory'].values.base, np.memmap)
+    pd.testing.assert_frame_equal(second_load, vm_data, check_dtype=False)
+
+
+def test_load_vm_data_caches_each_version_of_the_file(tmp_path):
+    # Given
+    vm_data = write_inventory(tmp_path / 'vms.csv')
+    load_vm_data(tmp_path / 'vms.csv', tmp_path / 'cache')
+    vm_data.iloc[:3].to_csv(tmp_path / 'vms.csv', sep=';', index=False)
+
+    # When
+    reloaded = load_vm_data(tmp_path / 'vms.csv', tmp_path / 'cache')
+
+    # Then
+    assert len(os.listdir(tmp_path / 'cache')) == 2
+    pd.testing.assert_frame_equal(reloaded, vm_data.iloc[:3], check_dtype=False)
+
+
+def test_load_vm_data_without_writable_cache_dir(tmp_path):
+    # Given
+    vm_data = write_inventory(tmp_path / 'vms.csv')
+    # A cache folder that can't be created, even by root: its parent is a file
+    (tmp_path / 'not_a_dir').write_text('')
+    cache_dir = tmp_path / 'not_a_dir' / 'cache'
+
+    # When
+    with pytest.warns(UserWarning):
+        loaded = load_vm_data(tmp_path / 'vms.csv', cache_dir)
+
+    # Then
+    pd.testing.assert_frame_equal(loaded, vm_data, check_dtype=False)
@@ -1,6 +1,6 @@
 import pandas as pd
 
-from vm_placement.data_handling.processing import duplicate_entry
+from vm_placement.data_handling.processing import anti_affinity_group_positions, duplicate_entry
 
 
 def test_duplicate_entry():
@@ -21,4 +21,18 @@ def test_duplicate_entry():
         'Memory': [20] * n_times,
         'Storage': [30] * n_times
     })
-    pd.testing.assert_frame_equal(expected_duplicated_data, duplicated_server_data)
\ No newline at end of file
+    pd.testing.assert_frame_equal(expected_duplicated_data, duplicated_server_data)
+
+
+def test_anti_affinity_group_positions():
+    # Given
+    vm_data = pd.DataFrame({
+        'vCPU': [1, 2, 3, 4, 5],
+        'AntiAffinityGroup': [7, -1, 2, 7, 2]
+    })
+
+    # When
+    groups = anti_affinity_group_positions(vm_data)
+
+    # Then
+    assert groups == [[2, 4], [0, 3]]
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling.processing import duplicate_entry
+from vm_placement.data_handling.server_pool import OpenServers, ServerPool
+
+
+def test_to_frame_matches_duplicated_specs():
+    # Given
+    server_specs = pd.DataFrame({
+        'vCPU': [10, 20],
+        'Memory': [20, 40],
+        'Storage': [30, 60]
+    })
+    pool = ServerPool(server_specs, n_copies=5)
+
+    # When
+    server_data = pool.to_frame()
+
+    # Then
+    pd.testing.assert_frame_equal(duplicate_entry(server_specs, n_times=5), server_data)
+
+
+def test_find_first_fitting_server_skips_specs_too_small():
+    # Given
+    server_specs = pd.DataFrame({
+        'vCPU': [10, 20, 10],
+        'Memory': [20, 40, 20],
+        'Storage': [30, 60, 30]
+    })
+    pool = ServerPool(server_specs)
+    demand = np.array([15, 1, 1])
+
+    # When
+    first_server = pool.find_first_fitting_server(demand, start=2)
+
+    # Then
+    assert first_server == 4
+
+
+def test_find_first_fitting_server_returns_none_beyond_cap():
+    # Given
+    server_specs = pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [20],
+        'Storage': [30]
+    })
+    pool = ServerPool(server_specs, n_copies=3)
+    demand = np.array([1, 1, 1])
+
+    # When
+    first_server = pool.find_first_fitting_server(demand, start=3)
+
+    # Then
+    assert first_server is None
+
+
+def test_open_servers_grow_and_keep_fillings():
+    # Given
+    server_specs = pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [20],
+        'Storage': [30]
+    })
+    servers = OpenServers(ServerPool(server_specs), initial_size=2)
+
+    # When
+    servers.open_until(0)
+    servers.add_demand(0, np.array([1., 2., 3.]))
+    servers.open_until(4)
+
+    # Then
+    assert servers.n_servers == 5
+    np.testing.assert_array_equal(servers.fillings[0], [1., 2., 3.])
+    np.testing.assert_array_equal(servers.space_left[0], [9., 18., 27.])
+    np.testing.assert_array_equal(servers.space_left[4], [10., 20., 30.])
+
+
+def make_loaded_fleet() -> ServerPool:
+    return ServerPool.fleet(
+        pd.DataFrame({
+            'vCPU': [10, 40, 20, 10],
+            'Memory': [20, 80, 40, 20],
+            'Storage': [30, 120, 60, 30]
+        }),
+        initial_loads=pd.DataFrame({
+            'vCPU': [0, 30, 5, 0],
+            'Memory': [0, 10, 5, 0],
+            'Storage': [0, 10, 5, 0]
+        })
+    )
+
+
+def test_open_servers_start_from_initial_loads():
+    # Given
+    pool = make_loaded_fleet()
+
+    # When
+    servers = OpenServers(pool)
+
+    # Then
+    assert pool.n_loaded == 3
+    assert servers.n_servers == 3
+    np.testing.assert_array_equal(servers.space_left, [[10, 20, 30], [10, 70, 110], [15, 35, 55]])
+    assert servers.in_use.tolist() == [False, True, True]
+
+
+def test_find_first_fitting_server_accounts_for_initial_loads():
+    # Given
+    pool = make_loaded_fleet()
+    demand = np.array([12, 1, 1])
+
+    # When
+    first_server = pool.find_first_fitting_server(demand)
+
+    # Then
+    assert first_server == 2
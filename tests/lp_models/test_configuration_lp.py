@@ -0,0 +1,56 @@
+from unittest.mock import Mock
+
+import pandas as pd
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.configuration_lp import ConfigurationLPBound
+
+
+def test_solve_is_tighter_than_the_volume_bound():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 6, 6, 1],
+        'Memory': [1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1],
+        'Class': [1, 1, 1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    bound = ConfigurationLPBound(verbose=0)
+
+    # When
+    lower_bound = bound.solve(data)
+
+    # Then
+    # Volume bound: 19 / 10 -> 2, but no two 6-vCPU VMs share a server
+    assert lower_bound == 3
+    assert bound.converged
+    solution = FirstFitAlgo().solve(data.vm_data, data.server_pool)
+    assert bound.gap(solution) == (solution.n_servers - 3) / 3
+
+
+def test_solve_on_single_server_of_data():
+    # Given
+    # Data(path, specs, 1): one copy of the specification, used as a template
+    data: Data = Data.from_frame(pd.DataFrame({
+        'vCPU': [6, 6, 6, 1],
+        'Memory': [1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1]
+    }), pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }), 1)
+    bound = ConfigurationLPBound(verbose=0)
+
+    # When
+    lower_bound = bound.solve(data)
+
+    # Then
+    assert lower_bound == 3
@@ -0,0 +1,67 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.decomposition import DecompositionSolver, partition_vms
+
+
+def test_partition_vms_deals_classes_into_chunks():
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [8, 1, 7, 2, 6, 3, 5],
+        'Memory': [1, 1, 1, 1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1, 1, 1, 1],
+        'Class': [1, 2, 1, 2, 1, 1, 1]
+    })
+
+    # When
+    chunks = partition_vms(vms, np.array([10, 10, 10]), partition='class', chunk_size=3)
+
+    # Then
+    # The 5 VMs of class 1 are dealt by decreasing size into 2 chunks, the 2 VMs of class 2 fit in one
+    assert [chunk.tolist() for chunk in chunks] == [[0, 4, 5], [2, 6], [1, 3]]
+
+
+def test_partition_vms_clusters_resource_profiles():
+    # Given
+    vms = pd.DataFrame({
+        'vCPU': [9, 1, 9, 1, 9, 1],
+        'Memory': [1, 9, 1, 9, 1, 9],
+        'Storage': [1, 1, 1, 1, 1, 1]
+    })
+
+    # When
+    chunks = partition_vms(vms, np.array([10, 10, 10]), partition='kmeans', chunk_size=3)
+
+    # Then
+    assert sorted(chunk.tolist() for chunk in chunks) == [[0, 2, 4], [1, 3, 5]]
+
+
+def test_solve_stitches_and_repairs_chunks():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 4, 6, 4, 5, 5, 20],
+        'Memory': [1, 1, 1, 1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1, 1, 1, 1],
+        'Class': [1, 2, 1, 2, 1, 2, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    solver = DecompositionSolver(chunk_size=10, time_limit=10, repair_time_limit=5, max_workers=1, verbose=0)
+
+    # When
+    solution, report = solver.solve(data)
+
+    # Then
+    # Class 1 alone needs 3 servers ([6], [6], [5]) and class 2 two ([4, 4], [5]); the repair merges them into 3
+    assert report['n_servers'].tolist() == [3, 2]
+    assert solution.n_servers == 3
+    assert solution.assignment[6] == -1
+    assert (solution.server_fillings['vCPU'] <= 10).all()
@@ -0,0 +1,45 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.lower_bounds import CombinatorialLowerBound, martello_toth_bound
+
+
+def test_martello_toth_bound_beats_continuous_bound():
+    # Given
+    # Continuous bound: ceil(2.7) = 3, but the 0.45 VMs do not fit next to the 0.6 ones
+    sizes = np.array([0.6, 0.6, 0.6, 0.45, 0.45])
+
+    # When
+    bound = martello_toth_bound(sizes)
+
+    # Then
+    assert bound == 4
+
+
+def test_solve():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 6, 6, 1, 20],
+        'Memory': [1, 1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    bound = CombinatorialLowerBound(verbose=0)
+
+    # When
+    lower_bound = bound.solve(data)
+
+    # Then
+    # The oversize VM is left out
+    assert bound.continuous == 2
+    assert bound.large_items == 3
+    assert lower_bound == 3
@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.matrix_model import MatrixNominalModel
+
+
+def test_solve_finds_optimal_server_count():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 5, 4, 5, 1, 2],
+        'Memory': [5, 5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10, 10],
+        'Class': [1, 2, 3, 1, 2, 3]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }))
+    model = MatrixNominalModel(verbose=0)
+
+    # When
+    result = model.solve(data)
+
+    # Then
+    assert np.isclose(result.fun, 3)
+    assert model.build_time is not None and model.solve_time is not None
+
+
+def test_solve_sizes_servers_from_first_fit():
+    # Given
+    data: Data = Mock(Data)
+    # Two VMs larger than half a server, which n_vms // 2 servers could not host
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 6, 1],
+        'Memory': [1, 1, 1],
+        'Storage': [1, 1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }), n_copies=1)
+    model = MatrixNominalModel(verbose=0)
+
+    # When
+    result = model.solve(data)
+
+    # Then
+    assert result.success
+    assert np.isclose(result.fun, 2)
+
+
+def test_solve_rejects_loaded_servers():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 4],
+        'Memory': [1, 1],
+        'Storage': [1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }), initial_loads=pd.DataFrame({
+        'vCPU': [5],
+        'Memory': [1],
+        'Storage': [1]
+    }))
+    model = MatrixNominalModel(verbose=0)
+
+    # When / Then
+    with pytest.raises(ValueError):
+        model.solve(data)
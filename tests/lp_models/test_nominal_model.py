@@ -0,0 +1,225 @@
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.nominal_model import NominalModel
+
+
+def test_create_instance_starts_from_initial_solution():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 5, 4, 5, 1],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }))
+    initial_solution = FirstFitAlgo().solve(data.vm_data, data.server_pool)
+    model = NominalModel(verbose=0, symmetry_breaking=True, aggregated_linking=True)
+
+    # When
+    model_instance = model._create_instance(data, initial_solution)
+
+    # Then
+    assert model_instance.m_servers.value == 3
+    assert len(model_instance.SymmetryConstraint) == 2
+    assert not hasattr(model_instance, 'ServerCountConstraint')
+    assert [model_instance.x[1, j].value for j in model_instance.J_server] == [1, 0, 0]
+    assert [model_instance.x[2, j].value for j in model_instance.J_server] == [0, 1, 0]
+    assert [model_instance.y[j].value for j in model_instance.J_server] == [1, 1, 1]
+
+
+def test_create_instance_separates_anti_affinity_groups():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [1, 1, 1, 1],
+        'Memory': [1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1],
+        'AntiAffinityGroup': [0, 0, 1, -1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    initial_solution = FirstFitAlgo().solve(data.vm_data, data.server_pool)
+    model = NominalModel(verbose=0)
+
+    # When
+    model_instance = model._create_instance(data, initial_solution)
+
+    # Then
+    assert model_instance.m_servers.value == 2
+    # Only group 0 has several VMs
+    assert list(model_instance.group_vms[1]) == [1, 2]
+    assert len(model_instance.AntiAffinityConstraint) == 2
+
+
+def test_create_instance_segregates_classes():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [1, 1, 1, 1],
+        'Memory': [1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1],
+        'Class': [1, 3, 2, 3]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    initial_solution = FirstFitAlgo(segregate_classes=True).solve(data.vm_data, data.server_pool)
+    model = NominalModel(verbose=0, segregate_classes=True)
+
+    # When
+    model_instance = model._create_instance(data, initial_solution)
+
+    # Then
+    assert model_instance.m_servers.value == 2
+    assert list(model_instance.P_pair) == [(1, 3)]
+    # One constraint per VM of class 1 or 3 and per server
+    assert len(model_instance.ClassConstraint) == 6
+    assert [model_instance.u[1, 3, j].value for j in model_instance.J_server] == [1, 0]
+
+
+def test_create_instance_on_loaded_fleet():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [4, 4, 4],
+        'Memory': [1, 1, 1],
+        'Storage': [1, 1, 1]
+    })
+    data.server_pool = ServerPool.fleet(
+        pd.DataFrame({
+            'vCPU': [10, 10, 20, 10],
+            'Memory': [10, 10, 20, 10],
+            'Storage': [10, 10, 20, 10]
+        }),
+        initial_loads=pd.DataFrame({
+            'vCPU': [0, 0, 10],
+            'Memory': [0, 0, 1],
+            'Storage': [0, 0, 1]
+        })
+    )
+    initial_solution = FirstFitAlgo().solve(data.vm_data, data.server_pool)
+    model = NominalModel(verbose=0, symmetry_breaking=True)
+
+    # When
+    model_instance = model._create_instance(data, initial_solution)
+
+    # Then
+    assert model_instance.m_servers.value == 3
+    assert [model_instance.cpu_capacity[j] for j in model_instance.J_server] == [10, 10, 10]
+    assert [model_instance.storage_capacity[j] for j in model_instance.J_server] == [10, 10, 19]
+    assert model_instance.y[3].fixed
+    # Only the two first servers, identical and empty, are interchangeable
+    assert list(model_instance.SymmetryConstraint) == [1]
+
+
+def make_first_fit_suboptimal_data() -> Data:
+    # First-Fit uses 3 servers ([4, 4], [3, 3], [6]), the optimum 2 ([4, 6], [4, 3, 3])
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [4, 4, 3, 3, 6],
+        'Memory': [1, 1, 1, 1, 1],
+        'Storage': [1, 1, 1, 1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }))
+    return data
+
+
+def test_solve_anytime_returns_optimal_incumbent_as_solution():
+    # Given
+    data = make_first_fit_suboptimal_data()
+    model = NominalModel(verbose=0, solver='appsi_highs', symmetry_breaking=True, aggregated_linking=True)
+    records = []
+
+    # When
+    result = model.solve_anytime(data, time_limit=30, callback=records.append)
+
+    # Then
+    assert result.incumbent == 2
+    assert result.bound == 2
+    assert result.gap == 0
+    assert result.solution.n_servers == 2
+    assert (result.solution.server_fillings['vCPU'] <= 10).all()
+    assert records == result.progress
+    assert records[-1].incumbent == 2
+
+
+def test_solve_anytime_stops_when_callback_asks():
+    # Given
+    data = make_first_fit_suboptimal_data()
+    model = NominalModel(verbose=0, solver='appsi_highs')
+
+    # When
+    result = model.solve_anytime(data, time_limit=30, callback=lambda progress: True)
+
+    # Then
+    assert len(result.progress) == 1
+    # The First-Fit warm start is still a valid incumbent
+    assert result.solution.n_servers == result.incumbent
+    assert result.incumbent in (2, 3)
+
+
+def test_solve_anytime_needs_integer_model():
+    # Given
+    data = make_first_fit_suboptimal_data()
+    model = NominalModel(verbose=0, linear_relaxation=True, solver='appsi_highs')
+
+    # When / Then
+    with pytest.raises(ValueError):
+        model.solve_anytime(data)
+
+
+def test_create_instance_with_single_server_of_data_as_in_notebook():
+    # Given
+    # Data(path, specs, 1), as in demo_linear_prog.ipynb: one copy of the specification, used as a template
+    data: Data = Data.from_frame(pd.DataFrame({
+        'vCPU': [6, 5, 4, 5, 1],
+        'Memory': [5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10]
+    }), pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }), 1)
+    model = NominalModel(verbose=0, symmetry_breaking=True)
+
+    # When
+    model_instance = model._create_instance(data, model._initial_solution(data))
+
+    # Then
+    assert model_instance.m_servers.value == 3
+    assert [model_instance.cpu_capacity[j] for j in model_instance.J_server] == [10, 10, 10]
+
+
+def test_solve_anytime_without_highs_callbacks_records_final_state(monkeypatch):
+    # Given
+    import highspy
+    # As with a version of highspy without the callback events
+    monkeypatch.delattr(highspy.Highs, 'cbMipImprovingSolution')
+    data = make_first_fit_suboptimal_data()
+    model = NominalModel(verbose=0, solver='appsi_highs', symmetry_breaking=True, aggregated_linking=True)
+
+    # When
+    result = model.solve_anytime(data, time_limit=30)
+
+    # Then
+    assert result.solution.n_servers == 2
+    assert [record.incumbent for record in result.progress] == [2]
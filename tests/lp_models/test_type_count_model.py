@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vm_placement.data_handling import Data
+from vm_placement.data_handling.server_pool import ServerPool
+from vm_placement.lp_models.type_count_model import TypeCountModel
+
+
+def test_solve_assigns_every_vm():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 4, 6, 4, 5, 5],
+        'Memory': [5, 5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10, 10],
+        'Class': [1, 1, 1, 1, 1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }))
+    model = TypeCountModel(verbose=0)
+
+    # When
+    result = model.solve(data)
+
+    # Then
+    assert np.isclose(result.fun, 3)
+    server_cpu = np.bincount(model.assignment, weights=data.vm_data['vCPU'])
+    assert len(np.flatnonzero(server_cpu)) == 3
+    assert (server_cpu <= 10).all()
+
+
+def test_solve_on_fixed_count_pool():
+    # Given
+    # Data(path, specs, 1): one copy of the specification, used as a template
+    data: Data = Data.from_frame(pd.DataFrame({
+        'vCPU': [6, 4, 6, 4, 5, 5],
+        'Memory': [5, 5, 5, 5, 5, 5],
+        'Storage': [10, 10, 10, 10, 10, 10]
+    }), pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [14],
+        'Storage': [100]
+    }), 1)
+    model = TypeCountModel(verbose=0)
+
+    # When
+    result = model.solve(data)
+
+    # Then
+    assert np.isclose(result.fun, 3)
+    assert (model.assignment >= 0).all()
+
+
+def test_solve_rejects_loaded_servers():
+    # Given
+    data: Data = Mock(Data)
+    data.vm_data = pd.DataFrame({
+        'vCPU': [6, 4],
+        'Memory': [1, 1],
+        'Storage': [1, 1]
+    })
+    data.server_pool = ServerPool(pd.DataFrame({
+        'vCPU': [10],
+        'Memory': [10],
+        'Storage': [10]
+    }), initial_loads=pd.DataFrame({
+        'vCPU': [5],
+        'Memory': [1],
+        'Storage': [1]
+    }))
+    model = TypeCountModel(verbose=0)
+
+    # When / Then
+    with pytest.raises(ValueError):
+        model.solve(data)
@@ -1,2 +1,3 @@
 from .best_fit import BestFitAlgo
-from .first_fit import FirstFitAlgo, FirstFitDivideAlgo
\ No newline at end of file
+from .first_fit import FirstFitAlgo, FirstFitDivideAlgo
+from .scoring import scoring_rules
\ No newline at end of file
@@ -0,0 +1,49 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.instrumentation import SolveStats
+from vm_placement.data_handling.processing import anti_affinity_column
+
+
+def anti_affinity_groups(vms: pd.DataFrame) -> Optional[np.ndarray]:
+    """Anti-affinity group of each VM (-1 for none), or None when no VM has one. The groups are renumbered from 0
+    in increasing order, which keeps the bitsets of AntiAffinityIndex as short as possible."""
+    if anti_affinity_column not in vms.columns:
+        return None
+    groups = vms[anti_affinity_column].fillna(-1).to_numpy(dtype=np.int64, copy=True)
+    in_group = groups >= 0
+    if not in_group.any():
+        return None
+    groups[in_group] = np.unique(groups[in_group], return_inverse=True)[1]
+    return groups
+
+
+class AntiAffinityIndex:
+    """Anti-affinity groups hosted by each server, as one bitset per server.
+
+    Bit g of the bitset of a server is set once it hosts a VM of group g, so checking whether a VM of group g
+    conflicts with a server is a single bit test, costing about as much as a capacity check. The bitsets grow
+    as the servers receive their first grouped VM. Conflict checks count as fit checks in `stats`, if given.
+    """
+    def __init__(self, stats: Optional[SolveStats] = None):
+        self.stats: Optional[SolveStats] = stats
+        self._server_groups: List[int] = []
+
+    def _ensure_servers(self, n_servers: int) -> None:
+        if n_servers > len(self._server_groups):
+            self._server_groups.extend([0] * (n_servers - len(self._server_groups)))
+
+    def allows(self, server: int, group: int) -> bool:
+        """Whether a VM of the group can join the server."""
+        if self.stats is not None:
+            self.stats.fit_checks += 1
+        return group < 0 or server >= len(self._server_groups) or not (self._server_groups[server] >> group) & 1
+
+    def add(self, server: int, group: int) -> None:
+        """Records that the server hosts a VM of the group."""
+        if group >= 0:
+            self._ensure_servers(server + 1)
+            self._server_groups[server] |= 1 << group
+
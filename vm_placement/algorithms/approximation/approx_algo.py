@@ -1,11 +1,20 @@
-from typing import Optional
+from typing import Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex
+from vm_placement.algorithms.instrumentation import SolveStats
+from vm_placement.algorithms.solution import Solution, server_fillings_frame
 from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import OpenServers
 
 class ApproxAlgo:
-    """This is a generic class that contains helper methods useful for all its child classes."""
+    """This is a generic class that contains helper methods useful for all its child classes.
+    With `instrument` set, solves collect a SolveStats attached to the solution; otherwise the counting code
+    is skipped."""
+    instrument: bool = False
+
     def _vm_fits_in_space_left(self, vm: pd.Series, space_left: pd.Series):
         return (space_left[resource_columns] >= vm[resource_columns]).all()
     def _vm_fits_in_server(self, vm: pd.Series, server_capacity: pd.Series, server_filling: pd.Series) -> bool:
@@ -31,6 +40,97 @@ class ApproxAlgo:
         else:
             return None
 
+    # Array-backed helpers: resources are held as (n, len(resource_columns)) float arrays in resource_columns order
+
+    def _new_stats(self, n_vms: int) -> Optional[SolveStats]:
+        return SolveStats(n_vms) if self.instrument else None
+
+    def _to_resource_array(self, data: pd.DataFrame) -> np.ndarray:
+        return np.ascontiguousarray(data[resource_columns].to_numpy(dtype=float))
+
+    def _identical_vm_runs(self, demands: np.ndarray, *labels: Optional[np.ndarray]
+                           ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the start positions and lengths of the runs of consecutive VMs with identical demands (and
+        labels, such as anti-affinity groups or classes, when given), which get placed as batches."""
+        if len(demands) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        changes = (demands[1:] != demands[:-1]).any(axis=1)
+        for vm_labels in labels:
+            if vm_labels is not None:
+                changes |= vm_labels[1:] != vm_labels[:-1]
+        run_starts = np.flatnonzero(np.concatenate([[True], changes]))
+        run_lengths = np.diff(np.append(run_starts, len(demands)))
+        return run_starts, run_lengths
+
+    def _find_first_fitting_server_in_arrays(self, demand: np.ndarray, space_left: np.ndarray,
+                                             start: int = 0, stop: Optional[int] = None,
+                                             block_size: int = 64, stats: Optional[SolveStats] = None,
+                                             anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1,
+                                             allowed: Optional[np.ndarray] = None) -> Optional[int]:
+        """Returns the position of the first server in [start, stop) where the VM fits entirely, and that hosts
+        no VM of its anti-affinity group, if any. `allowed` masks out the servers that can't host the VM anyway,
+        e.g. because of its class of service.
+        The range is probed with vectorized fit masks over blocks of doubling size, so that a fit close to
+        `start` does not pay for the whole range."""
+        stop = len(space_left) if stop is None else min(stop, len(space_left))
+        block_start: int = start
+        while block_start < stop:
+            block_stop: int = min(block_start + block_size, stop)
+            fits = (space_left[block_start:block_stop] >= demand).all(axis=1)
+            if allowed is not None:
+                fits &= allowed[block_start:block_stop]
+            if stats is not None:
+                stats.fit_checks += block_stop - block_start
+                stats.servers_probed += block_stop - block_start
+            if anti_affinity is None or group < 0:
+                first = int(fits.argmax())
+                if fits[first]:
+                    return block_start + first
+            else:
+                for candidate in np.flatnonzero(fits):
+                    if anti_affinity.allows(block_start + int(candidate), group):
+                        return block_start + int(candidate)
+            block_start = block_stop
+            block_size *= 2
+        return None
+
+    def _open_first_fitting_server(self, demand: np.ndarray, servers: OpenServers, start: int = 0,
+                                   stats: Optional[SolveStats] = None,
+                                   anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1,
+                                   allowed: Optional[np.ndarray] = None) -> Optional[int]:
+        """Returns the first server, starting at `start`, where the VM fits entirely (without anti-affinity
+        conflict, among the `allowed` servers). The opened servers are searched first, then the first fitting
+        server of the pool gets opened, which being empty has no conflict."""
+        server = self._find_first_fitting_server_in_arrays(demand, servers.space_left, start=start, stats=stats,
+                                                           anti_affinity=anti_affinity, group=group, allowed=allowed)
+        if server is None:
+            server = servers.pool.find_first_fitting_server(demand, start=max(start, servers.n_servers))
+            if server is not None:
+                servers.open_until(server)
+        return server
+
+    def _to_server_fillings(self, fillings: np.ndarray, server_capacities: pd.DataFrame) -> pd.DataFrame:
+        return server_fillings_frame(fillings, server_capacities)
+
+    def _build_solution(self, servers: OpenServers, vms: Optional[pd.DataFrame] = None,
+                        assignment: Optional[np.ndarray] = None, fragments: Optional[pd.DataFrame] = None,
+                        stats: Optional[SolveStats] = None) -> Solution:
+        """Solution around the assignment of the VMs, or with the server tables of the opened servers when
+        there is no assignment."""
+        if stats is not None:
+            stats.end_phase('place')
+            stats.servers_opened = servers.n_servers
+        if assignment is not None:
+            solution = Solution.from_assignment(vms, servers.pool, assignment, servers.n_servers, fragments,
+                                                algo_name=str(self), stats=stats)
+        else:
+            server_capacities = servers.to_frame()
+            server_fillings = self._to_server_fillings(servers.fillings, server_capacities)
+            solution = Solution(server_capacities, server_fillings, algo_name=str(self), stats=stats)
+        if stats is not None:
+            stats.end_phase('build_solution')
+        return solution
+
     def __repr__(self):
         return self.__class__.__name__
 
@@ -1,37 +1,198 @@
 from typing import Union, List, Optional
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex, anti_affinity_groups
 from vm_placement.algorithms.approximation.approx_algo import ApproxAlgo
-from vm_placement.algorithms.solution import Solution
+from vm_placement.algorithms.approximation.scoring import ScoringRule, scoring_rules
+from vm_placement.algorithms.approximation.service_classes import ClassStateSpaceLeftIndexes, ServiceClassIndex, \
+    service_classes
+from vm_placement.algorithms.approximation.space_left_index import BoxedSpaceLeftIndex, SpaceLeftIndex
+from vm_placement.algorithms.instrumentation import SolveStats
 from vm_placement.data_handling.processing import resource_columns
-from vm_placement.data_handling.sorting import compute_and_add_weighted_resources
+from vm_placement.data_handling.server_pool import OpenServers, ServerPool
 
 
 class BestFitAlgo(ApproxAlgo):
-    def __init__(self, criterion: Union[str, List[str]]):
+    """Best-Fit placement: each VM goes to the visited server with the smallest space left by the sorting
+    criterion where it fits, without sharing a server with a VM of its anti-affinity group (see
+    `anti_affinity_column`). With `segregate_classes`, VMs of `incompatible_classes` never share a server: the
+    visited servers are indexed by server state (see ServiceClassIndex) and only the states that can host the
+    class of a VM are searched.
+    The criterion may also be a scoring rule, by name in `scoring_rules` ('dot_product', 'l2_norm',
+    'scarcity_weighted', which needs the scarcity ratio) or as a ScoringRule function: each VM then goes to the
+    fitting server in use with the highest score, all of them being scored in one array operation, and only turns
+    on another server when none fits. A run of identical VMs fills the chosen server before being scored again.
+    The scarcity ratio, if given, weights the resources in all the rules.
+    The `index` keeping the visited servers sorted by space left is either:
+    - 'sorted': a SpaceLeftIndex, scanned in key order from the smallest key a fitting server could have
+    - 'boxed': a BoxedSpaceLeftIndex, which skips the blocks of servers whose largest space left doesn't dominate
+      the demand, faster with thousands of partially filled servers
+    Both indexes yield the same placements."""
+    indexes = {'sorted': SpaceLeftIndex, 'boxed': BoxedSpaceLeftIndex}
+
+    def __init__(self, criterion: Union[str, List[str], ScoringRule], instrument: bool = False,
+                 segregate_classes: bool = False, index: str = 'sorted'):
+        if index not in self.indexes:
+            raise ValueError(f"Unknown space left index '{index}', expected one of {list(self.indexes)}")
         self.sorting_criterion = criterion
+        self.index: str = index
+        self.instrument: bool = instrument
+        self.segregate_classes: bool = segregate_classes
 
-    def solve(self, vms: pd.DataFrame, server_capacities: pd.DataFrame, scarcity_ratio=None):
+    def solve(self, vms: pd.DataFrame, server_capacities: Union[pd.DataFrame, ServerPool], scarcity_ratio=None):
+        stats = self._new_stats(len(vms))
+        demands: np.ndarray = self._to_resource_array(vms)
+        servers = OpenServers(ServerPool.from_servers(server_capacities))
+        classes: Optional[np.ndarray] = service_classes(vms) if self.segregate_classes else None
+        class_index: Optional[ServiceClassIndex] = ServiceClassIndex(classes) if classes is not None else None
+        if self._scoring_rule() is not None:
+            return self._solve_scored(vms, demands, servers, class_index, classes, scarcity_ratio, stats)
+        # Ordered index over the space left of the already visited servers
+        key_weights = self._space_left_key_weights(servers.pool, scarcity_ratio)
+        visited_servers: Union[SpaceLeftIndex, ClassStateSpaceLeftIndexes] = \
+            self.indexes[self.index](key_weights, stats=stats) if class_index is None \
+            else ClassStateSpaceLeftIndexes(class_index, key_weights, stats=stats, index_type=self.indexes[self.index])
         curr_server: int = 0
-        server_fillings = pd.DataFrame(0, index=server_capacities.index, columns=server_capacities.columns)
-        oversize_vms = pd.DataFrame(columns=vms.columns)
-
-        for i, vm in tqdm(vms.iterrows()):
-            # Find the best already visited server where the VM fits
-            best_fitting_server = self._find_best_fitting_server(vm, server_capacities, server_fillings, curr_server, scarcity_ratio)
-            if best_fitting_server is not None:
-                self._add_vm_to_server(vm, server_fillings, best_fitting_server)
-            else:
-                # Find a server where the VM fits in the non-visited servers.
-                next_fit_index: Optional[int] = self._find_next_fitting_server(curr_server, vm, server_capacities, server_fillings)
-                if next_fit_index is not None:
-                    curr_server = next_fit_index
-                    self._add_vm_to_server(vm, server_fillings, curr_server)
+        assignment: np.ndarray = np.full(len(demands), -1, dtype=np.int64)
+        groups: Optional[np.ndarray] = anti_affinity_groups(vms)
+        anti_affinity: Optional[AntiAffinityIndex] = AntiAffinityIndex(stats) if groups is not None else None
+        vm_runs = self._identical_vm_runs(demands, groups, classes)
+        if stats is not None:
+            stats.end_phase('prepare')
+
+        # Identical consecutive VMs are placed as a batch: the server receiving them stays the best one
+        for run_start, run_length in tqdm(zip(*vm_runs)):
+            demand: np.ndarray = demands[run_start]
+            group: int = int(groups[run_start]) if groups is not None else -1
+            vm_class: int = int(classes[run_start]) if classes is not None else 0
+            # A server takes a single VM of an anti-affinity group
+            max_batch: int = 1 if group >= 0 else run_length
+            n_placed: int = 0
+            while n_placed < run_length:
+                # Find the best already visited server where the VM fits
+                if class_index is not None:
+                    best_fitting_server = visited_servers.find_best_fitting_server(demand, servers.space_left,
+                                                                                   anti_affinity, group, vm_class)
                 else:
-                    oversize_vms = pd.concat([oversize_vms, vm.to_frame().T])
-        return Solution(server_capacities, server_fillings, oversize_vms, algo_name=str(self))
+                    best_fitting_server = visited_servers.find_best_fitting_server(demand, servers.space_left,
+                                                                                   anti_affinity, group)
+                if best_fitting_server is None:
+                    # Find a server where the VM fits in the non-visited servers.
+                    allowed = class_index.allowed_mask(vm_class, servers.n_servers) if class_index is not None \
+                        else None
+                    next_fit_index: Optional[int] = self._open_first_fitting_server(
+                        demand, servers, start=curr_server, stats=stats, anti_affinity=anti_affinity, group=group,
+                        allowed=allowed)
+                    if next_fit_index is None:
+                        break
+                    for server in range(curr_server, next_fit_index):
+                        visited_servers.add(server, servers.space_left[server])
+                    curr_server = next_fit_index
+
+                server: int = best_fitting_server if best_fitting_server is not None else curr_server
+                count: int = servers.add_demand_batch(server, demand, min(run_length - n_placed, max_batch))
+                assignment[run_start + n_placed:run_start + n_placed + count] = server
+                n_placed += count
+                if anti_affinity is not None:
+                    anti_affinity.add(server, group)
+                if class_index is not None:
+                    class_index.add(server, vm_class)
+                if best_fitting_server is not None:
+                    visited_servers.update(best_fitting_server, servers.space_left[best_fitting_server])
+
+        return self._build_solution(servers, vms, assignment, stats=stats)
+
+    def _scoring_rule(self) -> Optional[ScoringRule]:
+        if callable(self.sorting_criterion):
+            return self.sorting_criterion
+        if isinstance(self.sorting_criterion, str):
+            return scoring_rules.get(self.sorting_criterion)
+        return None
+
+    def _solve_scored(self, vms: pd.DataFrame, demands: np.ndarray, servers: OpenServers,
+                      class_index: Optional[ServiceClassIndex], classes: Optional[np.ndarray],
+                      scarcity_ratio: Optional[pd.Series], stats: Optional[SolveStats]):
+        """Best-Fit by a scoring rule, over all the servers in use."""
+        rule: ScoringRule = self._scoring_rule()
+        if scarcity_ratio is not None:
+            weights = scarcity_ratio[resource_columns].to_numpy(dtype=float)
+        elif self.sorting_criterion == 'scarcity_weighted':
+            raise ValueError("A scarcity ratio is needed to score servers by scarcity-weighted space left")
+        else:
+            weights = np.ones(len(resource_columns))
+        assignment: np.ndarray = np.full(len(demands), -1, dtype=np.int64)
+        groups: Optional[np.ndarray] = anti_affinity_groups(vms)
+        anti_affinity: Optional[AntiAffinityIndex] = AntiAffinityIndex(stats) if groups is not None else None
+        vm_runs = self._identical_vm_runs(demands, groups, classes)
+        if stats is not None:
+            stats.end_phase('prepare')
+
+        for run_start, run_length in tqdm(zip(*vm_runs)):
+            demand: np.ndarray = demands[run_start]
+            group: int = int(groups[run_start]) if groups is not None else -1
+            vm_class: int = int(classes[run_start]) if classes is not None else 0
+            # A server takes a single VM of an anti-affinity group
+            max_batch: int = 1 if group >= 0 else run_length
+            n_placed: int = 0
+            while n_placed < run_length:
+                allowed = class_index.allowed_mask(vm_class, servers.n_servers) if class_index is not None \
+                    else None
+                server = self._find_best_scored_server(rule, demand, servers, weights, allowed, anti_affinity, group,
+                                                       stats)
+                if server is None:
+                    # Turn on the first fitting server, opened but empty or from the pool
+                    idle = ~servers.in_use if allowed is None else ~servers.in_use & allowed
+                    server = self._open_first_fitting_server(demand, servers, stats=stats,
+                                                             anti_affinity=anti_affinity, group=group, allowed=idle)
+                    if server is None:
+                        break
+                count: int = servers.add_demand_batch(server, demand, min(run_length - n_placed, max_batch))
+                assignment[run_start + n_placed:run_start + n_placed + count] = server
+                n_placed += count
+                if anti_affinity is not None:
+                    anti_affinity.add(server, group)
+                if class_index is not None:
+                    class_index.add(server, vm_class)
+
+        return self._build_solution(servers, vms, assignment, stats=stats)
+
+    def _find_best_scored_server(self, rule: ScoringRule, demand: np.ndarray, servers: OpenServers,
+                                 weights: np.ndarray, allowed: Optional[np.ndarray] = None,
+                                 anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1,
+                                 stats: Optional[SolveStats] = None) -> Optional[int]:
+        """Server in use with the highest score among the ones where the demand fits, or None."""
+        fits = servers.in_use & (servers.space_left >= demand).all(axis=1)
+        if allowed is not None:
+            fits &= allowed
+        if stats is not None:
+            stats.fit_checks += servers.n_servers
+            stats.servers_probed += servers.n_servers
+        candidates = np.flatnonzero(fits)
+        if len(candidates) == 0:
+            return None
+        scores = rule(demand, servers.space_left[candidates], servers.capacities[candidates], weights)
+        if anti_affinity is None or group < 0:
+            return int(candidates[np.argmax(scores)])
+        for position in np.argsort(-scores, kind='stable'):
+            if anti_affinity.allows(int(candidates[position]), group):
+                return int(candidates[position])
+        return None
+
+    def _space_left_key_weights(self, pool: ServerPool, scarcity_ratio: Optional[pd.Series]) -> np.ndarray:
+        """Linear weights turning the space left of a server into its sorting key, one row per criterion.
+        The weighted resources are scaled by the largest server capacity so that the key of a server
+        only depends on its own space left."""
+        if self.sorting_criterion == 'weighted_resources':
+            if scarcity_ratio is None:
+                raise ValueError("A scarcity ratio is needed to sort servers by weighted resources")
+            max_capacities = pool.spec_capacities.max(axis=0)
+            return scarcity_ratio[resource_columns].to_numpy(dtype=float) / max_capacities
+        criteria = [self.sorting_criterion] if isinstance(self.sorting_criterion, str) else self.sorting_criterion
+        return np.array([[1. if resource == criterion else 0. for resource in resource_columns]
+                         for criterion in criteria])
 
     def _find_best_fitting_server(self,
                                   vm: pd.Series,
@@ -40,16 +201,15 @@ class BestFitAlgo(ApproxAlgo):
                                   curr_server: int,
                                   scarcity_ratio: pd.Series
                                   ) -> Optional[int]:
-        space_left: pd.DataFrame = server_capacities[resource_columns] - server_fillings[resource_columns]
-        space_left = space_left[:][:curr_server]
-        if self.sorting_criterion == 'weighted_resources':
-            space_left = compute_and_add_weighted_resources(space_left, scarcity_ratio)
-        space_left = space_left.sort_values(self.sorting_criterion, ascending=True)
-
-        for index, space_in_server in space_left.iterrows():
-            if self._vm_fits_in_space_left(vm, space_in_server):
-                return index
-        return None
+        """Returns the index of the best server, among the ones before curr_server, where the VM fits."""
+        space_left: np.ndarray = self._to_resource_array(server_capacities) - self._to_resource_array(server_fillings)
+        visited_servers = self.indexes[self.index](
+            self._space_left_key_weights(ServerPool.from_servers(server_capacities), scarcity_ratio))
+        for server in range(curr_server):
+            visited_servers.add(server, space_left[server])
+        best_position = visited_servers.find_best_fitting_server(vm[resource_columns].to_numpy(dtype=float),
+                                                                 space_left)
+        return server_capacities.index[best_position] if best_position is not None else None
 
 if __name__ == '__main__':
     from vm_placement.data_handling.data_loader import Data
@@ -65,5 +225,5 @@ if __name__ == '__main__':
     )
     data.vm_data = data.vm_data.loc[:50]
     best_fit = BestFitAlgo(criterion='Storage')
-    solution = best_fit.solve(data.vm_data, data.server_data,)
+    solution = best_fit.solve(data.vm_data, data.server_pool)
     solution.display()
\ No newline at end of file
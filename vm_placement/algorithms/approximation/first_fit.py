@@ -1,51 +1,315 @@
-from typing import Optional
+from typing import Dict, Optional, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex, anti_affinity_groups
 from vm_placement.algorithms.approximation.approx_algo import ApproxAlgo
-from vm_placement.algorithms.solution import Solution
+from vm_placement.algorithms.approximation.segment_tree import MaxResidualTree
+from vm_placement.algorithms.approximation.service_classes import ClassStateTrees, ServiceClassIndex, service_classes
+from vm_placement.algorithms.instrumentation import SolveStats
+from vm_placement.algorithms.solution import SPLIT
 from tqdm import tqdm
 
 from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import OpenServers, ServerPool
 
 
 class FirstFitAlgo(ApproxAlgo):
-    def solve(self, vms: pd.DataFrame, server_capacities: pd.DataFrame):
+    """First-Fit placement. The `engine` selects how the first fitting server is searched for:
+    - 'array': vectorized fit masks over the servers, opened ones first
+    - 'tree': a segment tree of maximum space left, skipping whole ranges of servers where the VM can't fit
+    Both engines yield the same placements. VMs of the same anti-affinity group (see `anti_affinity_column`) are
+    placed in different servers. With `segregate_classes`, VMs of `incompatible_classes` never share a server:
+    the array engine masks the servers that can't host the class, the tree engine keeps one tree per server
+    state (see ServiceClassIndex).
+    With `prefer_open_servers` (array engine), a VM goes to the first fitting server already in use, running a
+    workload of the pool or VMs, and only turns on an empty server when none fits: on a partially loaded fleet,
+    this keeps the servers to turn on to a minimum."""
+    engines = ['array', 'tree']
 
-        server_fillings = pd.DataFrame(0, index=server_capacities.index, columns=server_capacities.columns)
-        oversize_vms = pd.DataFrame(columns=vms.columns)
+    def __init__(self, engine: str = 'array', instrument: bool = False, segregate_classes: bool = False,
+                 prefer_open_servers: bool = False):
+        if engine not in self.engines:
+            raise ValueError(f"Unknown First-Fit engine '{engine}', expected one of {self.engines}")
+        if prefer_open_servers and engine != 'array':
+            raise ValueError("Preferring the servers in use needs the 'array' engine")
+        self.engine: str = engine
+        self.instrument: bool = instrument
+        self.segregate_classes: bool = segregate_classes
+        self.prefer_open_servers: bool = prefer_open_servers
 
-        for i, vm in tqdm(vms.iterrows()):
-            first_fit_index: Optional[int] = self._find_next_fitting_server(0, vm, server_capacities, server_fillings)
+    def solve(self, vms: pd.DataFrame, server_capacities: Union[pd.DataFrame, ServerPool]):
+        stats = self._new_stats(len(vms))
+        demands: np.ndarray = self._to_resource_array(vms)
+        servers = OpenServers(ServerPool.from_servers(server_capacities))
+        classes: Optional[np.ndarray] = service_classes(vms) if self.segregate_classes else None
+        class_index: Optional[ServiceClassIndex] = ServiceClassIndex(classes) if classes is not None else None
+        # The tree spans the opened servers
+        tree: Optional[Union[MaxResidualTree, ClassStateTrees]] = None
+        if self.engine == 'tree':
+            scale = servers.pool.spec_capacities.max(axis=0)
+            tree = MaxResidualTree(servers.space_left, scale=scale, stats=stats) if class_index is None \
+                else ClassStateTrees(class_index, servers.space_left, scale=scale, stats=stats)
+        assignment: np.ndarray = np.full(len(demands), -1, dtype=np.int64)
+        groups: Optional[np.ndarray] = anti_affinity_groups(vms)
+        anti_affinity: Optional[AntiAffinityIndex] = AntiAffinityIndex(stats) if groups is not None else None
+        vm_runs = self._identical_vm_runs(demands, groups, classes)
+        if stats is not None:
+            stats.end_phase('prepare')
 
-            # Insert VM in the server if a server with space was found
-            if first_fit_index is not None:
-                self._add_vm_to_server(vm, server_fillings, first_fit_index)
-            # If it doesn't fit, add the VM to the list of oversize
-            else:
-                oversize_vms = pd.concat([oversize_vms, vm.to_frame().T])
-        return Solution(server_capacities, server_fillings, oversize_vms, algo_name=str(self))
+        # Identical consecutive VMs are placed as a batch, filling each fitting server in turn
+        for run_start, run_length in tqdm(zip(*vm_runs)):
+            demand: np.ndarray = demands[run_start]
+            group: int = int(groups[run_start]) if groups is not None else -1
+            vm_class: int = int(classes[run_start]) if classes is not None else 0
+            # A server takes a single VM of an anti-affinity group
+            max_batch: int = 1 if group >= 0 else run_length
+            n_placed: int = 0
+            # The servers before these positions did not fit this demand already
+            search_start: int = 0
+            in_use_search_start: int = 0
+            while n_placed < run_length:
+                found_in_use: bool = False
+                if class_index is not None and tree is not None:
+                    first_fit_index: Optional[int] = tree.find_first_fitting_server(demand.tolist(), anti_affinity,
+                                                                                    group, vm_class)
+                elif tree is not None:
+                    first_fit_index: Optional[int] = tree.find_first_fitting_server(demand.tolist(), anti_affinity,
+                                                                                    group)
+                else:
+                    allowed = class_index.allowed_mask(vm_class, servers.n_servers) if class_index is not None \
+                        else None
+                    first_fit_index: Optional[int] = None
+                    if self.prefer_open_servers:
+                        in_use = servers.in_use if allowed is None else servers.in_use & allowed
+                        first_fit_index = self._find_first_fitting_server_in_arrays(
+                            demand, servers.space_left, start=in_use_search_start, stats=stats,
+                            anti_affinity=anti_affinity, group=group, allowed=in_use)
+                        found_in_use = first_fit_index is not None
+                    if first_fit_index is None:
+                        first_fit_index = self._find_first_fitting_server_in_arrays(
+                            demand, servers.space_left, start=search_start, stats=stats,
+                            anti_affinity=anti_affinity, group=group, allowed=allowed)
+
+                # Open a new server if the VM fits in none of the opened ones
+                if first_fit_index is None:
+                    n_open_servers: int = servers.n_servers
+                    first_fit_index = self._open_first_fitting_server(demand, servers, start=n_open_servers,
+                                                                      stats=stats)
+                    if tree is not None and first_fit_index is not None:
+                        tree.extend(servers.space_left[n_open_servers:])
+
+                # If it doesn't fit, the VMs left in the batch are oversize
+                if first_fit_index is None:
+                    break
+                if found_in_use:
+                    in_use_search_start = first_fit_index + 1
+                else:
+                    search_start = first_fit_index + 1
+
+                # Insert as many VMs as possible in the server where space was found
+                count: int = servers.add_demand_batch(first_fit_index, demand, min(run_length - n_placed, max_batch))
+                assignment[run_start + n_placed:run_start + n_placed + count] = first_fit_index
+                n_placed += count
+                if anti_affinity is not None:
+                    anti_affinity.add(first_fit_index, group)
+                if class_index is not None:
+                    class_index.add(first_fit_index, vm_class)
+                if tree is not None:
+                    tree.update(first_fit_index, servers.space_left[first_fit_index].tolist())
+
+        return self._build_solution(servers, vms, assignment, stats=stats)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.engine}]" if self.engine != 'array' else self.__class__.__name__
 
 
 class FirstFitDivideAlgo(ApproxAlgo):
+    """First-Fit placement splitting the VMs over consecutive servers, filled in turn. The `engine` selects how:
+    - 'array': VM by VM, each one cut where its current server gets full
+    - 'stream': server by server, over chunks of `chunksize` VMs: the VMs are seen as a stream whose cumulative
+      demand is a piecewise linear function of the position in the stream, and the point where a server gets full
+      is found in closed form by a binary search of the cumulative sums of the chunk, for each resource
+    Both engines yield the same fillings and fragments, up to rounding errors.
+    With `segregate_classes` ('array' engine), VMs of `incompatible_classes` never share a server: each class has
+    its own current server, which skips the servers whose state can't host the class."""
+    engines = ['array', 'stream']
 
-    def solve(self, vms: pd.DataFrame, server_capacities: pd.DataFrame):
-        curr_server: int = 0
-        server_fillings = pd.DataFrame(0, index=server_capacities.index, columns=server_capacities.columns)
+    def __init__(self, instrument: bool = False, segregate_classes: bool = False, engine: str = 'array',
+                 chunksize: int = 65536):
+        if engine not in self.engines:
+            raise ValueError(f"Unknown First-Fit-Divide engine '{engine}', expected one of {self.engines}")
+        if segregate_classes and engine != 'array':
+            raise ValueError("Segregating the classes of service needs the 'array' engine")
+        self.instrument: bool = instrument
+        self.segregate_classes: bool = segregate_classes
+        self.engine: str = engine
+        self.chunksize: int = chunksize
+
+    def solve(self, vms: pd.DataFrame, server_capacities: Union[pd.DataFrame, ServerPool]):
+        stats = self._new_stats(len(vms))
+        demands: np.ndarray = self._to_resource_array(vms)
+        servers = OpenServers(ServerPool.from_servers(server_capacities))
+        if self.engine == 'stream':
+            if stats is not None:
+                stats.end_phase('prepare')
+            assignment, fragment_table = self._solve_stream(demands, servers, stats)
+            return self._build_solution(servers, vms, assignment, fragment_table, stats=stats)
+        classes: Optional[np.ndarray] = service_classes(vms) if self.segregate_classes else None
+        class_index: Optional[ServiceClassIndex] = ServiceClassIndex(classes) if classes is not None else None
+        # Current server of each class (a single one without segregation)
+        curr_servers: Dict[int, int] = {}
+        if stats is not None:
+            stats.end_phase('prepare')
+
+        assignment: np.ndarray = np.empty(len(demands), dtype=np.int32)
+        fragments: List[Tuple[int, int, float]] = []
 
-        for i, vm in tqdm(vms.iterrows()):
-            remainder: Optional[pd.Series] = vm
+        for vm, demand in enumerate(tqdm(demands)):
+            vm_class: int = int(classes[vm]) if classes is not None else 0
+            curr_server: int = curr_servers.get(vm_class, 0)
+            remainder: Optional[np.ndarray] = demand
+            # Parts of the VM placed so far, as (server, fraction of the VM)
+            parts: List[Tuple[int, float]] = []
+            fraction_left: float = 1.
             while remainder is not None:
-                remainder = self._fit_and_partition_vm(
-                    remainder,
-                    server_capacities,
-                    server_fillings,
-                    curr_server
-                )
+                if servers.pool.max_servers is not None and curr_server >= servers.pool.max_servers:
+                    raise ValueError(f"The {servers.pool.max_servers} servers of the pool are not enough "
+                                     f"to place all VMs")
+                servers.open_until(curr_server)
+                if class_index is not None and not class_index.allows(curr_server, vm_class):
+                    curr_server += 1
+                    continue
+                remainder, placed_fraction = self._fit_and_partition_demand(remainder, servers, curr_server)
+                if stats is not None:
+                    stats.fit_checks += 1
+                    stats.servers_probed += 1
+                if placed_fraction > 0:
+                    parts.append((curr_server, fraction_left * placed_fraction))
+                    fraction_left *= 1 - placed_fraction
+                    if class_index is not None:
+                        class_index.add(curr_server, vm_class)
                 if remainder is not None:
                     curr_server += 1
+            curr_servers[vm_class] = curr_server
+
+            if len(parts) == 1:
+                assignment[vm] = parts[0][0]
+            else:
+                assignment[vm] = SPLIT
+                fragments.extend((vm, server, fraction) for server, fraction in parts)
+                if stats is not None:
+                    stats.splits += 1
+
+        fragment_table = pd.DataFrame(fragments, columns=['vm', 'server', 'fraction']).astype(
+            {'vm': np.int32, 'server': np.int32, 'fraction': float})
+        return self._build_solution(servers, vms, assignment, fragment_table, stats=stats)
+
+    def _solve_stream(self, demands: np.ndarray, servers: OpenServers, stats: Optional[SolveStats] = None
+                      ) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Places the VMs server by server. A position in a chunk is a VM and the fraction of it placed before:
+        each server takes the VMs from the position where the previous one got full to the position where the
+        cumulative demand reaches its space left in some resource. Only the cumulative sums of one chunk are held
+        at a time, and each server costs one binary search per resource instead of one step per VM."""
+        assignment: np.ndarray = np.empty(len(demands), dtype=np.int32)
+        fragment_vms: List[int] = []
+        fragment_servers: List[int] = []
+        fragment_fractions: List[float] = []
+        n_resources: int = demands.shape[1]
+        curr_server: int = 0
+
+        for chunk_start in range(0, len(demands), self.chunksize):
+            chunk: np.ndarray = demands[chunk_start:chunk_start + self.chunksize]
+            n_chunk_vms: int = len(chunk)
+            # Demands with a zero row for the end of the chunk, cumulative demands before each position, by resource
+            padded_chunk = np.vstack([chunk, np.zeros((1, n_resources))])
+            cumulated = np.ascontiguousarray(np.vstack([np.zeros((1, n_resources)), np.cumsum(chunk, axis=0)]).T)
+            vm, fraction = 0, 0.
+            while vm < n_chunk_vms:
+                if servers.pool.max_servers is not None and curr_server >= servers.pool.max_servers:
+                    raise ValueError(f"The {servers.pool.max_servers} servers of the pool are not enough "
+                                     f"to place all VMs")
+                servers.open_until(curr_server)
+                start = cumulated[:, vm] + fraction * padded_chunk[vm]
+                # Never behind the start, even when rounding errors left a slightly negative space
+                end_vm, end_fraction = max((vm, fraction), self._stream_full_position(
+                    cumulated, padded_chunk, start + servers.space_left[curr_server]))
+                if stats is not None:
+                    stats.fit_checks += n_resources
+                    stats.servers_probed += 1
+                if (end_vm, end_fraction) > (vm, fraction):
+                    servers.add_demand(curr_server, cumulated[:, end_vm] + end_fraction * padded_chunk[end_vm] - start)
+                    if end_vm == vm:
+                        self._add_fragment(fragment_vms, fragment_servers, fragment_fractions,
+                                           chunk_start + vm, curr_server, end_fraction - fraction)
+                    else:
+                        if fraction > 0:
+                            self._add_fragment(fragment_vms, fragment_servers, fragment_fractions,
+                                               chunk_start + vm, curr_server, 1. - fraction)
+                        first_whole_vm = vm + 1 if fraction > 0 else vm
+                        assignment[chunk_start + first_whole_vm:chunk_start + end_vm] = curr_server
+                        if end_fraction > 0:
+                            self._add_fragment(fragment_vms, fragment_servers, fragment_fractions,
+                                               chunk_start + end_vm, curr_server, end_fraction)
+                vm, fraction = end_vm, end_fraction
+                # A server getting full within the chunk is left for the next one
+                if vm < n_chunk_vms:
+                    curr_server += 1
+
+        fragment_table = pd.DataFrame({'vm': np.array(fragment_vms, dtype=np.int32),
+                                       'server': np.array(fragment_servers, dtype=np.int32),
+                                       'fraction': np.array(fragment_fractions, dtype=float)})
+        split_vms = np.unique(fragment_table['vm'].to_numpy())
+        assignment[split_vms] = SPLIT
+        if stats is not None:
+            stats.splits += len(split_vms)
+        return assignment, fragment_table
+
+    def _stream_full_position(self, cumulated: np.ndarray, padded_chunk: np.ndarray, levels: np.ndarray
+                              ) -> Tuple[int, float]:
+        """Last position of the chunk where the cumulative demand is still within the levels in every resource, as
+        a VM and the fraction of it placed before (VM `len(chunk)` for the end of the chunk)."""
+        n_chunk_vms: int = len(padded_chunk) - 1
+        positions: List[Tuple[int, float]] = []
+        for resource in range(len(levels)):
+            level: float = levels[resource]
+            # Last VM starting within the level, then the fraction of it that fits linearly
+            vm = int(np.searchsorted(cumulated[resource], level, side='right')) - 1
+            if vm < 0:
+                positions.append((0, 0.))
+            elif vm >= n_chunk_vms:
+                positions.append((n_chunk_vms, 0.))
+            else:
+                positions.append((vm, min((level - cumulated[resource, vm]) / padded_chunk[vm, resource], 1.)))
+        vm, fraction = min(positions)
+        return (vm + 1, 0.) if fraction >= 1. else (vm, fraction)
+
+    @staticmethod
+    def _add_fragment(fragment_vms: List[int], fragment_servers: List[int], fragment_fractions: List[float],
+                      vm: int, server: int, fraction: float) -> None:
+        fragment_vms.append(vm)
+        fragment_servers.append(server)
+        fragment_fractions.append(fraction)
+
+    def _fit_and_partition_demand(self, demand: np.ndarray, servers: OpenServers, curr_server: int
+                                  ) -> Tuple[Optional[np.ndarray], float]:
+        """Array version of `_fit_and_partition_vm`, also returning the fraction of the demand placed."""
+        space_left = servers.space_left[curr_server]
+        # If the VM fits in the current server, add it to the server and return None as a remainder
+        if (space_left >= demand).all():
+            servers.add_demand(curr_server, demand)
+            return None, 1.
+
+        # Otherwise, calculate what fraction of the VM can fit in the server (ignoring resources it doesn't use)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resource_criticity = space_left / demand
+        cutting_fraction = min(np.nanmin(resource_criticity), 1.)
 
-        return Solution(server_capacities, server_fillings, algo_name=str(self))
+        # Add the portion that fits and return the remainder that needs to be fit to another server
+        resource_portion_that_fits = demand * cutting_fraction
+        servers.add_demand(curr_server, resource_portion_that_fits)
+        return demand - resource_portion_that_fits, cutting_fraction
 
     def _fit_and_partition_vm(self, vm, server_capacities, server_fillings, curr_server) -> Optional[pd.Series]:
         # If the VM fits in the current server, add it to the server and return None as a remainder
@@ -89,5 +353,5 @@ if __name__ == '__main__':
         n_servers=10000
     )
     first_fit_divide = FirstFitDivideAlgo()
-    solution = first_fit_divide.solve(data.vm_data, data.server_data)
+    solution = first_fit_divide.solve(data.vm_data, data.server_pool)
     solution.display()
\ No newline at end of file
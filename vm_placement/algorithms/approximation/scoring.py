@@ -0,0 +1,37 @@
+from typing import Callable, Dict
+
+import numpy as np
+
+# A scoring rule rates candidate servers for a VM, in one array operation: given the demand of the VM, the space
+# left and the capacities of the servers (one row each, in resource_columns order) and weights of the resources,
+# it returns one score per server. The VM goes to the fitting server with the highest score.
+ScoringRule = Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+def dot_product_scores(demand: np.ndarray, space_left: np.ndarray, capacities: np.ndarray,
+                       weights: np.ndarray) -> np.ndarray:
+    """Weighted dot product of the demand and the space left, both relative to the capacity of the server: the
+    server whose spare resources are the most aligned with the needs of the VM."""
+    return ((demand / capacities) * (space_left / capacities)) @ weights
+
+
+def l2_norm_scores(demand: np.ndarray, space_left: np.ndarray, capacities: np.ndarray,
+                   weights: np.ndarray) -> np.ndarray:
+    """Opposite of the weighted squared L2 norm of the space left after placement, relative to the capacity of the
+    server: the server the VM fills the most evenly across resources."""
+    return -(((space_left - demand) / capacities) ** 2) @ weights
+
+
+def scarcity_weighted_scores(demand: np.ndarray, space_left: np.ndarray, capacities: np.ndarray,
+                             weights: np.ndarray) -> np.ndarray:
+    """Opposite of the space left after placement relative to the capacity of the server, weighted by the
+    scarcity ratio of the resources (see `calculate_scarcity_ratio`): the server with the least scarce space
+    left over."""
+    return -((space_left - demand) / capacities) @ weights
+
+
+scoring_rules: Dict[str, ScoringRule] = {
+    'dot_product': dot_product_scores,
+    'l2_norm': l2_norm_scores,
+    'scarcity_weighted': scarcity_weighted_scores,
+}
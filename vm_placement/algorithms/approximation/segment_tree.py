@@ -0,0 +1,112 @@
+from itertools import combinations
+from operator import ge
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex
+from vm_placement.algorithms.instrumentation import SolveStats
+
+
+class MaxResidualTree:
+    """Segment tree over servers to find the leftmost server where a VM fits.
+
+    Each node stores, for every non-empty subset of resources, the maximum over the servers of its subtree of the
+    smallest space left among these resources (normalized by `scale`). The singleton subsets give the per-resource
+    maximum space left, the larger subsets capture that the space left of the different resources must be found
+    on the same server. A VM can only fit in a server of a subtree if each statistic of the node is at least the
+    same statistic computed on the VM demand, so whole ranges of servers where nothing can fit are skipped.
+
+    The tree only spans the first servers added to it and grows with `extend`, doubling its size when needed.
+    Nodes are plain tuples of floats: a query touches a few dozen nodes, for which scalar comparisons are much
+    cheaper than numpy calls. Searches count their node and server checks in `stats`, if given.
+    """
+    def __init__(self, space_left: np.ndarray, scale: Optional[np.ndarray] = None,
+                 stats: Optional[SolveStats] = None):
+        self.stats: Optional[SolveStats] = stats
+        n_resources = space_left.shape[1]
+        self.scale: Tuple[float, ...] = tuple(np.ones(n_resources) if scale is None else np.asarray(scale, dtype=float))
+        self._subsets: List[Tuple[int, ...]] = [subset for size in range(1, n_resources + 1)
+                                                for subset in combinations(range(n_resources), size)]
+        self._empty_node: Tuple[float, ...] = (-np.inf,) * len(self._subsets)
+        self.n_servers: int = 0
+        self.size: int = 1
+        self.space_left: List[Tuple[float, ...]] = []
+        self.nodes: List[Tuple[float, ...]] = [self._empty_node] * 2
+        self.extend(space_left)
+
+    def _statistics(self, space_left: Sequence[float]) -> Tuple[float, ...]:
+        normalized = [space / scale for space, scale in zip(space_left, self.scale)]
+        return tuple(min(map(normalized.__getitem__, subset)) for subset in self._subsets)
+
+    def extend(self, space_left: np.ndarray) -> None:
+        """Adds servers after the ones already in the tree."""
+        self.space_left.extend(tuple(row) for row in space_left.tolist())
+        if len(self.space_left) <= self.size:
+            for server in range(self.n_servers, len(self.space_left)):
+                self.update(server, self.space_left[server])
+        else:
+            self._rebuild(max(2 * self.size, 1 << (len(self.space_left) - 1).bit_length()))
+        self.n_servers = len(self.space_left)
+
+    def _rebuild(self, size: int) -> None:
+        self.size = size
+        leaves = [self._statistics(space_left) for space_left in self.space_left]
+        self.nodes = [self._empty_node] * size + leaves + [self._empty_node] * (size - len(leaves))
+        for node in range(size - 1, 0, -1):
+            self.nodes[node] = tuple(map(max, self.nodes[2 * node], self.nodes[2 * node + 1]))
+
+    def update(self, server: int, space_left: Sequence[float]) -> None:
+        self.space_left[server] = tuple(space_left)
+        node = self.size + server
+        self.nodes[node] = self._statistics(space_left)
+        node //= 2
+        while node >= 1:
+            statistics = tuple(map(max, self.nodes[2 * node], self.nodes[2 * node + 1]))
+            # The ancestors are unchanged if this node is
+            if statistics == self.nodes[node]:
+                break
+            self.nodes[node] = statistics
+            node //= 2
+
+    def find_first_fitting_server(self, demand: Sequence[float], anti_affinity: Optional[AntiAffinityIndex] = None,
+                                  group: int = -1) -> Optional[int]:
+        """Returns the leftmost server whose space left is at least the demand on every resource, or None.
+        With an anti-affinity group, the servers hosting a VM of the group are skipped."""
+        demand = tuple(demand)
+        demand_statistics = self._statistics(demand)
+        nodes = self.nodes
+        stats = self.stats
+        if stats is not None:
+            stats.fit_checks += 1
+        if not all(map(ge, nodes[1], demand_statistics)):
+            return None
+        stack: List[int] = []
+        node = 1
+        while True:
+            if node >= self.size:
+                # The statistics are only a necessary condition: check the exact space left of the server
+                server = node - self.size
+                if stats is not None:
+                    stats.fit_checks += 1
+                    stats.servers_probed += 1
+                if all(map(ge, self.space_left[server], demand)) and \
+                        (group < 0 or anti_affinity is None or anti_affinity.allows(server, group)):
+                    return server
+            else:
+                left, right = 2 * node, 2 * node + 1
+                if stats is not None:
+                    stats.fit_checks += 2
+                left_may_fit = all(map(ge, nodes[left], demand_statistics))
+                right_may_fit = all(map(ge, nodes[right], demand_statistics))
+                if left_may_fit:
+                    if right_may_fit:
+                        stack.append(right)
+                    node = left
+                    continue
+                if right_may_fit:
+                    node = right
+                    continue
+            if not stack:
+                return None
+            node = stack.pop()
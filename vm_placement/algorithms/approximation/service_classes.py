@@ -0,0 +1,170 @@
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex
+from vm_placement.algorithms.approximation.segment_tree import MaxResidualTree
+from vm_placement.algorithms.approximation.space_left_index import BoxedSpaceLeftIndex, SpaceLeftIndex
+from vm_placement.algorithms.instrumentation import SolveStats
+from vm_placement.data_handling.processing import class_column, incompatible_classes
+
+
+def service_classes(vms: pd.DataFrame) -> np.ndarray:
+    """Class of service of each VM."""
+    if class_column not in vms.columns:
+        raise ValueError(f"Segregating the classes of service needs a '{class_column}' column")
+    return vms[class_column].to_numpy(dtype=np.int64)
+
+
+class ServiceClassIndex:
+    """Compatible-class state of each server, when some classes of service can't share a server.
+
+    The state of a server is the set of classes it can no longer host, because of the classes of the VMs it
+    already hosts: states are numbered as they appear, from the empty server (state 0) which hosts any class.
+    With the `incompatible_classes` pair (1, 3), the states are "any class", "no class 3" and "no class 1".
+    For the vectorized searches, the index also keeps, for each class, a mask of the servers that can host it.
+    """
+    def __init__(self, vm_classes: np.ndarray, incompatible: Sequence[Tuple[int, int]] = incompatible_classes):
+        self.classes: List[int] = np.unique(vm_classes).tolist()
+        self._class_rows: Dict[int, int] = {vm_class: row for row, vm_class in enumerate(self.classes)}
+        self._excluded_by: Dict[int, FrozenSet[int]] = {
+            vm_class: frozenset([b for a, b in incompatible if a == vm_class]
+                                + [a for a, b in incompatible if b == vm_class])
+            for vm_class in self.classes}
+        self.states: List[FrozenSet[int]] = [frozenset()]
+        self._state_ids: Dict[FrozenSet[int], int] = {frozenset(): 0}
+        self._server_states: np.ndarray = np.zeros(64, dtype=np.int32)
+        self._allowed: np.ndarray = np.ones((len(self.classes), 64), dtype=bool)
+
+    def _ensure_servers(self, n_servers: int) -> None:
+        if n_servers > len(self._server_states):
+            size = max(2 * len(self._server_states), n_servers)
+            self._server_states = np.concatenate([self._server_states,
+                                                  np.zeros(size - len(self._server_states), dtype=np.int32)])
+            self._allowed = np.hstack([self._allowed,
+                                       np.ones((len(self.classes), size - self._allowed.shape[1]), dtype=bool)])
+
+    def state_of(self, server: int) -> int:
+        return int(self._server_states[server]) if server < len(self._server_states) else 0
+
+    def state_allows(self, state: int, vm_class: int) -> bool:
+        return vm_class not in self.states[state]
+
+    def allows(self, server: int, vm_class: int) -> bool:
+        return self.state_allows(self.state_of(server), vm_class)
+
+    def allowed_mask(self, vm_class: int, n_servers: int) -> np.ndarray:
+        """Mask of the first `n_servers` servers, True for the ones that can host the class."""
+        self._ensure_servers(n_servers)
+        return self._allowed[self._class_rows[vm_class], :n_servers]
+
+    def add(self, server: int, vm_class: int) -> None:
+        """Records that the server hosts a VM of the class, which may change its state."""
+        excluded = self._excluded_by[vm_class]
+        if not excluded:
+            return
+        self._ensure_servers(server + 1)
+        state = self.states[self._server_states[server]]
+        if excluded <= state:
+            return
+        new_state = state | excluded
+        if new_state not in self._state_ids:
+            self._state_ids[new_state] = len(self.states)
+            self.states.append(new_state)
+        self._server_states[server] = self._state_ids[new_state]
+        for excluded_class in new_state - state:
+            if excluded_class in self._class_rows:
+                self._allowed[self._class_rows[excluded_class], server] = False
+
+
+class ClassStateTrees:
+    """One MaxResidualTree per server state of a ServiceClassIndex, with the same interface as a single tree.
+
+    Every tree spans all the servers, the servers of other states being left out with a space left of -inf, so
+    a search for a VM only goes through the trees of the states that can host its class and never visits the
+    servers of the other states.
+    """
+    def __init__(self, class_index: ServiceClassIndex, space_left: np.ndarray, scale: Optional[np.ndarray] = None,
+                 stats: Optional[SolveStats] = None):
+        self.class_index: ServiceClassIndex = class_index
+        self.scale: Optional[np.ndarray] = scale
+        self.stats: Optional[SolveStats] = stats
+        self.n_resources: int = space_left.shape[1]
+        self._trees: Dict[int, MaxResidualTree] = {0: MaxResidualTree(space_left, scale, stats)}
+        self._server_states: List[int] = [0] * len(space_left)
+
+    def _left_out(self, n_servers: int) -> np.ndarray:
+        return np.full((n_servers, self.n_resources), -np.inf)
+
+    def _tree(self, state: int) -> MaxResidualTree:
+        if state not in self._trees:
+            self._trees[state] = MaxResidualTree(self._left_out(len(self._server_states)), self.scale, self.stats)
+        return self._trees[state]
+
+    def extend(self, space_left: np.ndarray) -> None:
+        """Adds empty servers, in state 0."""
+        for state, tree in self._trees.items():
+            tree.extend(space_left if state == 0 else self._left_out(len(space_left)))
+        self._server_states.extend([0] * len(space_left))
+
+    def update(self, server: int, space_left: Sequence[float]) -> None:
+        """Updates the space left of the server, moving it to the tree of its new state if it changed."""
+        state = self.class_index.state_of(server)
+        if state != self._server_states[server]:
+            self._trees[self._server_states[server]].update(server, (-np.inf,) * self.n_resources)
+            self._server_states[server] = state
+        self._tree(state).update(server, space_left)
+
+    def find_first_fitting_server(self, demand: Sequence[float], anti_affinity: Optional[AntiAffinityIndex] = None,
+                                  group: int = -1, vm_class: int = 0) -> Optional[int]:
+        """Leftmost server where the demand fits, among the servers whose state can host the class."""
+        servers = [tree.find_first_fitting_server(demand, anti_affinity, group) for state, tree in self._trees.items()
+                   if self.class_index.state_allows(state, vm_class)]
+        return min((server for server in servers if server is not None), default=None)
+
+
+class ClassStateSpaceLeftIndexes:
+    """One SpaceLeftIndex (or index of `index_type`) per server state of a ServiceClassIndex, with the same
+    interface as a single index. A search only scans the indexes of the states that can host the class of the VM."""
+    def __init__(self, class_index: ServiceClassIndex, key_weights: np.ndarray, stats: Optional[SolveStats] = None,
+                 index_type: Type[Union[SpaceLeftIndex, BoxedSpaceLeftIndex]] = SpaceLeftIndex):
+        self.class_index: ServiceClassIndex = class_index
+        self.key_weights: np.ndarray = key_weights
+        self.stats: Optional[SolveStats] = stats
+        self.index_type: Type[Union[SpaceLeftIndex, BoxedSpaceLeftIndex]] = index_type
+        self._indexes: Dict[int, Union[SpaceLeftIndex, BoxedSpaceLeftIndex]] = {}
+        self._server_states: Dict[int, int] = {}
+
+    def _index(self, state: int) -> Union[SpaceLeftIndex, BoxedSpaceLeftIndex]:
+        if state not in self._indexes:
+            self._indexes[state] = self.index_type(self.key_weights, stats=self.stats)
+        return self._indexes[state]
+
+    def add(self, server: int, space_left: np.ndarray) -> None:
+        state = self.class_index.state_of(server)
+        self._index(state).add(server, space_left)
+        self._server_states[server] = state
+
+    def update(self, server: int, space_left: np.ndarray) -> None:
+        self._indexes[self._server_states.pop(server)].remove(server)
+        self.add(server, space_left)
+
+    def find_best_fitting_server(self, demand: np.ndarray, space_left: np.ndarray,
+                                 anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1,
+                                 vm_class: int = 0) -> Optional[int]:
+        """Indexed server with the smallest key where the demand fits, among the states that can host the class."""
+        best: Optional[Tuple] = None
+        for state, index in self._indexes.items():
+            if not self.class_index.state_allows(state, vm_class):
+                continue
+            server = index.find_best_fitting_server(demand, space_left, anti_affinity, group)
+            if server is not None and (best is None or index.entry(server) < best):
+                best = index.entry(server)
+        return best[-1] if best is not None else None
+
+    def __len__(self) -> int:
+        return len(self._server_states)
+
+    def __contains__(self, server: int) -> bool:
+        return server in self._server_states
@@ -0,0 +1,184 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vm_placement.algorithms.approximation.anti_affinity import AntiAffinityIndex
+from vm_placement.algorithms.instrumentation import SolveStats
+
+
+class SpaceLeftIndex:
+    """Ordered index of servers by a key computed from their space left.
+
+    The key of a server is the tuple `key_weights @ space_left` (compared lexicographically), followed by the
+    server index to break ties. Only the servers whose filling changes need to be updated, and the best fitting
+    server is found by bisecting to the smallest key a fitting server could have, then scanning in key order.
+    The weights must be non-negative so that a server where a VM fits always has a key at least as large as the
+    key of the VM demand itself. Searches count the servers they check in `stats`, if given.
+    """
+    def __init__(self, key_weights: np.ndarray, chunk_size: int = 32, stats: Optional[SolveStats] = None):
+        self.stats: Optional[SolveStats] = stats
+        self.key_weights: np.ndarray = np.atleast_2d(np.asarray(key_weights, dtype=float))
+        if (self.key_weights < 0).any():
+            raise ValueError("Space left key weights must be non-negative")
+        self.chunk_size: int = chunk_size
+        self._entries: List[Tuple] = []
+        self._server_entries: Dict[int, Tuple] = {}
+
+    def _key(self, space_left: np.ndarray) -> Tuple[float, ...]:
+        return tuple((self.key_weights @ space_left).tolist())
+
+    def add(self, server: int, space_left: np.ndarray) -> None:
+        entry = self._key(space_left) + (server,)
+        insort(self._entries, entry)
+        self._server_entries[server] = entry
+
+    def remove(self, server: int) -> None:
+        entry = self._server_entries.pop(server)
+        del self._entries[bisect_left(self._entries, entry)]
+
+    def update(self, server: int, space_left: np.ndarray) -> None:
+        self.remove(server)
+        self.add(server, space_left)
+
+    def find_best_fitting_server(self, demand: np.ndarray, space_left: np.ndarray,
+                                 anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1) -> Optional[int]:
+        """Returns the indexed server with the smallest key where the demand fits, or None.
+        `space_left` is the (n_servers, n_resources) array of space left, indexed by server. With an anti-affinity
+        group, the servers hosting a VM of the group are skipped."""
+        lower_bound = self._key(demand)
+        # Leave room for rounding errors in the weighted sums: the exact fit check is done while scanning
+        lower_bound = (lower_bound[0] - 1e-9 * abs(lower_bound[0]),) + (-np.inf,) * (len(lower_bound) - 1)
+        position = bisect_left(self._entries, lower_bound)
+        while position < len(self._entries):
+            servers = [entry[-1] for entry in self._entries[position:position + self.chunk_size]]
+            fits = (space_left[servers] >= demand).all(axis=1)
+            if self.stats is not None:
+                self.stats.fit_checks += len(servers)
+                self.stats.servers_probed += len(servers)
+            if anti_affinity is None or group < 0:
+                if fits.any():
+                    return servers[int(fits.argmax())]
+            else:
+                for candidate in np.flatnonzero(fits):
+                    if anti_affinity.allows(servers[candidate], group):
+                        return servers[candidate]
+            position += self.chunk_size
+        return None
+
+    def entry(self, server: int) -> Tuple:
+        """Sorting entry of an indexed server: its key followed by its index."""
+        return self._server_entries[server]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, server: int) -> bool:
+        return server in self._server_entries
+
+
+class BoxedSpaceLeftIndex:
+    """SpaceLeftIndex variant for many servers, with the same interface and the same answers.
+
+    The entries sorted by key are cut into blocks of `block_size` to `2 * block_size` servers, each one bounded by
+    the box of the largest space left of its servers in every resource. A search compares the demand with the
+    boxes of all the blocks from the smallest key a fitting server could have in one array operation, and only
+    scans the blocks whose box dominates the demand, which skips the runs of servers of suitable key but short
+    of another resource. Adding, removing or updating a server only re-sorts its block and recomputes its box.
+    """
+    def __init__(self, key_weights: np.ndarray, block_size: int = 32, stats: Optional[SolveStats] = None):
+        self.stats: Optional[SolveStats] = stats
+        self.key_weights: np.ndarray = np.atleast_2d(np.asarray(key_weights, dtype=float))
+        if (self.key_weights < 0).any():
+            raise ValueError("Space left key weights must be non-negative")
+        self.block_size: int = block_size
+        n_resources: int = self.key_weights.shape[1]
+        self._blocks: List[List[Tuple]] = [[]]
+        # First entry of each block but the first one, to find the block of an entry
+        self._block_starts: List[Tuple] = []
+        self._block_boxes: np.ndarray = np.full((1, n_resources), -np.inf)
+        self._server_entries: Dict[int, Tuple] = {}
+        self._space_left: np.ndarray = np.zeros((64, n_resources))
+
+    def _key(self, space_left: np.ndarray) -> Tuple[float, ...]:
+        return tuple((self.key_weights @ space_left).tolist())
+
+    def _block_of(self, entry: Tuple) -> int:
+        return bisect_right(self._block_starts, entry)
+
+    def _box(self, block: List[Tuple]) -> np.ndarray:
+        if len(block) == 0:
+            return np.full(self._space_left.shape[1], -np.inf)
+        return self._space_left[[entry[-1] for entry in block]].max(axis=0)
+
+    def add(self, server: int, space_left: np.ndarray) -> None:
+        if server >= len(self._space_left):
+            grown = np.zeros((max(2 * len(self._space_left), server + 1), self._space_left.shape[1]))
+            grown[:len(self._space_left)] = self._space_left
+            self._space_left = grown
+        self._space_left[server] = space_left
+        entry = self._key(space_left) + (server,)
+        self._server_entries[server] = entry
+        position = self._block_of(entry)
+        block = self._blocks[position]
+        insort(block, entry)
+        np.maximum(self._block_boxes[position], space_left, out=self._block_boxes[position])
+        if len(block) > 2 * self.block_size:
+            # Split the block in two halves
+            half = len(block) // 2
+            self._blocks[position:position + 1] = [block[:half], block[half:]]
+            self._block_starts.insert(position, block[half])
+            self._block_boxes = np.insert(self._block_boxes, position + 1, self._box(block[half:]), axis=0)
+            self._block_boxes[position] = self._box(block[:half])
+
+    def remove(self, server: int) -> None:
+        entry = self._server_entries.pop(server)
+        position = self._block_of(entry)
+        block = self._blocks[position]
+        del block[bisect_left(block, entry)]
+        if len(block) == 0 and len(self._blocks) > 1:
+            del self._blocks[position]
+            del self._block_starts[max(position - 1, 0)]
+            self._block_boxes = np.delete(self._block_boxes, position, axis=0)
+        else:
+            self._block_boxes[position] = self._box(block)
+
+    def update(self, server: int, space_left: np.ndarray) -> None:
+        self.remove(server)
+        self.add(server, space_left)
+
+    def find_best_fitting_server(self, demand: np.ndarray, space_left: np.ndarray,
+                                 anti_affinity: Optional[AntiAffinityIndex] = None, group: int = -1) -> Optional[int]:
+        """Returns the indexed server with the smallest key where the demand fits, or None (see SpaceLeftIndex)."""
+        lower_bound = self._key(demand)
+        lower_bound = (lower_bound[0] - 1e-9 * abs(lower_bound[0]),) + (-np.inf,) * (len(lower_bound) - 1)
+        first_block = self._block_of(lower_bound)
+        dominating_blocks = first_block + np.flatnonzero((self._block_boxes[first_block:] >= demand).all(axis=1))
+        if self.stats is not None:
+            self.stats.fit_checks += len(self._blocks) - first_block
+        for position in dominating_blocks.tolist():
+            block = self._blocks[position]
+            start = bisect_left(block, lower_bound) if position == first_block else 0
+            servers = [entry[-1] for entry in block[start:]]
+            fits = (space_left[servers] >= demand).all(axis=1)
+            if self.stats is not None:
+                self.stats.fit_checks += len(servers)
+                self.stats.servers_probed += len(servers)
+            if anti_affinity is None or group < 0:
+                if fits.any():
+                    return servers[int(fits.argmax())]
+            else:
+                for candidate in np.flatnonzero(fits):
+                    if anti_affinity.allows(servers[candidate], group):
+                        return servers[candidate]
+        return None
+
+    def entry(self, server: int) -> Tuple:
+        """Sorting entry of an indexed server: its key followed by its index."""
+        return self._server_entries[server]
+
+    def __len__(self) -> int:
+        return len(self._server_entries)
+
+    def __contains__(self, server: int) -> bool:
+        return server in self._server_entries
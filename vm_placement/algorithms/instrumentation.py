@@ -0,0 +1,50 @@
+import time
+from typing import Dict
+
+
+class SolveStats:
+    """Counters and phase timings of one solve of an approximation algorithm, collected when the algorithm is
+    created with `instrument=True` and attached to the returned solution as `Solution.stats`.
+
+    Counters:
+    - fit_checks: comparisons of a demand with the space left of a server or with the statistics of a tree node
+    - servers_probed: servers whose space left was compared with a demand
+    - servers_opened: servers opened from the pool
+    - splits: VMs split across servers (FirstFitDivideAlgo)
+    Phases are timed back to back with `end_phase`, each one lasting from the end of the previous one (or from
+    the creation of the stats) to its own end.
+    """
+    def __init__(self, n_vms: int):
+        self.n_vms: int = n_vms
+        self.fit_checks: int = 0
+        self.servers_probed: int = 0
+        self.servers_opened: int = 0
+        self.splits: int = 0
+        self.phase_seconds: Dict[str, float] = {}
+        self._phase_start: float = time.perf_counter()
+
+    def end_phase(self, name: str) -> None:
+        now = time.perf_counter()
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.) + now - self._phase_start
+        self._phase_start = now
+
+    @property
+    def servers_probed_per_vm(self) -> float:
+        return self.servers_probed / self.n_vms if self.n_vms > 0 else 0.
+
+    def to_dict(self) -> Dict[str, float]:
+        """Flat view of the counters and phase timings, e.g. to feed a dashboard."""
+        return {
+            'n_vms': self.n_vms,
+            'fit_checks': self.fit_checks,
+            'servers_probed': self.servers_probed,
+            'servers_probed_per_vm': self.servers_probed_per_vm,
+            'servers_opened': self.servers_opened,
+            'splits': self.splits,
+            **{f"{name}_seconds": seconds for name, seconds in self.phase_seconds.items()},
+        }
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{name}: {seconds:.3f}s" for name, seconds in self.phase_seconds.items())
+        return f"SolveStats[{self.fit_checks} fit checks, {self.servers_probed_per_vm:.1f} servers probed/VM, " \
+               f"{self.servers_opened} servers opened, {self.splits} splits]({phases})"
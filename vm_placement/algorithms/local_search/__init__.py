@@ -0,0 +1 @@
+from .local_search import Improvement, LocalSearchImprover
@@ -0,0 +1,281 @@
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation.anti_affinity import anti_affinity_groups
+from vm_placement.algorithms.approximation.service_classes import service_classes
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.processing import incompatible_classes, resource_columns
+
+
+class Improvement(NamedTuple):
+    """A server emptied by the local search: number of servers used after it, seconds since the start of the
+    search and number of VM moves (relocations and swaps) applied so far."""
+    n_servers: int
+    seconds: float
+    n_moves: int
+
+
+class LocalSearchImprover:
+    """Anytime local search emptying servers of a solution, within a wall-clock budget of `time_limit` seconds.
+
+    The search alternates two steps on the servers in use, from the least filled:
+    - emptying: the VMs of a server are relocated, largest first, each to the fullest other server where it fits;
+      the server is given up, and the moves undone, as soon as a VM fits nowhere
+    - rebalancing, when no server can be emptied: the first relocation or swap of two VMs moving load from the least
+      filled servers to fuller ones, i.e. increasing the sum of the squared filling rates of the servers
+    Every move only changes the space left of two servers, so it is evaluated on the residual-capacity arrays
+    without recomputing the solution. The search stops at the time limit, at `lower_bound` servers, or when no
+    move improves the solution anymore. Each emptied server is reported to `callback`, if given, and recorded in
+    `history`.
+    The moves keep the anti-affinity groups of the VMs apart and, with `segregate_classes`, the classes of
+    `incompatible_classes` too. Oversize and split VMs are never moved, and servers with an initial load or with
+    fragments of split VMs are never emptied.
+    """
+    def __init__(self, time_limit: float = 10., lower_bound: Optional[int] = None, segregate_classes: bool = False,
+                 callback: Optional[Callable[[Improvement], None]] = None):
+        self.time_limit: float = time_limit
+        self.lower_bound: Optional[int] = lower_bound
+        self.segregate_classes: bool = segregate_classes
+        self.callback: Optional[Callable[[Improvement], None]] = callback
+        self.history: List[Improvement] = []
+
+    def improve(self, solution: Solution) -> Solution:
+        """Returns an improved copy of a solution built with `Solution.from_assignment`."""
+        if solution.assignment is None or solution.vms is None:
+            raise ValueError("The local search needs a solution built with Solution.from_assignment")
+        self._start: float = time.perf_counter()
+        self.history = []
+        self._n_moves: int = 0
+        self._prepare(solution)
+        n_servers = self._n_servers_in_use()
+
+        # Servers that could not be emptied, not retried until they change
+        self._stuck: Set[int] = set()
+        n_moves_at_full_pass: int = 0
+        while not self._out_of_time() and (self.lower_bound is None or n_servers > self.lower_bound):
+            if self._empty_a_server():
+                n_servers = self._n_servers_in_use()
+                improvement = Improvement(n_servers, time.perf_counter() - self._start, self._n_moves)
+                self.history.append(improvement)
+                if self.callback is not None:
+                    self.callback(improvement)
+                self._stuck.clear()
+                n_moves_at_full_pass = self._n_moves
+            elif not self._rebalance():
+                if n_moves_at_full_pass == self._n_moves:
+                    break
+                # Retry all the servers once before giving up
+                self._stuck.clear()
+                n_moves_at_full_pass = self._n_moves
+
+        return Solution.from_assignment(solution.vms, self._pool, self.assignment.copy(), self.n_opened_servers,
+                                        solution.fragments, algo_name=f"{solution.algo_name}+LocalSearch")
+
+    def history_frame(self) -> pd.DataFrame:
+        """Improvements of the last search, one row each."""
+        return pd.DataFrame(self.history, columns=Improvement._fields)
+
+    def _out_of_time(self) -> bool:
+        return time.perf_counter() - self._start >= self.time_limit
+
+    def _prepare(self, solution: Solution) -> None:
+        vms = solution.vms
+        self._pool = solution.server_pool
+        self.demands: np.ndarray = vms[resource_columns].to_numpy(dtype=float)
+        # Size of each VM relative to the largest servers, to relocate the largest VMs first
+        self.sizes: np.ndarray = (self.demands / self._pool.spec_capacities.max(axis=0)).mean(axis=1)
+        self.assignment: np.ndarray = solution.assignment.astype(np.int64)
+        fragments = solution.fragments
+        servers = [self.assignment] if fragments is None else [self.assignment, fragments['server'].to_numpy()]
+        n = max(int(max(np.max(column, initial=-1) for column in servers)) + 1, self._pool.n_loaded)
+        self.n_opened_servers: int = n
+
+        self.capacities: np.ndarray = self._pool.capacities(0, n)
+        self.fillings: np.ndarray = self._pool.loads(0, n)
+        placed = np.flatnonzero(self.assignment >= 0)
+        for resource in range(len(resource_columns)):
+            self.fillings[:, resource] += np.bincount(self.assignment[placed],
+                                                      weights=self.demands[placed, resource], minlength=n)
+        # Servers that can't be emptied: loaded ones and the ones holding fragments of split VMs
+        self.fixed: np.ndarray = (self._pool.loads(0, n) != 0).any(axis=1)
+        if fragments is not None and len(fragments) > 0:
+            np.add.at(self.fillings, fragments['server'].to_numpy(),
+                      self.demands[fragments['vm'].to_numpy()] * fragments['fraction'].to_numpy()[:, None])
+            self.fixed[fragments['server'].to_numpy()] = True
+        self.space_left: np.ndarray = self.capacities - self.fillings
+        self.rates: np.ndarray = (self.fillings / self.capacities).mean(axis=1)
+        self.vm_counts: np.ndarray = np.bincount(self.assignment[placed], minlength=n)
+        self.server_vms: List[List[int]] = [[] for _ in range(n)]
+        for vm in placed.tolist():
+            self.server_vms[self.assignment[vm]].append(vm)
+
+        # Constraint bookkeeping: servers hosting each group, VMs of each class per server
+        self.groups: Optional[np.ndarray] = anti_affinity_groups(vms)
+        self.group_servers: Dict[int, Dict[int, int]] = {}
+        if self.groups is not None:
+            for vm in placed[self.groups[placed] >= 0].tolist():
+                servers_of_group = self.group_servers.setdefault(int(self.groups[vm]), {})
+                servers_of_group[self.assignment[vm]] = servers_of_group.get(self.assignment[vm], 0) + 1
+        self.class_rows: Optional[np.ndarray] = None
+        if self.segregate_classes:
+            classes = service_classes(vms)
+            class_values, self.class_rows = np.unique(classes, return_inverse=True)
+            rows = {int(vm_class): row for row, vm_class in enumerate(class_values)}
+            self.excluded_rows: List[List[int]] = [
+                [rows[b] for a, b in incompatible_classes if a == vm_class and b in rows]
+                + [rows[a] for a, b in incompatible_classes if b == vm_class and a in rows]
+                for vm_class in class_values.tolist()]
+            self.class_counts: np.ndarray = np.zeros((n, len(class_values)), dtype=np.int64)
+            np.add.at(self.class_counts, (self.assignment[placed], self.class_rows[placed]), 1)
+
+    def _n_servers_in_use(self) -> int:
+        return int(((self.fillings != 0).any(axis=1)).sum())
+
+    def _in_use(self) -> np.ndarray:
+        return (self.vm_counts > 0) | self.fixed
+
+    def _allows(self, vm: int, server: int, leaving: int = -1) -> bool:
+        """Whether the VM can join the server without constraint violation, once the `leaving` VM (if any) is
+        gone from it."""
+        if self.groups is not None and self.groups[vm] >= 0:
+            group = int(self.groups[vm])
+            count = self.group_servers.get(group, {}).get(server, 0)
+            if leaving >= 0 and self.groups[leaving] == group:
+                count -= 1
+            if count > 0:
+                return False
+        if self.class_rows is not None:
+            for row in self.excluded_rows[self.class_rows[vm]]:
+                count = self.class_counts[server, row]
+                if leaving >= 0 and self.class_rows[leaving] == row:
+                    count -= 1
+                if count > 0:
+                    return False
+        return True
+
+    def _move(self, vm: int, target: int) -> None:
+        source = int(self.assignment[vm])
+        demand = self.demands[vm]
+        for server, sign in ((source, -1.), (target, 1.)):
+            self.fillings[server] += sign * demand
+            self.space_left[server] = self.capacities[server] - self.fillings[server]
+            self.rates[server] = (self.fillings[server] / self.capacities[server]).mean()
+        self.server_vms[source].remove(vm)
+        self.server_vms[target].append(vm)
+        self.vm_counts[source] -= 1
+        self.vm_counts[target] += 1
+        if self.vm_counts[source] == 0 and not self.fixed[source]:
+            # Reset the emptied server exactly, without the rounding errors of the successive moves
+            self.fillings[source] = 0.
+            self.space_left[source] = self.capacities[source]
+            self.rates[source] = 0.
+        self.assignment[vm] = target
+        if self.groups is not None and self.groups[vm] >= 0:
+            servers_of_group = self.group_servers[int(self.groups[vm])]
+            servers_of_group[source] -= 1
+            servers_of_group[target] = servers_of_group.get(target, 0) + 1
+        if self.class_rows is not None:
+            self.class_counts[source, self.class_rows[vm]] -= 1
+            self.class_counts[target, self.class_rows[vm]] += 1
+        self._n_moves += 1
+
+    def _relocation_targets(self, vm: int, source: int) -> np.ndarray:
+        """Servers in use, other than the source, where the VM fits, from the fullest."""
+        demand = self.demands[vm]
+        fits = self._in_use() & (self.space_left >= demand).all(axis=1)
+        fits[source] = False
+        targets = np.flatnonzero(fits)
+        space_left_after = ((self.space_left[targets] - demand) / self.capacities[targets]).sum(axis=1)
+        return targets[np.argsort(space_left_after, kind='stable')]
+
+    def _emptying_candidates(self) -> np.ndarray:
+        candidates = np.flatnonzero((self.vm_counts > 0) & ~self.fixed)
+        return candidates[np.argsort(self.rates[candidates], kind='stable')]
+
+    def _empty_a_server(self) -> bool:
+        """Tries to empty the servers in use from the least filled, and stops at the first one emptied."""
+        for server in self._emptying_candidates().tolist():
+            if server in self._stuck:
+                continue
+            if self._out_of_time():
+                return False
+            vms = sorted(self.server_vms[server], key=lambda vm: -self.sizes[vm])
+            moves = []
+            for vm in vms:
+                target = next((target for target in self._relocation_targets(vm, server).tolist()
+                               if self._allows(vm, target)), None)
+                if target is None:
+                    break
+                self._move(vm, target)
+                moves.append(vm)
+            else:
+                return True
+            for vm in reversed(moves):
+                self._move(vm, server)
+            # Undone moves don't count
+            self._n_moves -= 2 * len(moves)
+            self._stuck.add(server)
+        return False
+
+    def _rebalance(self) -> bool:
+        """Applies the first relocation or swap increasing the sum of the squared filling rates, moving load away
+        from the least filled servers. Returns False when there is none."""
+        placed = np.flatnonzero(self.assignment >= 0)
+        for source in self._emptying_candidates().tolist():
+            for vm in list(self.server_vms[source]):
+                if self._out_of_time():
+                    return False
+                target = self._relocate_better(vm, source)
+                if target is None:
+                    target = self._swap_better(vm, source, placed)
+                if target is not None:
+                    self._stuck.difference_update((source, target))
+                    return True
+        return False
+
+    def _relocate_better(self, vm: int, source: int) -> Optional[int]:
+        """Relocates the VM to the server increasing the most the sum of the squared filling rates, if any, and
+        returns that server."""
+        targets = self._relocation_targets(vm, source)
+        if len(targets) == 0:
+            return None
+        source_rate = self.rates[source] - (self.demands[vm] / self.capacities[source]).mean()
+        target_rates = self.rates[targets] + (self.demands[vm] / self.capacities[targets]).mean(axis=1)
+        deltas = source_rate ** 2 - self.rates[source] ** 2 + target_rates ** 2 - self.rates[targets] ** 2
+        for position in np.argsort(-deltas, kind='stable').tolist():
+            if deltas[position] <= 1e-12:
+                return None
+            if self._allows(vm, int(targets[position])):
+                self._move(vm, int(targets[position]))
+                return int(targets[position])
+        return None
+
+    def _swap_better(self, vm: int, source: int, placed: np.ndarray) -> Optional[int]:
+        """Swaps the VM with a smaller VM of another server, when both fit and the source gets emptier, and
+        returns that server."""
+        others = placed[self.assignment[placed] != source]
+        targets = self.assignment[others]
+        differences = self.demands[others] - self.demands[vm]
+        fits = (self.space_left[targets] + differences >= 0).all(axis=1) \
+            & (self.space_left[source] - differences >= 0).all(axis=1)
+        others, targets, differences = others[fits], targets[fits], differences[fits]
+        if len(others) == 0:
+            return None
+        source_rates = self.rates[source] + (differences / self.capacities[source]).mean(axis=1)
+        target_rates = self.rates[targets] - (differences / self.capacities[targets]).mean(axis=1)
+        deltas = source_rates ** 2 - self.rates[source] ** 2 + target_rates ** 2 - self.rates[targets] ** 2
+        for position in np.argsort(-deltas, kind='stable').tolist():
+            if deltas[position] <= 1e-12:
+                return None
+            other, target = int(others[position]), int(targets[position])
+            if self._allows(vm, target, leaving=other) and self._allows(other, source, leaving=vm):
+                self._move(vm, target)
+                self._move(other, source)
+                return target
+        return None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.time_limit}s]"
@@ -0,0 +1 @@
+from .online_placer import OnlinePlacer
@@ -0,0 +1,229 @@
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from vm_placement.algorithms.approximation.approx_algo import ApproxAlgo
+from vm_placement.algorithms.approximation.segment_tree import MaxResidualTree
+from vm_placement.algorithms.approximation.space_left_index import SpaceLeftIndex
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import OpenServers, ServerPool
+
+
+class OnlinePlacer(ApproxAlgo):
+    """Long-lived placer handling VM arrivals (`place`) and departures (`release`) one at a time.
+
+    The policy decides where an arriving VM goes among the opened servers:
+    - 'first_fit': the first server where it fits, found with a MaxResidualTree
+    - 'best_fit': the server with the smallest space left (according to `criterion`) where it fits, found with a
+      SpaceLeftIndex
+    - 'harmonic': constant time per VM, for a single server specification. A VM belongs to size class k when its
+      dominant resource, relative to the capacity, is in (1/(k+1), 1/k], up to `n_size_classes`. The servers are
+      dedicated to a size class: a class k < n_size_classes server has k slots, so the VM takes the first slot
+      left in the queue of servers of its class, without any fit check. The smallest VMs share the servers of the
+      last class, filled in turn, next-fit. The VMs are packed Harmonic-style, trading some packing quality for
+      decisions that don't depend on the number of servers.
+    A new server of the pool is opened only when the VM fits in none of them. The servers emptied by departures
+    stay opened and get reused, so the state grows with the peak number of live VMs and not with the history.
+    """
+    policies = ['first_fit', 'best_fit', 'harmonic']
+
+    def __init__(self, server_capacities: Union[pd.DataFrame, ServerPool], policy: str = 'first_fit',
+                 criterion: Union[str, List[str]] = 'Storage', n_size_classes: int = 6):
+        if policy not in self.policies:
+            raise ValueError(f"Unknown online policy '{policy}', expected one of {self.policies}")
+        self.policy: str = policy
+        self.sorting_criterion: Union[str, List[str]] = criterion
+        self.servers = OpenServers(ServerPool.from_servers(server_capacities))
+        self.placements: Dict[Hashable, Tuple[int, np.ndarray]] = {}
+        # The loaded servers of the pool are opened from the start, without any VM of the placer
+        self.server_vm_counts: List[int] = [0] * self.servers.n_servers
+        if policy == 'harmonic':
+            if len(self.servers.pool.spec_capacities) != 1 or self.servers.pool.n_loaded > 0:
+                raise ValueError("The harmonic policy needs a single server specification, without loads")
+            self.n_size_classes: int = n_size_classes
+            self._capacity: np.ndarray = self.servers.pool.spec_capacities[0]
+            # Size class of each opened server (-1 when empty) and its slots left, for classes < n_size_classes
+            self._server_size_classes: List[int] = []
+            self._slots_left: List[int] = []
+            # Servers of each size class with room left, possibly stale (checked when reached), and empty servers
+            self._open_slots: Dict[int, Deque[int]] = {size_class: deque()
+                                                       for size_class in range(1, n_size_classes + 1)}
+            # Whether each server is in the queue of its size class, so that it is queued at most once
+            self._queued: List[bool] = []
+            self._empty_servers: Deque[int] = deque()
+        elif policy == 'first_fit':
+            self._tree = MaxResidualTree(self.servers.space_left, scale=self.servers.pool.spec_capacities.max(axis=0))
+        else:
+            criteria = [criterion] if isinstance(criterion, str) else criterion
+            self._index = SpaceLeftIndex(np.array([[1. if resource == c else 0. for resource in resource_columns]
+                                                   for c in criteria]))
+            for server in range(self.servers.n_servers):
+                self._index.add(server, self.servers.space_left[server])
+
+    def place(self, vm_id: Hashable, vm: Union[pd.Series, Sequence[float]]) -> Optional[int]:
+        """Places an arriving VM and returns the index of its server, or None if it fits in no server."""
+        if vm_id in self.placements:
+            raise KeyError(f"VM {vm_id} is already placed")
+        demand = np.asarray(vm[resource_columns] if isinstance(vm, pd.Series) else vm, dtype=float)
+        if self.policy == 'harmonic':
+            return self._place_harmonic(vm_id, demand)
+        if self.policy == 'first_fit':
+            server = self._tree.find_first_fitting_server(demand.tolist())
+        else:
+            server = self._index.find_best_fitting_server(demand, self.servers.space_left)
+        if server is None:
+            server = self._open_server(demand)
+            if server is None:
+                return None
+
+        self.servers.add_demand(server, demand)
+        self.server_vm_counts[server] += 1
+        self.placements[vm_id] = (server, demand)
+        self._update_index(server)
+        return server
+
+    def release(self, vm_id: Hashable) -> int:
+        """Removes a departing VM and returns the index of the server it was on."""
+        server, demand = self.placements.pop(vm_id)
+        self.server_vm_counts[server] -= 1
+        if self.policy == 'harmonic':
+            self._release_harmonic(server)
+        if self.server_vm_counts[server] == 0:
+            # Reset the emptied server exactly to its initial load, without the rounding errors of the successive
+            # additions
+            self.servers.add_demand(server, self.servers.pool.loads(server, server + 1)[0]
+                                    - self.servers.fillings[server])
+        else:
+            self.servers.add_demand(server, -demand)
+        self._update_index(server)
+        return server
+
+    def size_class(self, demand: np.ndarray) -> int:
+        """Harmonic size class of a demand: k for a dominant resource in (1/(k+1), 1/k] of the capacity, at most
+        `n_size_classes`, and 0 for a demand larger than the capacity."""
+        dominant_size = float((demand / self._capacity).max())
+        if dominant_size > 1:
+            return 0
+        if dominant_size <= 1 / self.n_size_classes:
+            return self.n_size_classes
+        return min(int(1 / dominant_size), self.n_size_classes)
+
+    def _place_harmonic(self, vm_id: Hashable, demand: np.ndarray) -> Optional[int]:
+        size_class = self.size_class(demand)
+        if size_class == 0:
+            return None
+        slots = self._open_slots[size_class]
+        server: Optional[int] = None
+        while slots and server is None:
+            candidate = slots[0]
+            if self._server_size_classes[candidate] != size_class:
+                # Emptied and reused by another class since it was queued
+                slots.popleft()
+            elif size_class < self.n_size_classes:
+                if self._slots_left[candidate] > 0:
+                    server = candidate
+                else:
+                    self._dequeue(slots)
+            elif (self.servers.space_left[candidate] >= demand).all():
+                server = candidate
+            else:
+                # Next-fit: a small VM that doesn't fit closes the server, until a departure
+                self._dequeue(slots)
+        if server is None:
+            server = self._empty_servers.popleft() if self._empty_servers else self._open_harmonic_server()
+            if server is None:
+                return None
+            self._server_size_classes[server] = size_class
+            self._slots_left[server] = size_class
+            slots.append(server)
+            self._queued[server] = True
+
+        self.servers.add_demand(server, demand)
+        self.server_vm_counts[server] += 1
+        self._slots_left[server] -= 1
+        if size_class < self.n_size_classes and self._slots_left[server] == 0:
+            self._dequeue(slots)
+        self.placements[vm_id] = (server, demand)
+        return server
+
+    def _open_harmonic_server(self) -> Optional[int]:
+        server = self.servers.n_servers
+        if self.servers.pool.max_servers is not None and server >= self.servers.pool.max_servers:
+            return None
+        self.servers.open_until(server)
+        self.server_vm_counts.append(0)
+        self._server_size_classes.append(-1)
+        self._slots_left.append(0)
+        self._queued.append(False)
+        return server
+
+    def _dequeue(self, slots: Deque[int]) -> None:
+        """Removes the server at the head of the queue of its size class."""
+        self._queued[slots.popleft()] = False
+
+    def _release_harmonic(self, server: int) -> None:
+        size_class = self._server_size_classes[server]
+        if self.server_vm_counts[server] == 0:
+            # Its entry in the queue of its class, if any, is now stale
+            self._server_size_classes[server] = -1
+            self._queued[server] = False
+            self._empty_servers.append(server)
+            return
+        self._slots_left[server] += 1
+        # Back in the queue of its class when it got room again and is not queued (closed next-fit servers too)
+        if not self._queued[server]:
+            self._open_slots[size_class].append(server)
+            self._queued[server] = True
+
+    def _open_server(self, demand: np.ndarray) -> Optional[int]:
+        n_open_servers: int = self.servers.n_servers
+        server = self._open_first_fitting_server(demand, self.servers, start=n_open_servers)
+        if server is None:
+            return None
+        self.server_vm_counts.extend([0] * (self.servers.n_servers - n_open_servers))
+        for new_server in range(n_open_servers, self.servers.n_servers):
+            if self.policy == 'first_fit':
+                self._tree.extend(self.servers.space_left[new_server:new_server + 1])
+            else:
+                self._index.add(new_server, self.servers.space_left[new_server])
+        return server
+
+    def _update_index(self, server: int) -> None:
+        if self.policy == 'harmonic':
+            return
+        if self.policy == 'first_fit':
+            self._tree.update(server, self.servers.space_left[server].tolist())
+        else:
+            self._index.update(server, self.servers.space_left[server])
+
+    def replay(self, events: pd.DataFrame) -> np.ndarray:
+        """Replays an event log with one row per event: an 'event' column ('arrival' or 'departure'), a 'vm_id'
+        column and the resource columns (only read for arrivals).
+        Returns the server of each event, -1 for the arrivals that could not be placed."""
+        is_arrival = (events['event'] == 'arrival').to_numpy()
+        vm_ids = events['vm_id'].to_numpy()
+        demands = events[resource_columns].to_numpy(dtype=float)
+        servers = np.empty(len(events), dtype=np.int64)
+        for i in tqdm(range(len(events))):
+            if is_arrival[i]:
+                server = self.place(vm_ids[i], demands[i])
+                servers[i] = -1 if server is None else server
+            else:
+                servers[i] = self.release(vm_ids[i])
+        return servers
+
+    @property
+    def n_active_servers(self) -> int:
+        """Number of servers currently hosting at least one VM."""
+        return int(np.count_nonzero(self.server_vm_counts))
+
+    def solution(self) -> Solution:
+        """Snapshot of the current placement."""
+        return self._build_solution(self.servers)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}[{self.policy}]"
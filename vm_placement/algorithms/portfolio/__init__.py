@@ -0,0 +1 @@
+from .portfolio_runner import PortfolioConfig, PortfolioRunner, default_portfolio
@@ -0,0 +1,187 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.algorithms.approximation.best_fit import BestFitAlgo
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.processing import anti_affinity_column, class_column, resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+class PortfolioConfig(NamedTuple):
+    """One run of the portfolio: an algorithm ('first_fit' or 'best_fit', with its sorting criterion) applied to
+    the VMs in a given order ('original', 'scarcity', 'decreasing_<resource>' or 'random_<seed>')."""
+    algo: str
+    ordering: str = 'original'
+    criterion: Optional[str] = None
+
+    def __str__(self) -> str:
+        criterion = f"[{self.criterion}]" if self.criterion is not None else ""
+        return f"{self.algo}{criterion}/{self.ordering}"
+
+
+def default_portfolio(n_random_orders: int = 0) -> List[PortfolioConfig]:
+    """First-Fit and Best-Fit with each sorting criterion, on the original order, the scarcity order, the decreasing
+    order of each resource and `n_random_orders` random orders."""
+    orderings = ['original', 'scarcity'] + [f"decreasing_{resource}" for resource in resource_columns] \
+        + [f"random_{seed}" for seed in range(n_random_orders)]
+    algos = [('first_fit', None)] + [('best_fit', criterion) for criterion in resource_columns + ['weighted_resources']]
+    return [PortfolioConfig(algo, ordering, criterion) for ordering in orderings for algo, criterion in algos]
+
+
+# State of the worker processes, set once by _init_worker
+_worker_demands: Optional[np.ndarray] = None
+_worker_shared_memory: Optional[shared_memory.SharedMemory] = None
+_worker_pool: Optional[ServerPool] = None
+_worker_scarcity_ratio: Optional[pd.Series] = None
+_worker_constraint_columns: Dict[str, np.ndarray] = {}
+_worker_segregate_classes: bool = False
+
+
+def _init_worker(shared_memory_name: str, shape: Tuple[int, int], pool: ServerPool, scarcity_ratio: pd.Series,
+                 constraint_columns: Dict[str, np.ndarray], segregate_classes: bool):
+    """Attaches the worker to the VM demands in shared memory, read-only, instead of receiving them with each task.
+    The anti-affinity groups and classes of the VMs, one small integer column each, are copied once per worker."""
+    global _worker_demands, _worker_shared_memory, _worker_pool, _worker_scarcity_ratio, \
+        _worker_constraint_columns, _worker_segregate_classes
+    _worker_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    _worker_demands = np.ndarray(shape, dtype=np.float64, buffer=_worker_shared_memory.buf)
+    _worker_demands.flags.writeable = False
+    _worker_pool = pool
+    _worker_scarcity_ratio = scarcity_ratio
+    _worker_constraint_columns = constraint_columns
+    _worker_segregate_classes = segregate_classes
+
+
+def _vm_order(config: PortfolioConfig, demands: np.ndarray, scarcity_ratio: pd.Series) -> np.ndarray:
+    """Positions of the VMs in the order of the configuration."""
+    if config.ordering == 'original':
+        return np.arange(len(demands))
+    if config.ordering == 'scarcity':
+        # Same weighted resources as sort_by_scarcity_ratio
+        scaled_demands = demands / np.where(demands.max(axis=0) > 0, demands.max(axis=0), 1)
+        weighted_resources = scaled_demands @ scarcity_ratio[resource_columns].to_numpy(dtype=float)
+        return np.argsort(-weighted_resources, kind='stable')
+    if config.ordering.startswith('decreasing_'):
+        resource = resource_columns.index(config.ordering[len('decreasing_'):])
+        return np.argsort(-demands[:, resource], kind='stable')
+    if config.ordering.startswith('random_'):
+        return np.random.default_rng(int(config.ordering[len('random_'):])).permutation(len(demands))
+    raise ValueError(f"Unknown VM ordering: {config.ordering}")
+
+
+def _run_config(config: PortfolioConfig):
+    """Runs one configuration in a worker. Returns the number of servers used and the assignment of the VMs, by
+    position in the original order."""
+    start = time.perf_counter()
+    order = _vm_order(config, _worker_demands, _worker_scarcity_ratio)
+    vms = pd.DataFrame(_worker_demands[order], columns=resource_columns)
+    for column, values in _worker_constraint_columns.items():
+        vms[column] = values[order]
+    if config.algo == 'first_fit':
+        solution = FirstFitAlgo(segregate_classes=_worker_segregate_classes).solve(vms, _worker_pool)
+    elif config.algo == 'best_fit':
+        solution = BestFitAlgo(criterion=config.criterion, segregate_classes=_worker_segregate_classes).solve(
+            vms, _worker_pool, _worker_scarcity_ratio)
+    else:
+        raise ValueError(f"Unknown algorithm: {config.algo}")
+    assignment = np.empty(len(order), dtype=np.int32)
+    assignment[order] = solution.assignment
+    return solution.n_servers, assignment, time.perf_counter() - start
+
+
+class PortfolioRunner:
+    """Races configurations of the approximation algorithms over a process pool and keeps the best solution.
+
+    The VM demands are copied once into shared memory, which the workers read without pickling the VMs for each
+    task. As soon as a solution reaches `lower_bound` (e.g. from `CombinatorialLowerBound`, which leaves out the VMs
+    fitting in no server as the solutions do), the configurations not started yet are cancelled; the ones already
+    running finish but are not waited for.
+    The anti-affinity groups of the VMs (`anti_affinity_column`) are kept apart by every configuration and, with
+    `segregate_classes`, so are the classes of `incompatible_classes`.
+    """
+    def __init__(self, configs: Optional[List[PortfolioConfig]] = None, max_workers: Optional[int] = None,
+                 lower_bound: Optional[int] = None, segregate_classes: bool = False):
+        self.configs: List[PortfolioConfig] = default_portfolio() if configs is None else configs
+        self.max_workers: Optional[int] = max_workers
+        self.lower_bound: Optional[int] = lower_bound
+        self.segregate_classes: bool = segregate_classes
+
+    def solve(self, vms: pd.DataFrame, server_capacities: Union[pd.DataFrame, ServerPool],
+              scarcity_ratio: Optional[pd.Series] = None) -> Tuple[Solution, pd.DataFrame]:
+        """Returns the best solution (fewest oversize VMs, then fewest servers) and a report of the configurations,
+        one row per configuration, with its number of servers, oversize VMs and run time in seconds."""
+        if len(self.configs) == 0:
+            raise ValueError("The portfolio has no configuration")
+        pool = ServerPool.from_servers(server_capacities)
+        demands: np.ndarray = vms[resource_columns].to_numpy(dtype=np.float64)
+        if scarcity_ratio is None:
+            scarcity_ratio = pd.Series(demands.mean(axis=0) / pool.spec_capacities.mean(axis=0), index=resource_columns)
+        constraint_columns = {column: vms[column].to_numpy() for column in (anti_affinity_column, class_column)
+                              if column in vms.columns and (column != class_column or self.segregate_classes)}
+        report = pd.DataFrame({'config': [str(config) for config in self.configs], 'n_servers': np.nan,
+                               'n_oversize': np.nan, 'seconds': np.nan, 'status': 'cancelled'})
+
+        shared_demands = shared_memory.SharedMemory(create=True, size=max(demands.nbytes, 1))
+        best: Optional[Tuple[int, int, int, tuple]] = None
+        try:
+            np.ndarray(demands.shape, dtype=np.float64, buffer=shared_demands.buf)[:] = demands
+            executor = ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                           initargs=(shared_demands.name, demands.shape, pool, scarcity_ratio,
+                                                     constraint_columns, self.segregate_classes))
+            try:
+                futures = {executor.submit(_run_config, config): position
+                           for position, config in enumerate(self.configs)}
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        position = futures[future]
+                        result = future.result()
+                        n_servers, n_oversize = result[0], int((result[1] < 0).sum())
+                        report.loc[position, ['n_servers', 'n_oversize', 'seconds', 'status']] = \
+                            [n_servers, n_oversize, result[2], 'done']
+                        if best is None or (n_oversize, n_servers, position) < best[:3]:
+                            best = (n_oversize, n_servers, position, result)
+                    if best is not None and self.lower_bound is not None and best[1] <= self.lower_bound:
+                        for future in pending:
+                            future.cancel()
+                        break
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            shared_demands.close()
+            shared_demands.unlink()
+
+        report['n_servers'] = report['n_servers'].astype('Int64')
+        report['n_oversize'] = report['n_oversize'].astype('Int64')
+        _, _, position, (_, assignment, _) = best
+        solution = Solution.from_assignment(vms, pool, assignment, algo_name=f"Portfolio[{self.configs[position]}]")
+        return solution, report
+
+
+if __name__ == '__main__':
+    from vm_placement.data_handling.data_loader import Data
+    from vm_placement.lp_models.lower_bounds import CombinatorialLowerBound
+
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data(
+        vm_filepath='data/vm_data.csv',
+        server_specs=server_capacity
+    )
+    runner = PortfolioRunner(default_portfolio(n_random_orders=4),
+                             lower_bound=CombinatorialLowerBound().solve(data))
+    solution, report = runner.solve(data.vm_data, data.server_pool)
+    print(report.sort_values('n_servers').to_string())
+    print(solution)
@@ -1,25 +1,184 @@
+from __future__ import annotations
+import json
 from typing import Optional
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
-from vm_placement.data_handling.processing import resource_columns
+from vm_placement.algorithms.instrumentation import SolveStats
+from vm_placement.data_handling.processing import anti_affinity_column, class_column, resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+# Special values of the assignment
+OVERSIZE: int = -1
+SPLIT: int = -2
+
+
+def server_fillings_frame(fillings: np.ndarray, server_capacities: pd.DataFrame) -> pd.DataFrame:
+    """Builds the server fillings DataFrame from the filling array, with the index, columns and dtypes
+    the row-by-row pandas implementation yields (integer columns stay integer while all values are integral)."""
+    server_fillings = pd.DataFrame(fillings, index=server_capacities.index, columns=resource_columns)
+    server_fillings = server_fillings.reindex(columns=server_capacities.columns, fill_value=0.)
+    for column, dtype in server_capacities.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype) and (server_fillings[column] % 1 == 0).all():
+            server_fillings[column] = server_fillings[column].astype(dtype)
+    return server_fillings
 
 
 class Solution:
+    """Placement of VMs in servers.
+
+    A solution is either given by its server tables (the constructor), or built around the placement itself with
+    `from_assignment`: an int32 array with the server of each VM, by position (OVERSIZE for the VMs placed nowhere,
+    SPLIT for the VMs split across servers), and a `fragments` table (columns 'vm', 'server', 'fraction') holding
+    the parts of the split VMs. The server tables (`server_fillings`, `server_capacities`), `n_servers` and
+    `oversize_vms` are then derived from the VMs when first accessed and cached. Such solutions are saved with
+    `save`, loaded with `load` and compared with `diff`.
+    """
     def __init__(self,
                  server_capacities: pd.DataFrame,
                  server_fillings: pd.DataFrame,
                  overize_vms: Optional[pd.DataFrame] = None,
-                 algo_name: Optional[str] = None
+                 algo_name: Optional[str] = None,
+                 assignment: Optional[np.ndarray] = None,
+                 stats: Optional[SolveStats] = None
                  ):
-        # Drop zero rows of non-used servers
-        used_server_fillings = server_fillings.loc[(server_fillings != 0).any(axis=1)]
-        self.server_fillings: pd.DataFrame = used_server_fillings
-        self.n_servers: int = len(used_server_fillings)
-        self.server_capacities: pd.DataFrame = server_capacities[:][:self.n_servers]
-        self.oversize_vms: Optional[pd.DataFrame] = overize_vms
         self.algo_name: str = algo_name if algo_name is not None else ""
+        # Server index of each VM, by position (-1 for oversize VMs), when the algorithm records it
+        self.assignment: Optional[np.ndarray] = None if assignment is None else np.asarray(assignment, np.int32)
+        self.fragments: Optional[pd.DataFrame] = None
+        # Counters and phase timings of the solve, when the algorithm was instrumented
+        self.stats: Optional[SolveStats] = stats
+        self._vms: Optional[pd.DataFrame] = None
+        self._server_pool: Optional[ServerPool] = None
+        self._n_opened_servers: Optional[int] = None
+        self._oversize_vms: Optional[pd.DataFrame] = overize_vms
+        self._set_server_tables(server_capacities, server_fillings)
+
+    @classmethod
+    def from_assignment(cls, vms: pd.DataFrame, server_pool: ServerPool, assignment: np.ndarray,
+                        n_opened_servers: Optional[int] = None, fragments: Optional[pd.DataFrame] = None,
+                        algo_name: Optional[str] = None, stats: Optional[SolveStats] = None) -> Solution:
+        """Solution placing the VMs (by position) in the servers of the pool. Only the assignment and the
+        fragments are stored, along with a copy of the resource and constraint columns of the VMs (so that later
+        changes of `vms` by the caller do not affect the solution) and a reference to the pool."""
+        solution = cls.__new__(cls)
+        solution.algo_name = algo_name if algo_name is not None else ""
+        solution.assignment = np.asarray(assignment, dtype=np.int32)
+        solution.fragments = fragments
+        solution.stats = stats
+        columns = [column for column in resource_columns + [anti_affinity_column, class_column]
+                   if column in vms.columns]
+        solution._vms = vms[columns].copy()
+        solution._server_pool = server_pool
+        if n_opened_servers is None:
+            servers = [solution.assignment] if fragments is None else [solution.assignment, fragments['server']]
+            n_opened_servers = max(int(max(np.max(column, initial=-1) for column in servers)) + 1,
+                                   server_pool.n_loaded)
+        solution._n_opened_servers = n_opened_servers
+        solution._oversize_vms = None
+        solution._server_fillings = None
+        solution._server_capacities = None
+        solution._n_servers = None
+        return solution
+
+    def _set_server_tables(self, server_capacities: pd.DataFrame, server_fillings: pd.DataFrame) -> None:
+        # Drop zero rows of non-used servers, keeping the capacities of the used ones, which may differ in a fleet
+        used_server_fillings = server_fillings.loc[(server_fillings != 0).any(axis=1)]
+        self._server_fillings: Optional[pd.DataFrame] = used_server_fillings
+        self._n_servers: Optional[int] = len(used_server_fillings)
+        self._server_capacities: Optional[pd.DataFrame] = server_capacities.loc[used_server_fillings.index]
+
+    def _derive_server_tables(self) -> None:
+        demands: np.ndarray = self._vms[resource_columns].to_numpy(dtype=float)
+        # The servers start from their initial load
+        fillings = self._server_pool.loads(0, self._n_opened_servers)
+        placed = np.flatnonzero(self.assignment >= 0)
+        for resource in range(len(resource_columns)):
+            fillings[:, resource] += np.bincount(self.assignment[placed], weights=demands[placed, resource],
+                                                 minlength=self._n_opened_servers)
+        if self.fragments is not None and len(self.fragments) > 0:
+            fragment_demands = demands[self.fragments['vm'].to_numpy()] \
+                * self.fragments['fraction'].to_numpy()[:, None]
+            np.add.at(fillings, self.fragments['server'].to_numpy(), fragment_demands)
+        server_capacities = self._server_pool.to_frame(self._n_opened_servers)
+        self._set_server_tables(server_capacities, server_fillings_frame(fillings, server_capacities))
+
+    @property
+    def vms(self) -> Optional[pd.DataFrame]:
+        """VMs placed by the assignment, for solutions built with from_assignment."""
+        return self._vms
+
+    @property
+    def server_pool(self) -> Optional[ServerPool]:
+        """Pool of the servers of the assignment, for solutions built with from_assignment."""
+        return self._server_pool
+
+    @property
+    def server_fillings(self) -> pd.DataFrame:
+        if self._server_fillings is None:
+            self._derive_server_tables()
+        return self._server_fillings
+
+    @property
+    def server_capacities(self) -> pd.DataFrame:
+        if self._server_capacities is None:
+            self._derive_server_tables()
+        return self._server_capacities
+
+    @property
+    def n_servers(self) -> int:
+        if self._n_servers is None:
+            self._derive_server_tables()
+        return self._n_servers
+
+    @property
+    def oversize_vms(self) -> Optional[pd.DataFrame]:
+        if self._oversize_vms is None and self._vms is not None:
+            self._oversize_vms = self._vms.iloc[np.flatnonzero(self.assignment == OVERSIZE)]
+        return self._oversize_vms
+
+    def save(self, path: str) -> None:
+        """Saves the assignment, the fragments and the server pool in a compressed .npz file."""
+        if self._server_pool is None:
+            raise ValueError("Only solutions built with from_assignment can be saved")
+        fragments = self.fragments if self.fragments is not None else \
+            pd.DataFrame({'vm': np.empty(0, np.int32), 'server': np.empty(0, np.int32), 'fraction': np.empty(0)})
+        metadata = {'algo_name': self.algo_name, 'n_opened_servers': self._n_opened_servers,
+                    'n_copies': self._server_pool.n_copies,
+                    'server_specs': self._server_pool.server_specs.to_dict(orient='list'),
+                    'initial_loads': self._server_pool.initial_loads.tolist()}
+        np.savez_compressed(path, assignment=self.assignment, fragment_vms=fragments['vm'].to_numpy(np.int32),
+                            fragment_servers=fragments['server'].to_numpy(np.int32),
+                            fragment_fractions=fragments['fraction'].to_numpy(float),
+                            metadata=np.array(json.dumps(metadata)))
+
+    @classmethod
+    def load(cls, path: str, vms: pd.DataFrame) -> Solution:
+        """Loads a solution saved with `save`, for the same VMs."""
+        with np.load(path) as arrays:
+            metadata = json.loads(str(arrays['metadata']))
+            fragments = pd.DataFrame({'vm': arrays['fragment_vms'], 'server': arrays['fragment_servers'],
+                                      'fraction': arrays['fragment_fractions']})
+            assignment = arrays['assignment']
+        if len(assignment) != len(vms):
+            raise ValueError(f"The solution places {len(assignment)} VMs, not {len(vms)}")
+        server_pool = ServerPool(pd.DataFrame(metadata['server_specs']), n_copies=metadata['n_copies'],
+                                 initial_loads=np.array(metadata.get('initial_loads', [])))
+        return cls.from_assignment(vms, server_pool, assignment, metadata['n_opened_servers'],
+                                   fragments if len(fragments) > 0 else None, metadata['algo_name'])
+
+    def diff(self, previous: Solution) -> pd.DataFrame:
+        """VMs placed differently than in a previous solution of the same VMs, with their previous and new server
+        (OVERSIZE and SPLIT included)."""
+        if self.assignment is None or previous.assignment is None:
+            raise ValueError("Both solutions need an assignment to be compared")
+        if len(self.assignment) != len(previous.assignment):
+            raise ValueError("The solutions place different numbers of VMs")
+        moved = np.flatnonzero(self.assignment != previous.assignment)
+        return pd.DataFrame({'vm': moved, 'previous_server': previous.assignment[moved],
+                             'server': self.assignment[moved]})
 
     def display(self):
 
@@ -0,0 +1,33 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling.processing import resource_columns
+
+type_columns = resource_columns + ['Class']
+
+
+def aggregate_vm_types(vm_data: pd.DataFrame, columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Collapses identical VMs into distinct types.
+    Returns the types (one row per distinct combination of `columns`, in order of first appearance, with their
+    multiplicity in a 'count' column) and the type of each VM, by position."""
+    columns = [column for column in type_columns if column in vm_data.columns] if columns is None else columns
+    vm_type: np.ndarray = vm_data.groupby(columns, sort=False).ngroup().to_numpy()
+    first_vms = np.unique(vm_type, return_index=True)[1]
+    vm_types = vm_data[columns].iloc[first_vms].reset_index(drop=True)
+    vm_types['count'] = np.bincount(vm_type, minlength=len(vm_types))
+    return vm_types, vm_type
+
+
+def expand_type_placements(vm_type: np.ndarray, placement_types: np.ndarray, placement_servers: np.ndarray,
+                           placement_counts: np.ndarray) -> np.ndarray:
+    """Maps placements of types back to individual VMs.
+    Each placement puts `placement_counts[k]` VMs of type `placement_types[k]` in server `placement_servers[k]`,
+    and the placements of a type must account for all its VMs. The VMs of a type are given the servers of its
+    placements in order, following their own order. Returns the server of each VM, by position."""
+    order = np.argsort(placement_types, kind='stable')
+    servers_by_type = np.repeat(placement_servers[order], placement_counts[order])
+    assignment = np.empty(len(vm_type), dtype=servers_by_type.dtype)
+    assignment[np.argsort(vm_type, kind='stable')] = servers_by_type
+    return assignment
@@ -1,26 +1,77 @@
 from __future__ import annotations
-from typing import Optional
+from typing import List, Optional
+
+import numpy as np
 import pandas as pd
 
-from vm_placement.data_handling.processing import duplicate_entry
+from vm_placement.data_handling.inventory import iter_vm_chunks, load_vm_data
+from vm_placement.data_handling.processing import anti_affinity_column, anti_affinity_group_positions
+from vm_placement.data_handling.server_pool import ServerPool
 
 
 class Data:
-    def __init__(self, vm_filepath: str, server_specs: Optional[pd.DataFrame], n_servers: Optional[int] = None):
-        self.vm_data: pd.DataFrame = pd.read_csv(vm_filepath, sep=';')
+    def __init__(self, vm_filepath: str, server_specs: Optional[pd.DataFrame], n_servers: Optional[int] = None,
+                 use_cache: bool = True, cache_dir: Optional[str] = None,
+                 server_loads: Optional[pd.DataFrame] = None):
+        """Loads the VMs of a CSV file with compact dtypes. With `use_cache`, they are mapped from a binary cache of
+        the file (see `load_vm_data`) instead of being parsed again.
+        The servers are `n_servers` copies of the server specifications (as many as VMs by default); a fleet of
+        servers of different capacities is given by listing them all with `n_servers=1`. `server_loads` holds the
+        workloads already running on the first servers, one row per server."""
+        if use_cache:
+            self.vm_data: pd.DataFrame = load_vm_data(vm_filepath, cache_dir)
+        else:
+            self.vm_data: pd.DataFrame = pd.concat(iter_vm_chunks(vm_filepath), ignore_index=True)
         n_servers = len(self.vm_data) if n_servers is None else n_servers
-        self.server_data = duplicate_entry(server_specs, n_times=n_servers)
+        self.server_pool: ServerPool = ServerPool(server_specs, n_copies=n_servers, initial_loads=server_loads)
+
+    @classmethod
+    def from_frame(cls, vm_data: pd.DataFrame, server_specs: Optional[pd.DataFrame],
+                   n_servers: Optional[int] = None, server_loads: Optional[pd.DataFrame] = None) -> Data:
+        """Builds the data from VMs already in a DataFrame, e.g. generated ones, instead of a CSV file."""
+        data = cls.__new__(cls)
+        data.vm_data = vm_data
+        n_servers = len(vm_data) if n_servers is None else n_servers
+        data.server_pool = ServerPool(server_specs, n_copies=n_servers, initial_loads=server_loads)
+        return data
+
+    @property
+    def server_data(self) -> pd.DataFrame:
+        """All the servers of the pool, one per row. Prefer passing `server_pool` to the algorithms, which opens
+        servers on demand instead of materializing them all."""
+        return self.server_pool.to_frame()
+
+    @property
+    def anti_affinity_groups(self) -> List[List[int]]:
+        """Positions of the VMs of each anti-affinity group, by increasing group."""
+        return anti_affinity_group_positions(self.vm_data)
+
+    def set_anti_affinity_groups(self, groups: List[List[int]]) -> Data:
+        """Sets groups of VMs, given by position, that must be placed in different servers. A VM belongs to at most
+        one group, stored in the `anti_affinity_column` of the VMs so that it follows them through filters and
+        sorts."""
+        vm_groups = np.full(len(self.vm_data), -1, dtype=np.int32)
+        for group, vm_positions in enumerate(groups):
+            if (vm_groups[vm_positions] >= 0).any():
+                raise ValueError(f"VMs of anti-affinity group {group} already belong to another group")
+            vm_groups[vm_positions] = group
+        self.vm_data[anti_affinity_column] = vm_groups
+        return self
 
     def filter_vms_by_resource(self, resource: str, max: float) -> Data:
-        filtered_vms = self.vm_data[self.vm_data[resource] <= max].reset_index(drop=True)
+        filtered_vms = self.vm_data[self.vm_data[resource] <= max]
+        # In place, to avoid a second copy of the filtered VMs
+        filtered_vms.reset_index(drop=True, inplace=True)
         print(f"Filtered out {len(self.vm_data) - len(filtered_vms)} VMs with {resource} > {max}")
         self.vm_data = filtered_vms
         return self
 
     def subset_vms(self, n_vms: int, seed: int = None) -> Data:
-        self.vm_data = self.vm_data.sample(n_vms, random_state=seed).reset_index()
+        sampled_vms = self.vm_data.sample(n_vms, random_state=seed)
+        sampled_vms.reset_index(inplace=True)
+        self.vm_data = sampled_vms
         print(f"Sampled {n_vms} VMs from the dataset (with seed={seed})")
         return self
 
     def __repr__(self) -> str:
-        return f"Data[{len(self.vm_data)} VMs, {len(self.server_data)} server]"
+        return f"Data[{len(self.vm_data)} VMs, {self.server_pool.max_servers} server]"
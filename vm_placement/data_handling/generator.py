@@ -0,0 +1,39 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling.processing import resource_columns
+
+default_vm_filepath: str = 'data/vm_data.csv'
+
+
+def duplicate_rate(vm_data: pd.DataFrame) -> float:
+    """Share of the VMs identical to an earlier VM."""
+    return float(vm_data.duplicated().mean()) if len(vm_data) > 0 else 0.
+
+
+def generate_vm_data(n_vms: int, seed: Optional[int] = None, source: Optional[pd.DataFrame] = None,
+                     duplicates: Optional[float] = None, storage_jitter: float = 0.1) -> pd.DataFrame:
+    """Generates n_vms VMs mimicking the distributions of the source VMs (data/vm_data.csv by default).
+
+    Fresh VMs are source rows drawn at random, which keeps the mix of resources and the shares of the classes, with
+    a log-normal jitter of `storage_jitter` on their Storage, not rounded, so that they differ from each other. The
+    other VMs, a `duplicates` share (the duplicate rate of the source by default), are copies of fresh VMs drawn at
+    random. The VMs come in random order, with the columns and dtypes of the source.
+    """
+    source = pd.read_csv(default_vm_filepath, sep=';') if source is None else source
+    duplicates = duplicate_rate(source) if duplicates is None else duplicates
+    rng = np.random.default_rng(seed)
+    n_fresh = min(max(int(round(n_vms * (1 - duplicates))), 1), n_vms)
+
+    fresh_vms = source.iloc[rng.integers(len(source), size=n_fresh)].reset_index(drop=True)
+    if 'Storage' in fresh_vms.columns and storage_jitter > 0:
+        storage = fresh_vms['Storage'].to_numpy(dtype=float) * rng.lognormal(0, storage_jitter, size=n_fresh)
+        fresh_vms['Storage'] = storage.astype(source['Storage'].dtype)
+
+    # Copies of fresh VMs, shuffled with them
+    copies = rng.integers(n_fresh, size=n_vms - n_fresh)
+    positions = rng.permutation(np.concatenate([np.arange(n_fresh), copies]))
+    return fresh_vms.iloc[positions].reset_index(drop=True)
+
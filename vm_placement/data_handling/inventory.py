@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import shutil
+import warnings
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Compact dtypes of the known inventory columns: whole vCPUs and classes, fractional Memory and Storage
+vm_dtypes: Dict[str, type] = {
+    'vCPU': np.int32,
+    'Memory': np.float64,
+    'Storage': np.float64,
+    'Class': np.int8,
+}
+cache_version: int = 1
+
+
+def file_hash(filepath: str, block_size: int = 2 ** 20) -> str:
+    """SHA-256 of the content of a file, read by blocks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_vm_chunks(vm_filepath: str, chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Streams the VMs of a semicolon-separated CSV file in frames of at most `chunksize` rows, with the compact
+    dtypes of `vm_dtypes` (columns not listed there keep the dtypes inferred by pandas). A byte order mark before
+    the header is dropped."""
+    columns = pd.read_csv(vm_filepath, sep=';', encoding='utf-8-sig', nrows=0).columns
+    dtypes = {column: vm_dtypes[column] for column in columns if column in vm_dtypes}
+    yield from pd.read_csv(vm_filepath, sep=';', encoding='utf-8-sig', dtype=dtypes, chunksize=chunksize)
+
+
+def default_cache_dir(vm_filepath: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(vm_filepath)), '.cache')
+
+
+def load_vm_data(vm_filepath: str, cache_dir: Optional[str] = None, chunksize: int = 1_000_000) -> pd.DataFrame:
+    """Loads the VMs of a CSV file through a columnar binary cache.
+
+    The first load streams the file by chunks into one raw binary file per column, in `cache_dir` (a `.cache`
+    folder next to the CSV file by default) under the SHA-256 of the file, so that an edited file gets a new entry.
+    The following loads only hash the file and map the columns in memory: the frame wraps the mapped columns
+    without copying them, and pages are read from disk as they are used. The mapping is copy-on-write, so
+    modifying the frame never alters the cache. When the cache can't be written (e.g. in a read-only folder), the
+    parsed file is returned, with a warning.
+    """
+    cache_dir = default_cache_dir(vm_filepath) if cache_dir is None else cache_dir
+    entry = os.path.join(cache_dir, f"{file_hash(vm_filepath)}.v{cache_version}")
+    if not os.path.exists(os.path.join(entry, 'columns.json')):
+        try:
+            _write_cache(vm_filepath, entry, chunksize)
+        except OSError as error:
+            warnings.warn(f"Could not write the VM cache in {cache_dir} ({error}), loading {vm_filepath} uncached")
+            return pd.concat(iter_vm_chunks(vm_filepath, chunksize), ignore_index=True)
+    return _read_cache(entry)
+
+
+def _write_cache(vm_filepath: str, entry: str, chunksize: int):
+    # Written in a temporary folder first, so that an interrupted write never leaves a partial entry
+    temporary_entry = f"{entry}.tmp{os.getpid()}"
+    os.makedirs(temporary_entry, exist_ok=True)
+    try:
+        columns: Dict[str, str] = {}
+        n_rows = 0
+        for chunk in iter_vm_chunks(vm_filepath, chunksize):
+            for position, column in enumerate(chunk.columns):
+                values = chunk[column].to_numpy()
+                if values.dtype == object:
+                    raise TypeError(f"Column {column} of {vm_filepath} is not numeric and cannot be cached")
+                columns.setdefault(column, values.dtype.str)
+                with open(os.path.join(temporary_entry, f"{position}.bin"), 'ab') as file:
+                    file.write(values.astype(columns[column], copy=False).tobytes())
+            n_rows += len(chunk)
+        with open(os.path.join(temporary_entry, 'columns.json'), 'w') as file:
+            json.dump({'n_rows': n_rows, 'columns': columns}, file)
+        try:
+            os.replace(temporary_entry, entry)
+        except OSError:
+            # Another process wrote the same entry in the meantime
+            if not os.path.exists(os.path.join(entry, 'columns.json')):
+                raise
+    finally:
+        shutil.rmtree(temporary_entry, ignore_errors=True)
+
+
+def _read_cache(entry: str) -> pd.DataFrame:
+    with open(os.path.join(entry, 'columns.json')) as file:
+        metadata = json.load(file)
+    n_rows: int = metadata['n_rows']
+    arrays = {}
+    for position, (column, dtype) in enumerate(metadata['columns'].items()):
+        if n_rows == 0:
+            arrays[column] = np.empty(0, dtype=dtype)
+        else:
+            arrays[column] = np.memmap(os.path.join(entry, f"{position}.bin"), dtype=dtype, mode='c',
+                                       shape=(n_rows,))
+    return pd.DataFrame(arrays, copy=False)
@@ -1,9 +1,25 @@
+from typing import List
+
+import numpy as np
 import pandas as pd
 
 resource_columns = ['vCPU', 'Memory', 'Storage']
+# Optional column of the VMs: VMs with the same non-negative group can't share a server
+anti_affinity_column = 'AntiAffinityGroup'
+# Class of service of the VMs, and the pairs of classes that can't share a server
+class_column = 'Class'
+incompatible_classes = [(1, 3)]
 
 
 def duplicate_entry(data: pd.DataFrame, n_times: int) -> pd.DataFrame:
     return pd.concat([data] * n_times, ignore_index=True)
 
 
+def anti_affinity_group_positions(vm_data: pd.DataFrame) -> List[List[int]]:
+    """Positions of the VMs of each anti-affinity group, by increasing group."""
+    if anti_affinity_column not in vm_data.columns:
+        return []
+    groups = vm_data[anti_affinity_column].fillna(-1).to_numpy(dtype=np.int64)
+    in_group = groups >= 0
+    positions = pd.Series(np.flatnonzero(in_group))
+    return [group_positions.tolist() for _, group_positions in positions.groupby(groups[in_group])]
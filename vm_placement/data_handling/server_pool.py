@@ -0,0 +1,194 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from vm_placement.data_handling.processing import resource_columns
+
+
+class ServerPool:
+    """Pool of servers described by k server specifications, without materializing one row per server.
+
+    Server j has the specification j % k, the same as in `duplicate_entry(server_specs, n_copies)`, and the pool
+    holds `n_copies` copies of the specifications (an unlimited number if `n_copies` is None). A DataFrame listing
+    every server explicitly is the pool of its rows with `n_copies=1` (see `fleet`).
+    The first servers may already run workloads: row j of `initial_loads` is the load of server j, in the resource
+    columns (or in resource_columns order for an array). The loaded servers are in use from the start and only
+    have their capacity minus their load left.
+    """
+    def __init__(self, server_specs: pd.DataFrame, n_copies: Optional[int] = None,
+                 initial_loads: Optional[pd.DataFrame | np.ndarray] = None):
+        self.server_specs: pd.DataFrame = server_specs.reset_index(drop=True)
+        self.spec_capacities: np.ndarray = self.server_specs[resource_columns].to_numpy(dtype=float)
+        self.n_copies: Optional[int] = n_copies
+        self.max_servers: Optional[int] = None if n_copies is None else n_copies * len(self.server_specs)
+        if initial_loads is None:
+            initial_loads = np.zeros((0, len(resource_columns)))
+        elif isinstance(initial_loads, pd.DataFrame):
+            initial_loads = initial_loads[resource_columns]
+        self.initial_loads: np.ndarray = np.asarray(initial_loads, dtype=float).reshape(-1, len(resource_columns))
+        # Trailing servers without load are plain empty servers
+        loaded = np.flatnonzero((self.initial_loads != 0).any(axis=1))
+        self.initial_loads = self.initial_loads[:loaded[-1] + 1 if len(loaded) > 0 else 0]
+        if self.max_servers is not None and self.n_loaded > self.max_servers:
+            raise ValueError(f"{self.n_loaded} server loads given for a pool of {self.max_servers} servers")
+        if (self.initial_loads > self.capacities(0, self.n_loaded)).any():
+            raise ValueError("Server loads exceed the capacity of their server")
+
+    @classmethod
+    def fleet(cls, server_capacities: pd.DataFrame, initial_loads: Optional[pd.DataFrame] = None) -> ServerPool:
+        """Pool of the listed servers, one per row, possibly of different capacities and already loaded."""
+        return cls(server_capacities, n_copies=1, initial_loads=initial_loads)
+
+    @property
+    def n_loaded(self) -> int:
+        """Number of servers up to the last loaded one."""
+        return len(self.initial_loads)
+
+    @classmethod
+    def from_servers(cls, servers: pd.DataFrame | ServerPool) -> ServerPool:
+        """Returns the pool of the given servers, listed one per row, or the pool itself."""
+        if isinstance(servers, ServerPool):
+            return servers
+        return cls(servers, n_copies=1)
+
+    def capacities(self, start: int, stop: int) -> np.ndarray:
+        """Capacity array of the servers in [start, stop)."""
+        return self.spec_capacities[np.arange(start, stop) % len(self.spec_capacities)]
+
+    def loads(self, start: int, stop: int) -> np.ndarray:
+        """Initial load array of the servers in [start, stop)."""
+        loads = np.zeros((stop - start, len(resource_columns)))
+        if start < self.n_loaded:
+            loads[:min(stop, self.n_loaded) - start] = self.initial_loads[start:stop]
+        return loads
+
+    def find_first_fitting_server(self, demand: np.ndarray, start: int = 0) -> Optional[int]:
+        """Returns the first server, starting at `start`, that can host the demand with its initial load (when
+        not opened yet)."""
+        if start < self.n_loaded:
+            space_left = self.capacities(start, self.n_loaded) - self.initial_loads[start:]
+            fits = (space_left >= demand).all(axis=1)
+            if fits.any():
+                return start + int(fits.argmax())
+            start = self.n_loaded
+        n_specs = len(self.spec_capacities)
+        fitting_specs = np.flatnonzero((self.spec_capacities >= demand).all(axis=1))
+        if len(fitting_specs) == 0:
+            return None
+        # First server at or after `start` with each fitting specification
+        first_servers = start + (fitting_specs - start) % n_specs
+        first_server = int(first_servers.min())
+        if self.max_servers is not None and first_server >= self.max_servers:
+            return None
+        return first_server
+
+    def to_frame(self, n_servers: Optional[int] = None) -> pd.DataFrame:
+        """Materializes the first `n_servers` servers of the pool (all of them by default) as a DataFrame."""
+        if n_servers is None:
+            if self.max_servers is None:
+                raise ValueError("Cannot materialize an unlimited server pool")
+            n_servers = self.max_servers
+        return self.server_specs.iloc[np.arange(n_servers) % len(self.server_specs)].reset_index(drop=True)
+
+    def __repr__(self) -> str:
+        count = "unlimited" if self.max_servers is None else self.max_servers
+        loaded = f", {self.n_loaded} loaded" if self.n_loaded > 0 else ""
+        return f"ServerPool[{len(self.server_specs)} spec(s), {count} servers{loaded}]"
+
+
+class OpenServers:
+    """Capacities, fillings and space left of the first servers of a ServerPool, in arrays that grow as servers
+    get opened.
+
+    The servers are opened as a prefix of the pool: opening server j also opens all servers before it, possibly
+    leaving them empty. The loaded servers of the pool are opened from the start, filled with their initial load.
+    `capacities`, `fillings`, `space_left` and `in_use` (servers with a load or a demand) are views on the opened
+    servers, to be fetched again after opening servers since the underlying arrays may be reallocated.
+    """
+    def __init__(self, pool: ServerPool, initial_size: int = 64):
+        self.pool: ServerPool = pool
+        self.n_servers: int = 0
+        n_resources = pool.spec_capacities.shape[1]
+        initial_size = max(initial_size, pool.n_loaded)
+        self._capacities: np.ndarray = np.zeros((initial_size, n_resources))
+        self._fillings: np.ndarray = np.zeros((initial_size, n_resources))
+        self._space_left: np.ndarray = np.zeros((initial_size, n_resources))
+        self._in_use: np.ndarray = np.zeros(initial_size, dtype=bool)
+        if pool.n_loaded > 0:
+            self.open_until(pool.n_loaded - 1)
+
+    @property
+    def capacities(self) -> np.ndarray:
+        return self._capacities[:self.n_servers]
+
+    @property
+    def fillings(self) -> np.ndarray:
+        return self._fillings[:self.n_servers]
+
+    @property
+    def space_left(self) -> np.ndarray:
+        return self._space_left[:self.n_servers]
+
+    @property
+    def in_use(self) -> np.ndarray:
+        return self._in_use[:self.n_servers]
+
+    def open_until(self, server: int) -> None:
+        """Opens all the servers up to `server` included."""
+        if server < self.n_servers:
+            return
+        n_servers = server + 1
+        if n_servers > len(self._capacities):
+            size = max(2 * len(self._capacities), n_servers)
+            self._capacities, self._fillings, self._space_left, self._in_use = (
+                self._grow(array, size) for array in (self._capacities, self._fillings, self._space_left,
+                                                      self._in_use))
+        capacities = self.pool.capacities(self.n_servers, n_servers)
+        self._capacities[self.n_servers:n_servers] = capacities
+        if self.n_servers < self.pool.n_loaded:
+            loads = self.pool.loads(self.n_servers, n_servers)
+            self._fillings[self.n_servers:n_servers] = loads
+            self._space_left[self.n_servers:n_servers] = capacities - loads
+            self._in_use[self.n_servers:n_servers] = (loads != 0).any(axis=1)
+        else:
+            self._space_left[self.n_servers:n_servers] = capacities
+        self.n_servers = n_servers
+
+    def _grow(self, array: np.ndarray, size: int) -> np.ndarray:
+        grown = np.zeros((size,) + array.shape[1:], dtype=array.dtype)
+        grown[:self.n_servers] = array[:self.n_servers]
+        return grown
+
+    def add_demand(self, server: int, demand: np.ndarray) -> None:
+        self._fillings[server] += demand
+        self._space_left[server] = self._capacities[server] - self._fillings[server]
+        self._in_use[server] = (self._fillings[server] != 0).any()
+
+    def add_demand_batch(self, server: int, demand: np.ndarray, max_count: int) -> int:
+        """Adds the demand to the server as many times as it fits, up to `max_count`, and returns that number.
+        The filling is the same, rounding included, as with successive `add_demand` calls checking the space left."""
+        if max_count == 1:
+            if not (self._space_left[server] >= demand).all():
+                return 0
+            self.add_demand(server, demand)
+            return 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fit_bound = np.nanmin(np.where(demand > 0, self._space_left[server] / demand, np.inf))
+        n_steps = int(min(max_count, max(fit_bound, -1) + 1))
+        if n_steps <= 0:
+            return 0
+        # Successive fillings, with the sequential rounding of repeated additions
+        fillings = np.cumsum(np.vstack([self._fillings[server], np.broadcast_to(demand, (n_steps, len(demand)))]),
+                             axis=0)
+        fits = (self._capacities[server] - fillings[:-1] >= demand).all(axis=1)
+        count = n_steps if fits.all() else int(fits.argmin())
+        self._fillings[server] = fillings[count]
+        self._space_left[server] = self._capacities[server] - self._fillings[server]
+        self._in_use[server] = (self._fillings[server] != 0).any()
+        return count
+
+    def to_frame(self) -> pd.DataFrame:
+        """Capacities of the opened servers as a DataFrame."""
+        return self.pool.to_frame(self.n_servers)
@@ -0,0 +1,173 @@
+import math
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.aggregation import aggregate_vm_types
+from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+class ConfigurationLPBound:
+    """Gilmore-Gomory configuration LP lower bound on the number of servers, computed by column generation.
+
+    A configuration is a number of VMs of each type (VMs with the same resources) fitting together in one server.
+    The configuration LP covers every type with a fractional number of configurations:
+        min sum_p lambda[p]
+        sum_p a[t, p] * lambda[p] >= count[t]    for each type t
+    It starts from the configurations of the First-Fit servers and of single types. At each iteration the restricted
+    LP is solved with HiGHS and its duals price new configurations, by solving a bounded multi-dimensional knapsack:
+    greedily first, and exactly (a small MIP) when the greedy configuration does not improve the LP. Each exact
+    pricing gives the Farley bound lp_value / best_pricing_value, so `lower_bound` remains valid when the
+    generation stops early on `max_iterations` or `time_limit`.
+    """
+    def __init__(self, max_iterations: int = 1000, time_limit: Optional[float] = None, tolerance: float = 1e-6,
+                 verbose: int = 1):
+        self.max_iterations: int = max_iterations
+        self.time_limit: Optional[float] = time_limit
+        self.tolerance: float = tolerance
+        self.verbose: int = verbose
+        self.lower_bound: Optional[int] = None
+        self.lp_value: Optional[float] = None
+        self.n_iterations: int = 0
+        self.converged: bool = False
+        self.solve_time: Optional[float] = None
+
+    def solve(self, data: Data) -> int:
+        """Returns the lower bound on the number of servers needed by the VMs of the data."""
+        start = time.perf_counter()
+        requirements, counts, capacity, columns = self._format_data(data)
+        max_counts = self._max_counts(requirements, counts, capacity)
+        columns += list(np.diag(max_counts))
+
+        best_bound: float = 0.
+        self.converged = False
+        for self.n_iterations in range(1, self.max_iterations + 1):
+            self.lp_value, duals = self._solve_master(np.column_stack(columns), counts)
+            column = self._greedy_pricing(duals, requirements, max_counts, capacity)
+            if duals @ column <= 1 + self.tolerance:
+                column, pricing_bound = self._exact_pricing(duals, requirements, max_counts, capacity,
+                                                            self._time_left(start))
+                best_bound = max(best_bound, self.lp_value / max(pricing_bound, 1.))
+                if column is None or duals @ column <= 1 + self.tolerance:
+                    self.converged = pricing_bound <= 1 + self.tolerance
+                    break
+            # The integer bound cannot improve anymore
+            if math.ceil(best_bound - self.tolerance) >= math.ceil(self.lp_value - self.tolerance):
+                break
+            if self._time_left(start) == 0:
+                break
+            columns.append(column)
+
+        self.lower_bound = math.ceil(best_bound - self.tolerance)
+        self.solve_time = time.perf_counter() - start
+        self._print(f"Configuration LP: {self.lp_value:.3f} after {self.n_iterations} iterations "
+                    f"({len(columns)} configurations{', converged' if self.converged else ''}), "
+                    f"lower bound: {self.lower_bound} servers in {self.solve_time:.2f}s")
+        return self.lower_bound
+
+    def gap(self, solution: Solution) -> float:
+        """Relative gap between the number of servers of a solution and the lower bound."""
+        if self.lower_bound is None:
+            raise ValueError("The bound must be computed with solve() first")
+        return (solution.n_servers - self.lower_bound) / self.lower_bound
+
+    def _format_data(self, data: Data) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[np.ndarray]]:
+        server_specs = data.server_pool.server_specs
+        if len(server_specs) != 1:
+            raise NotImplementedError("Case with multiple server capacities not yet implemented")
+        capacity: np.ndarray = server_specs[resource_columns].to_numpy(dtype=float)[0]
+        vm_types, vm_type = aggregate_vm_types(data.vm_data, resource_columns)
+        requirements: np.ndarray = vm_types[resource_columns].to_numpy(dtype=float)
+        oversize = ~(requirements <= capacity).all(axis=1)
+        if oversize.any():
+            raise ValueError(f"{vm_types['count'][oversize].sum()} VMs fit in no server")
+
+        # Configurations of the servers filled by First-Fit, in as many copies of the server specification as needed
+        solution = FirstFitAlgo().solve(data.vm_data, ServerPool(server_specs))
+        placed = solution.assignment >= 0
+        configurations = np.zeros((solution.assignment.max(initial=-1) + 1, len(vm_types)), dtype=np.int64)
+        np.add.at(configurations, (solution.assignment[placed], vm_type[placed]), 1)
+        columns = list(np.unique(configurations[configurations.any(axis=1)], axis=0))
+        return requirements, vm_types['count'].to_numpy(), capacity, columns
+
+    def _max_counts(self, requirements: np.ndarray, counts: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+        """Number of VMs of each type fitting alone in a server, up to the number of VMs of the type."""
+        with np.errstate(divide='ignore'):
+            fit = np.where(requirements > 0, capacity / requirements, np.inf).min(axis=1)
+        return np.minimum(counts, np.floor(fit + self.tolerance)).astype(np.int64)
+
+    def _solve_master(self, configurations: np.ndarray, counts: np.ndarray) -> Tuple[float, np.ndarray]:
+        result = linprog(np.ones(configurations.shape[1]), A_ub=-configurations, b_ub=-counts, bounds=(0, None),
+                         method='highs')
+        if result.status != 0:
+            raise RuntimeError(f"Restricted master LP failed: {result.message}")
+        return result.fun, np.maximum(-result.ineqlin.marginals, 0.)
+
+    def _greedy_pricing(self, duals: np.ndarray, requirements: np.ndarray, max_counts: np.ndarray,
+                        capacity: np.ndarray) -> np.ndarray:
+        """Fills a server with the types of highest dual per normalized size, as many of each as fit."""
+        column = np.zeros(len(duals), dtype=np.int64)
+        space_left = capacity.copy()
+        sizes = (requirements / capacity).sum(axis=1)
+        for t in np.argsort(-duals / np.maximum(sizes, self.tolerance), kind='stable'):
+            if duals[t] <= self.tolerance:
+                break
+            with np.errstate(divide='ignore'):
+                fit = np.where(requirements[t] > 0, space_left / requirements[t], np.inf).min()
+            column[t] = min(max_counts[t], math.floor(fit + self.tolerance))
+            space_left -= column[t] * requirements[t]
+        return column
+
+    def _exact_pricing(self, duals: np.ndarray, requirements: np.ndarray, max_counts: np.ndarray,
+                       capacity: np.ndarray, time_limit: Optional[float]) -> Tuple[Optional[np.ndarray], float]:
+        """Solves max duals @ a subject to requirements.T @ a <= capacity and 0 <= a <= max_counts, a integer.
+        Returns the best configuration found and an upper bound on the optimal value."""
+        priced = np.flatnonzero(duals > self.tolerance)
+        if len(priced) == 0:
+            return None, 0.
+        options = {} if time_limit is None else {'time_limit': time_limit}
+        result = milp(-duals[priced], constraints=LinearConstraint(requirements[priced].T, -np.inf, capacity),
+                      integrality=np.ones(len(priced)), bounds=Bounds(0, max_counts[priced]), options=options)
+        pricing_bound = -getattr(result, 'mip_dual_bound', -np.inf) if result.status != 0 else -result.fun
+        if result.x is None:
+            return None, pricing_bound
+        column = np.zeros(len(duals), dtype=np.int64)
+        column[priced] = np.rint(result.x).astype(np.int64)
+        return column, max(pricing_bound, duals @ column)
+
+    def _time_left(self, start: float) -> Optional[float]:
+        if self.time_limit is None:
+            return None
+        return max(self.time_limit - (time.perf_counter() - start), 0)
+
+    def _print(self, message: str):
+        if self.verbose > 0:
+            print(message)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    from vm_placement.algorithms.approximation.best_fit import BestFitAlgo
+
+    # Specify server capacity
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data('data/vm_data.csv', server_capacity)
+    # Remove oversize VMs
+    data.filter_vms_by_resource('Storage', 2048)
+
+    bound = ConfigurationLPBound()
+    bound.solve(data)
+    for solution in [FirstFitAlgo().solve(data.vm_data, data.server_pool),
+                     BestFitAlgo(criterion='Storage').solve(data.vm_data, data.server_pool)]:
+        print(f"{solution}: gap {bound.gap(solution) * 100:.1f}%")
@@ -0,0 +1,168 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+
+from vm_placement.algorithms.approximation.service_classes import service_classes
+from vm_placement.algorithms.local_search import LocalSearchImprover
+from vm_placement.algorithms.solution import OVERSIZE, Solution
+from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.lp_models.lower_bounds import CombinatorialLowerBound
+from vm_placement.lp_models.nominal_model import NominalModel
+
+partitions = ('class', 'kmeans', 'class_kmeans')
+
+
+def _stride_split(positions: np.ndarray, sizes: np.ndarray, chunk_size: int) -> List[np.ndarray]:
+    """Splits the VMs into chunks of at most `chunk_size` VMs dealt by decreasing size, one to each chunk in turn,
+    so that every chunk gets the same mix of large and small VMs."""
+    n_chunks = math.ceil(len(positions) / chunk_size)
+    by_size = positions[np.argsort(-sizes[positions], kind='stable')]
+    return [np.sort(by_size[chunk::n_chunks]) for chunk in range(n_chunks)]
+
+
+def partition_vms(vms: pd.DataFrame, capacity: np.ndarray, partition: str = 'class', chunk_size: int = 200,
+                  seed: int = 0) -> List[np.ndarray]:
+    """Positions of the VMs of each chunk, with at most `chunk_size` VMs per chunk.
+
+    - 'class': one group per class of service
+    - 'kmeans': clusters of similar resource profiles, the demands relative to `capacity`, by k-means with as many
+      clusters as chunks of `chunk_size` VMs
+    - 'class_kmeans': the clusters of the VMs of each class
+    Groups larger than `chunk_size` (k-means clusters are not balanced) are then dealt into chunks by `_stride_split`.
+    """
+    if partition not in partitions:
+        raise ValueError(f"Unknown partition: {partition}, available: {list(partitions)}")
+    groups = [np.arange(len(vms))]
+    if partition in ('class', 'class_kmeans'):
+        classes = service_classes(vms)
+        groups = [np.flatnonzero(classes == vm_class) for vm_class in np.unique(classes)]
+    profiles = vms[resource_columns].to_numpy(dtype=float) / capacity
+    sizes = profiles.mean(axis=1)
+    chunks: List[np.ndarray] = []
+    for positions in groups:
+        clusters = [positions]
+        if partition != 'class' and len(positions) > chunk_size:
+            n_clusters = math.ceil(len(positions) / chunk_size)
+            labels = KMeans(n_clusters=n_clusters, n_init='auto', random_state=seed).fit_predict(profiles[positions])
+            clusters = [positions[labels == label] for label in range(n_clusters)]
+        for cluster in clusters:
+            if len(cluster) > 0:
+                chunks.extend(_stride_split(cluster, sizes, chunk_size))
+    return chunks
+
+
+def _solve_chunk(vms: pd.DataFrame, server_specs: pd.DataFrame, solver: str, time_limit: float,
+                 mip_gap: Optional[float], segregate_classes: bool):
+    """Solves the nominal model of a chunk in a worker. Returns the assignment of its VMs to servers of its own,
+    the number of servers, the bound, the gap, the termination condition of the solver and the time in seconds."""
+    start = time.perf_counter()
+    model = NominalModel(solver=solver, verbose=0, symmetry_breaking=True, aggregated_linking=True,
+                         segregate_classes=segregate_classes)
+    result = model.solve_anytime(Data.from_frame(vms, server_specs), time_limit=time_limit, mip_gap=mip_gap)
+    return (result.solution.assignment, result.solution.n_servers, result.bound, result.gap, result.termination,
+            time.perf_counter() - start)
+
+
+class DecompositionSolver:
+    """Near-exact placement of thousands of VMs, by solving the nominal model on chunks of VMs in parallel.
+
+    The nominal model has n.m variables, out of reach of the solvers for the whole dataset, so the VMs are
+    partitioned into chunks of at most `chunk_size` VMs (see `partition_vms`). Each chunk is solved by
+    `NominalModel.solve_anytime` in a worker process, within `time_limit` seconds (or down to `mip_gap`), on
+    servers of its own. The placements of the chunks are stitched one after the other, and a repair pass, a
+    `LocalSearchImprover` of `repair_time_limit` seconds, consolidates the least filled servers, typically the last
+    server of each chunk, into the other servers.
+    The VMs of an anti-affinity group stay apart in their chunk and in the repair; with `segregate_classes`, so do
+    the classes of `incompatible_classes`. Only pools of a single server specification without initial loads are
+    supported. The VMs fitting in no server are left OVERSIZE.
+    """
+    def __init__(self, partition: str = 'class', chunk_size: int = 200, solver: str = 'appsi_highs',
+                 time_limit: float = 30., mip_gap: Optional[float] = None, repair_time_limit: float = 10.,
+                 segregate_classes: bool = False, max_workers: Optional[int] = None, seed: int = 0, verbose: int = 1):
+        if partition not in partitions:
+            raise ValueError(f"Unknown partition: {partition}, available: {list(partitions)}")
+        self.partition: str = partition
+        self.chunk_size: int = chunk_size
+        self.solver: str = solver
+        self.time_limit: float = time_limit
+        self.mip_gap: Optional[float] = mip_gap
+        self.repair_time_limit: float = repair_time_limit
+        self.segregate_classes: bool = segregate_classes
+        self.max_workers: Optional[int] = max_workers
+        self.seed: int = seed
+        self.verbose: int = verbose
+
+    def solve(self, data: Data) -> Tuple[Solution, pd.DataFrame]:
+        """Returns the repaired solution and a report of the chunks, one row per chunk, with its number of VMs and
+        servers, the bound and gap of its solve, the termination condition of the solver and its time in seconds."""
+        pool = data.server_pool
+        if len(pool.spec_capacities) != 1 or pool.n_loaded > 0:
+            raise ValueError("The decomposition needs a pool of a single server specification without loads")
+        vms = data.vm_data
+        capacity = pool.spec_capacities[0]
+        fits = (vms[resource_columns].to_numpy(dtype=float) <= capacity).all(axis=1)
+        chunks = [np.flatnonzero(fits)[positions]
+                  for positions in partition_vms(vms.loc[fits], capacity, self.partition, self.chunk_size, self.seed)]
+        self._print(f"Solving {len(chunks)} chunks of at most {self.chunk_size} VMs ({self.partition}) "
+                    f"for at most {self.time_limit}s each...")
+
+        report = pd.DataFrame({'n_vms': [len(positions) for positions in chunks], 'n_servers': 0, 'bound': np.nan,
+                               'gap': np.nan, 'termination': '', 'seconds': np.nan})
+        chunk_assignments: List[Optional[np.ndarray]] = [None] * len(chunks)
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            futures = {executor.submit(_solve_chunk, vms.iloc[positions].reset_index(drop=True), pool.server_specs,
+                                       self.solver, self.time_limit, self.mip_gap, self.segregate_classes): chunk
+                       for chunk, positions in enumerate(chunks)}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                chunk_assignment, n_servers, bound, gap, termination, seconds = future.result()
+                chunk_assignments[chunk] = chunk_assignment
+                report.loc[chunk, ['n_servers', 'bound', 'gap', 'termination', 'seconds']] = \
+                    [n_servers, bound, gap, termination, seconds]
+                self._print(f"Chunk {chunk}: {len(chunks[chunk])} VMs in {n_servers} servers "
+                            f"(gap: {gap:.2%}, {seconds:.1f}s)")
+
+        # Stitching: the servers of each chunk come after the ones of the previous chunks
+        assignment = np.full(len(vms), OVERSIZE, dtype=np.int64)
+        n_opened_servers = 0
+        for positions, chunk_assignment in zip(chunks, chunk_assignments):
+            _, servers = np.unique(chunk_assignment, return_inverse=True)
+            assignment[positions] = n_opened_servers + servers
+            n_opened_servers += int(servers.max(initial=-1)) + 1
+        if pool.max_servers is not None and n_opened_servers > pool.max_servers:
+            raise ValueError(f"The chunks use {n_opened_servers} servers, the pool has {pool.max_servers}")
+        solution = Solution.from_assignment(vms, pool, assignment, n_opened_servers,
+                                            algo_name=f"Decomposition[{self.partition}]")
+        self._print(f"Stitched solution: {n_opened_servers} servers")
+        if self.repair_time_limit > 0:
+            lower_bound = CombinatorialLowerBound(verbose=0).solve(data)
+            solution = LocalSearchImprover(self.repair_time_limit, lower_bound=lower_bound,
+                                           segregate_classes=self.segregate_classes).improve(solution)
+            self._print(f"Repaired solution: {solution.n_servers} servers (lower bound: {lower_bound})")
+        return solution, report
+
+    def _print(self, message: str):
+        if self.verbose > 0:
+            print(message)
+
+
+if __name__ == '__main__':
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data('data/vm_data.csv', server_capacity)
+    # Remove oversize VMs
+    data.filter_vms_by_resource('Storage', 2048)
+
+    # Launch the chunk solves on all the cores, then the repair
+    solution, report = DecompositionSolver(chunk_size=200, time_limit=30).solve(data)
+    print(report.to_string())
+    print(solution)
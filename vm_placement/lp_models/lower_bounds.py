@@ -0,0 +1,127 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+from vm_placement.algorithms.solution import Solution
+from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import resource_columns
+
+# Slack on the comparisons of normalized sizes, so that rounding errors never overestimate a bound
+tolerance: float = 1e-9
+
+
+def continuous_bound(sizes: np.ndarray) -> int:
+    """Per-resource continuous bound: max over the resources r of ceil(sum_i sizes[i, r]).
+    `sizes` holds the requirements of the VMs normalized by the server capacity, one column per resource."""
+    if len(sizes) == 0:
+        return 0
+    return int(np.ceil(sizes.sum(axis=0) - tolerance).max())
+
+
+def large_item_bound(sizes: np.ndarray) -> int:
+    """Counting bound: VMs taking more than half of a server in the same resource cannot share a server."""
+    return int((sizes > 0.5 + tolerance).sum(axis=0).max(initial=0))
+
+
+def martello_toth_bound(sizes: np.ndarray, max_thresholds: int = 4096) -> int:
+    """Martello-Toth L2 bound of the one-dimensional bin packing of `sizes` (normalized by the capacity).
+
+    For a threshold K in [0, 1/2], the VMs larger than 1 - K (J1) and between 1/2 and 1 - K (J2) all need their own
+    server, and the VMs between K and 1/2 (J3) only fit in the space left by J2 or in additional servers:
+        L2(K) = |J1| + |J2| + max(0, ceil(sum(J3) - (|J2| - sum(J2))))
+    The bound is the maximum over the thresholds, which only needs to be evaluated at the sizes at most 1/2. They are
+    evaluated at once with prefix sums over the sorted sizes, at most `max_thresholds` of them evenly picked among
+    the distinct sizes: every threshold gives a valid bound, so skipping some only risks a weaker one."""
+    sizes = np.sort(sizes)
+    prefix_sums = np.concatenate([[0.], np.cumsum(sizes)])
+    half_end = np.searchsorted(sizes, 0.5 + tolerance, side='right')
+    thresholds = np.concatenate([[0.], np.unique(sizes[:half_end])])
+    if len(thresholds) > max_thresholds:
+        thresholds = thresholds[np.linspace(0, len(thresholds) - 1, max_thresholds).astype(int)]
+    # Positions of the first VM of J3 (>= K) and of J1 (> 1 - K); J2 starts at half_end
+    j3_start = np.searchsorted(sizes, thresholds - tolerance, side='left')
+    j1_start = np.maximum(np.searchsorted(sizes, 1 - thresholds + tolerance, side='right'), half_end)
+    n_j1 = len(sizes) - j1_start
+    n_j2 = j1_start - half_end
+    sum_j2 = prefix_sums[j1_start] - prefix_sums[half_end]
+    sum_j3 = prefix_sums[half_end] - prefix_sums[j3_start]
+    extra_servers = np.maximum(np.ceil(sum_j3 - (n_j2 - sum_j2) - tolerance), 0)
+    return int((n_j1 + n_j2 + extra_servers).max())
+
+
+def multi_resource_martello_toth_bound(sizes: np.ndarray) -> int:
+    """L2 bound generalized to several resources through one-dimensional surrogate instances.
+
+    For weights w >= 0 summing to 1, the VMs of sizes sizes @ w fit in servers of capacity 1 whenever the original
+    VMs fit, so the L2 bound of the surrogate instance bounds the original one. The bound is the best over each
+    resource alone and over their average."""
+    if len(sizes) == 0:
+        return 0
+    surrogates = [sizes[:, r] for r in range(sizes.shape[1])] + [sizes.mean(axis=1)]
+    return max(martello_toth_bound(surrogate_sizes) for surrogate_sizes in surrogates)
+
+
+class CombinatorialLowerBound:
+    """Solver-free lower bounds on the number of servers, computed with NumPy only.
+
+    The requirements are normalized by the largest capacity of the pool in each resource, which keeps the bounds
+    valid for pools of several server specifications. VMs fitting in no server are left out, as they are from the
+    `n_servers` of the solutions. After `solve`, the value of each bound is available in `continuous`,
+    `large_items` and `martello_toth`, and `lower_bound` is the best of them.
+    """
+    def __init__(self, verbose: int = 1):
+        self.verbose: int = verbose
+        self.continuous: Optional[int] = None
+        self.large_items: Optional[int] = None
+        self.martello_toth: Optional[int] = None
+        self.lower_bound: Optional[int] = None
+
+    def solve(self, data: Data) -> int:
+        """Returns the lower bound on the number of servers needed by the VMs of the data."""
+        sizes = self._normalized_sizes(data)
+        self.continuous = continuous_bound(sizes)
+        self.large_items = large_item_bound(sizes)
+        self.martello_toth = multi_resource_martello_toth_bound(sizes)
+        self.lower_bound = max(self.continuous, self.large_items, self.martello_toth)
+        self._print(f"Lower bound: {self.lower_bound} servers (continuous: {self.continuous}, "
+                    f"large VMs: {self.large_items}, Martello-Toth: {self.martello_toth})")
+        return self.lower_bound
+
+    def gap(self, solution: Solution) -> float:
+        """Relative gap between the number of servers of a solution and the lower bound."""
+        if self.lower_bound is None:
+            raise ValueError("The bound must be computed with solve() first")
+        return (solution.n_servers - self.lower_bound) / max(self.lower_bound, 1)
+
+    def _normalized_sizes(self, data: Data) -> np.ndarray:
+        requirements: np.ndarray = data.vm_data[resource_columns].to_numpy(dtype=float)
+        spec_capacities: np.ndarray = data.server_pool.spec_capacities
+        fits = np.zeros(len(requirements), dtype=bool)
+        for capacity in spec_capacities:
+            fits |= (requirements <= capacity).all(axis=1)
+        # Column-major, as the bounds work resource by resource
+        return np.asfortranarray(requirements[fits] / spec_capacities.max(axis=0))
+
+    def _print(self, message: str):
+        if self.verbose > 0:
+            print(message)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+
+    # Specify server capacity
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data('data/vm_data.csv', server_capacity)
+
+    bound = CombinatorialLowerBound()
+    bound.solve(data)
+    solution = FirstFitAlgo().solve(data.vm_data, data.server_pool)
+    print(f"{solution}: gap {bound.gap(solution) * 100:.1f}%")
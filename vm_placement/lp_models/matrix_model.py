@@ -0,0 +1,119 @@
+import time
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, OptimizeResult, milp
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+class MatrixNominalModel:
+    """Same model as NominalModel, assembled directly as sparse matrices and solved with HiGHS through scipy.
+
+    Variables are x[i, j] (VM i placed in server j, at column i * m_servers + j) followed by y[j] (server j used).
+    As in NominalModel, the number of servers m is the one of a First-Fit solution. Only pools of a single server
+    specification without initial loads are supported.
+    The constraint matrix is built with vectorized COO arrays instead of Pyomo rules, so building the model
+    costs a fraction of solving it. As in NominalModel, `linear_relaxation` relaxes x into [0, 1] while y stays
+    integer (relaxing y too makes the bound collapse to 1). Under a `time_limit`, the `mip_dual_bound` of the
+    result is a valid lower bound even if the solve did not finish.
+    """
+    def __init__(self, linear_relaxation: bool = False, time_limit: Optional[float] = None, verbose: int = 1):
+        self.linear_relaxation: bool = linear_relaxation
+        self.time_limit: Optional[float] = time_limit
+        self.verbose: int = verbose
+        self.build_time: Optional[float] = None
+        self.solve_time: Optional[float] = None
+
+    def solve(self, data: Data) -> OptimizeResult:
+        start = time.perf_counter()
+        m_servers = self._count_servers(data)
+        costs, constraint, integrality, bounds = self._build(data, m_servers)
+        self.build_time = time.perf_counter() - start
+        self._print(f"Built model with {len(costs)} variables and {constraint.A.shape[0]} constraints "
+                    f"for {m_servers} servers in {self.build_time:.2f}s")
+
+        options = {'disp': self.verbose >= 2}
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+        start = time.perf_counter()
+        result = milp(costs, constraints=constraint, integrality=integrality, bounds=bounds, options=options)
+        self.solve_time = time.perf_counter() - start
+        self._print(f"Solved in {self.solve_time:.2f}s: {result.message}")
+        self._print(f"Best solution found: {result.fun} (bound: {getattr(result, 'mip_dual_bound', None)})")
+        return result
+
+    def _count_servers(self, data: Data) -> int:
+        """Number of servers of a First-Fit solution, in as many copies of the server specification as needed."""
+        server_specs = data.server_pool.server_specs
+        if len(server_specs) != 1:
+            raise NotImplementedError("Case with multiple server capacities not yet implemented")
+        if data.server_pool.n_loaded > 0:
+            raise ValueError("Servers with initial loads are not supported, see NominalModel")
+        solution = FirstFitAlgo().solve(data.vm_data, ServerPool(server_specs))
+        if len(solution.oversize_vms) > 0:
+            raise ValueError(f"{len(solution.oversize_vms)} VMs fit in no server")
+        return solution.n_servers
+
+    def _build(self, data: Data, m_servers: int):
+        server_specs = data.server_pool.server_specs
+        requirements: np.ndarray = data.vm_data[resource_columns].to_numpy(dtype=float)
+        capacity: np.ndarray = server_specs[resource_columns].to_numpy(dtype=float)[0]
+        n_vms, n_resources = requirements.shape
+        n_x = n_vms * m_servers
+        x_columns = np.arange(n_x)
+        x_servers = np.tile(np.arange(m_servers), n_vms)
+
+        # Each VM must be located in exactly ONE server
+        demand = sp.coo_matrix((np.ones(n_x), (np.repeat(np.arange(n_vms), m_servers), x_columns)),
+                               shape=(n_vms, n_x + m_servers))
+
+        # The sum of the requirements of all VMs deployed in a server must not exceed its capacity, for each resource
+        capacity_rows = (np.arange(n_resources)[:, None] * m_servers + x_servers).ravel()
+        capacity_values = np.repeat(requirements.T, m_servers, axis=1).ravel()
+        capacity_matrix = sp.coo_matrix((capacity_values, (capacity_rows, np.tile(x_columns, n_resources))),
+                                        shape=(n_resources * m_servers, n_x + m_servers))
+
+        # A server is considered used when at least one VM is deployed on it: x[i, j] - y[j] <= 0
+        server_count = sp.coo_matrix((np.concatenate([np.ones(n_x), -np.ones(n_x)]),
+                                      (np.tile(x_columns, 2), np.concatenate([x_columns, n_x + x_servers]))),
+                                     shape=(n_x, n_x + m_servers))
+
+        constraint = LinearConstraint(
+            sp.vstack([demand, capacity_matrix, server_count], format='csr'),
+            lb=np.concatenate([np.ones(n_vms), np.full(n_resources * m_servers + n_x, -np.inf)]),
+            ub=np.concatenate([np.ones(n_vms), np.repeat(capacity, m_servers), np.zeros(n_x)])
+        )
+        costs = np.concatenate([np.zeros(n_x), np.ones(m_servers)])
+        integrality = np.concatenate([np.full(n_x, 0 if self.linear_relaxation else 1), np.ones(m_servers)])
+        bounds = Bounds(np.zeros(n_x + m_servers), np.concatenate([np.ones(n_x), np.full(m_servers, np.inf)]))
+        return costs, constraint, integrality, bounds
+
+    def _print(self, message: str):
+        if self.verbose > 0:
+            print(message)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    # Specify server capacity
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data('data/vm_data.csv', server_capacity, 1)
+    # Remove oversize VMs
+    data.filter_vms_by_resource('Storage', 2048)
+    # Use a subset of the VMs
+    data.subset_vms(200, seed=42)
+
+    # Launch MIP solver with a time limit
+    model = MatrixNominalModel(linear_relaxation=True, time_limit=60)
+    result = model.solve(data)
+    print(f"Build: {model.build_time:.2f}s, solve: {model.solve_time:.2f}s, bound: {result.mip_dual_bound}")
@@ -1,16 +1,84 @@
+import math
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
 import pyomo.environ as pyo
 from pyomo.environ import AbstractModel
 
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.algorithms.solution import Solution
 from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import anti_affinity_group_positions, class_column, \
+    incompatible_classes
+from vm_placement.data_handling.server_pool import ServerPool
 
 import numpy as np
 
 
+class MipProgress(NamedTuple):
+    """State of an anytime solve: seconds since the start of the solve, objective of the incumbent (inf until the
+    solver has one), best lower bound on the objective and relative gap between the two."""
+    seconds: float
+    incumbent: float
+    bound: float
+    gap: float
+
+
+class AnytimeResult(NamedTuple):
+    """Outcome of `NominalModel.solve_anytime`: the incumbent as a Solution, its objective, the best bound, the
+    relative gap, the termination condition reported by the solver and the progress records of the solve."""
+    solution: Solution
+    incumbent: float
+    bound: float
+    gap: float
+    termination: str
+    progress: List[MipProgress]
+
+
+def relative_gap(incumbent: float, bound: float) -> float:
+    """Gap between the objective of an incumbent and a lower bound, relative to the incumbent."""
+    if math.isinf(incumbent) or math.isinf(bound):
+        return math.inf
+    return max(incumbent - bound, 0.) / abs(incumbent) if incumbent != 0 else 0.
+
+
 class NominalModel:
-    def __init__(self, linear_relaxation: bool = False, solver: str = 'glpk', verbose: int = 1):
+    """Nominal model of the VM placement, solved with a Pyomo solver.
+
+    The number of servers m is the one of a heuristic solution (`initial_solution` of `solve`, First-Fit by default),
+    which is then handed to the solver as a warm start when the solver supports it. The servers are the first m of
+    the pool, possibly of different capacities (a pool of a single specification without loads has no limit on
+    its number of servers); the servers already running workloads (`ServerPool.initial_loads`) are used (y[j] fixed
+    to 1) and only offer their capacity minus their load.
+    Options tighten the model:
+    - `symmetry_breaking` adds y[j] >= y[j + 1] for the interchangeable servers (same capacity, no load), so that
+      the used servers come first;
+    - `aggregated_linking` puts y[j] on the right-hand side of the capacity constraints
+      (sum_i requirement[i] * x[i, j] <= capacity[j] * y[j]) instead of the n.m constraints x[i, j] <= y[j].
+    The VMs of an anti-affinity group (`Data.set_anti_affinity_groups`) use different servers:
+    sum_{i in group} x[i, j] <= 1 for each group and server.
+    With `segregate_classes`, the VMs of `incompatible_classes` (a, b) don't share servers: u[a, b, j] says which
+    of the two classes server j may host, with x[i, j] <= u[a, b, j] for the VMs of class a and
+    x[i, j] <= 1 - u[a, b, j] for the VMs of class b (summed over the VMs of each class with `aggregated_linking`).
+    `solve_anytime` stops the solver at a wall-clock or gap limit and returns the incumbent as a Solution, with the
+    bound and the gap. With HiGHS ('appsi_highs'), the incumbents and bounds are streamed while the solver runs.
+    """
+    # Names of the time limit and relative gap options of the solvers, for `solve_anytime`
+    limit_options = {
+        'glpk': ('tmlim', 'mipgap'),
+        'cbc': ('seconds', 'ratioGap'),
+        'cplex': ('timelimit', 'mipgap'),
+        'gurobi': ('TimeLimit', 'MIPGap'),
+    }
+
+    def __init__(self, linear_relaxation: bool = False, solver: str = 'glpk', verbose: int = 1,
+                 symmetry_breaking: bool = False, aggregated_linking: bool = False, segregate_classes: bool = False):
         self.linear_relaxation: bool = linear_relaxation
         self.solver: str = solver
         self.verbose: int = verbose
+        self.symmetry_breaking: bool = symmetry_breaking
+        self.aggregated_linking: bool = aggregated_linking
+        self.segregate_classes: bool = segregate_classes
         self.model = AbstractModel()
         self.model = self._add_variables(self.model)
         self.model = self._add_constraints(self.model)
@@ -30,20 +98,36 @@ class NominalModel:
         model.cpu_capacity = pyo.Param(model.J_server, domain=pyo.NonNegativeReals)
         model.memory_capacity = pyo.Param(model.J_server, domain=pyo.NonNegativeReals)
         model.storage_capacity = pyo.Param(model.J_server, domain=pyo.NonNegativeReals)
+        # Whether server j and server j + 1 are interchangeable, for the symmetry breaking
+        model.interchangeable = pyo.Param(model.J_server, domain=pyo.Boolean, default=True)
 
         # VM resource requirements
         model.cpu_requirement = pyo.Param(model.I_vm, domain=pyo.NonNegativeReals)
         model.memory_requirement = pyo.Param(model.I_vm, domain=pyo.NonNegativeReals)
         model.storage_requirement = pyo.Param(model.I_vm, domain=pyo.NonNegativeReals)
 
+        # Anti-affinity groups, as the VMs of each group
+        model.G_group = pyo.Set(initialize=[])
+        model.group_vms = pyo.Set(model.G_group, within=model.I_vm)
+
+        # Classes of service, as the VMs of each class, and the pairs of classes that can't share a server
+        model.K_class = pyo.Set(initialize=[])
+        model.class_vms = pyo.Set(model.K_class, within=model.I_vm)
+        model.P_pair = pyo.Set(within=model.K_class * model.K_class, initialize=[])
+
         # Decision variables
         x_domain = pyo.PercentFraction if self.linear_relaxation else pyo.Binary
         model.x = pyo.Var(model.I_vm, model.J_server, domain=x_domain)
-        model.y = pyo.Var(model.J_server, domain=pyo.NonNegativeIntegers)
+        model.y = pyo.Var(model.J_server, domain=pyo.Binary)
+        model.u = pyo.Var(model.P_pair, model.J_server, domain=x_domain)
 
         return model
 
     def _add_constraints(self, model) -> AbstractModel:
+        def server_usage(model: AbstractModel, j_server: int):
+            """With aggregated linking, the capacity of a server is only available when the server is used."""
+            return model.y[j_server] if self.aggregated_linking else 1
+
         def constraint_rule_vm_demand(model: AbstractModel, i_vm: int):
             """Each VM must be located in exactly ONE server"""
             return sum(model.x[i_vm, j] for j in model.J_server) == 1
@@ -53,26 +137,54 @@ class NominalModel:
             return sum(
                 model.cpu_requirement[i] * model.x[i, j_server]
                 for i in model.I_vm
-            ) <= model.cpu_capacity[j_server]
+            ) <= model.cpu_capacity[j_server] * server_usage(model, j_server)
 
         def constraint_rule_memory_capacity(model: AbstractModel, j_server: int):
             """The sum of the Memory requirements of all VMs deployed in a server must not exceed its capacity."""
             return sum(
                 model.memory_requirement[i] * model.x[i, j_server]
                 for i in model.I_vm
-            ) <= model.memory_capacity[j_server]
+            ) <= model.memory_capacity[j_server] * server_usage(model, j_server)
 
         def constraint_rule_storage_capacity(model: AbstractModel, j_server: int):
             """The sum of the Storage requirements of all VMs deployed in a server must not exceed its capacity."""
             return sum(
                 model.storage_requirement[i] * model.x[i, j_server]
                 for i in model.I_vm
-            ) <= model.storage_capacity[j_server]
+            ) <= model.storage_capacity[j_server] * server_usage(model, j_server)
 
         def constraint_rule_server_count(model: AbstractModel, i_vm, j_server):
             """A server is considered used when at least one VM is deployed on it."""
             return model.x[i_vm, j_server] <= model.y[j_server]
 
+        def constraint_rule_anti_affinity(model: AbstractModel, g_group: int, j_server: int):
+            """A server hosts at most one VM of each anti-affinity group."""
+            return sum(model.x[i, j_server] for i in model.group_vms[g_group]) <= server_usage(model, j_server)
+
+        def constraint_rule_vm_class(model: AbstractModel, a_class: int, b_class: int, i_vm: int, j_server: int):
+            """A server hosts VMs of only one class of each incompatible pair, the one chosen by u."""
+            if i_vm in model.class_vms[a_class]:
+                return model.x[i_vm, j_server] <= model.u[a_class, b_class, j_server]
+            if i_vm in model.class_vms[b_class]:
+                return model.x[i_vm, j_server] <= 1 - model.u[a_class, b_class, j_server]
+            return pyo.Constraint.Skip
+
+        def constraint_rule_first_class(model: AbstractModel, a_class: int, b_class: int, j_server: int):
+            """Aggregated version for the first class of the pair: server j hosts its VMs only if u = 1."""
+            vms = model.class_vms[a_class]
+            return sum(model.x[i, j_server] for i in vms) <= len(vms) * model.u[a_class, b_class, j_server]
+
+        def constraint_rule_second_class(model: AbstractModel, a_class: int, b_class: int, j_server: int):
+            """Aggregated version for the second class of the pair: server j hosts its VMs only if u = 0."""
+            vms = model.class_vms[b_class]
+            return sum(model.x[i, j_server] for i in vms) <= len(vms) * (1 - model.u[a_class, b_class, j_server])
+
+        def constraint_rule_symmetry(model: AbstractModel, j_server: int):
+            """Interchangeable servers are used in order."""
+            if j_server == model.m_servers or not model.interchangeable[j_server]:
+                return pyo.Constraint.Skip
+            return model.y[j_server] >= model.y[j_server + 1]
+
         # Meeting VM demand
         model.DemandConstraint = pyo.Constraint(model.I_vm, rule=constraint_rule_vm_demand)
 
@@ -81,8 +193,26 @@ class NominalModel:
         model.MemoryCapacityConstraint = pyo.Constraint(model.J_server, rule=constraint_rule_memory_capacity)
         model.StorageCapacityConstraint = pyo.Constraint(model.J_server, rule=constraint_rule_storage_capacity)
 
-        # Counting the number of active servers
-        model.ServerCountConstraint = pyo.Constraint(model.I_vm, model.J_server, rule=constraint_rule_server_count)
+        # Separating the VMs of each anti-affinity group
+        model.AntiAffinityConstraint = pyo.Constraint(model.G_group, model.J_server,
+                                                      rule=constraint_rule_anti_affinity)
+
+        # Segregating the incompatible classes of service
+        if self.segregate_classes and self.aggregated_linking:
+            model.FirstClassConstraint = pyo.Constraint(model.P_pair, model.J_server,
+                                                        rule=constraint_rule_first_class)
+            model.SecondClassConstraint = pyo.Constraint(model.P_pair, model.J_server,
+                                                         rule=constraint_rule_second_class)
+        elif self.segregate_classes:
+            model.ClassConstraint = pyo.Constraint(model.P_pair, model.I_vm, model.J_server,
+                                                   rule=constraint_rule_vm_class)
+
+        # Counting the number of active servers (already done by the capacity constraints with aggregated linking)
+        if not self.aggregated_linking:
+            model.ServerCountConstraint = pyo.Constraint(model.I_vm, model.J_server, rule=constraint_rule_server_count)
+
+        if self.symmetry_breaking:
+            model.SymmetryConstraint = pyo.Constraint(model.J_server, rule=constraint_rule_symmetry)
         return model
 
     def _add_objective(self, model: AbstractModel) -> AbstractModel:
@@ -92,19 +222,191 @@ class NominalModel:
         model.OBJ = pyo.Objective(rule=objective_expression, sense=pyo.minimize)
         return model
 
-    def solve(self, data: Data):
+    def solve(self, data: Data, initial_solution: Optional[Solution] = None):
         self._print(self._ascii_art())
-        data_dict = self._format_data(data)
-        self._print(f"Instianting model with {len(data.vm_data)} VMs and {len(data.server_data)} server specification(s)...")
-        model_instance = self.model.create_instance(data_dict)
+        if initial_solution is None:
+            initial_solution = self._initial_solution(data)
+        model_instance = self._create_instance(data, initial_solution)
         opt = pyo.SolverFactory(self.solver)
-        self._print(f"Launching solving with {self.solver}...{' [verbose off]' if self.verbose < 2 else ''}")
-        solution = opt.solve(model_instance, tee=(self.verbose >= 2))
+        warm_start: bool = initial_solution.assignment is not None and opt.warm_start_capable()
+        self._print(f"Launching solving with {self.solver}{' from the initial solution' if warm_start else ''}..."
+                    f"{' [verbose off]' if self.verbose < 2 else ''}")
+        solve_options = {'warmstart': True} if warm_start else {}
+        solution = opt.solve(model_instance, tee=(self.verbose >= 2), **solve_options)
         self._print(f"Best solution found: {pyo.value(model_instance.OBJ)}")
         self.model_instance = model_instance
         return model_instance, solution
 
-    def _format_data(self, data: Data) -> dict:
+    def solve_anytime(self, data: Data, initial_solution: Optional[Solution] = None, time_limit: float = 60.,
+                      mip_gap: Optional[float] = None,
+                      callback: Optional[Callable[[MipProgress], Optional[bool]]] = None) -> AnytimeResult:
+        """Solves the integer model until `time_limit` seconds have passed or the relative gap falls below `mip_gap`,
+        and returns the best incumbent found, converted into a Solution.
+
+        With 'appsi_highs', each new incumbent and bound is recorded as it is found and passed to `callback`, which
+        stops the solve by returning True; the solver captures the standard output while it runs, so what the callback
+        prints only shows with `verbose` >= 2. Other solvers, and versions of Pyomo or highspy without the HiGHS
+        callbacks, only record the final state. The initial solution
+        (First-Fit by default) is the incumbent when the solver finds none.
+        """
+        if self.linear_relaxation:
+            raise ValueError("An anytime solve needs the integer model (linear_relaxation=False)")
+        if initial_solution is None:
+            initial_solution = self._initial_solution(data)
+        model_instance = self._create_instance(data, initial_solution)
+        progress: List[MipProgress] = []
+
+        def record(seconds: float, incumbent: float, bound: float) -> bool:
+            """Records the state of the solve if it changed, and tells whether the callback asks to stop."""
+            if progress and (progress[-1].incumbent, progress[-1].bound) == (incumbent, bound):
+                return False
+            progress.append(MipProgress(seconds, incumbent, bound, relative_gap(incumbent, bound)))
+            return callback is not None and bool(callback(progress[-1]))
+
+        self._print(f"Launching anytime solving with {self.solver} for at most {time_limit}s...")
+        if self.solver == 'appsi_highs':
+            termination, incumbent, bound = self._solve_highs(model_instance, initial_solution, time_limit, mip_gap,
+                                                              record)
+        else:
+            start = time.perf_counter()
+            termination, incumbent, bound = self._solve_with_limits(model_instance, initial_solution, time_limit,
+                                                                    mip_gap)
+            record(time.perf_counter() - start, incumbent, bound)
+        if math.isinf(incumbent):
+            solution = initial_solution
+            incumbent = float(initial_solution.n_servers)
+        else:
+            solution = Solution.from_assignment(data.vm_data, self._model_pool(data.server_pool),
+                                                self._assignment(model_instance),
+                                                n_opened_servers=len(model_instance.J_server),
+                                                algo_name=f"NominalModel[{self.solver}]")
+        gap = relative_gap(incumbent, bound)
+        self._print(f"Best solution found: {incumbent} (bound: {bound}, gap: {gap:.2%}, {termination})")
+        self.model_instance = model_instance
+        return AnytimeResult(solution, incumbent, bound, gap, termination, progress)
+
+    def _solve_highs(self, model_instance, initial_solution: Solution, time_limit: float, mip_gap: Optional[float],
+                     record: Callable[[float, float, float], bool]) -> Tuple[str, float, float]:
+        """Solves with HiGHS through the persistent interface of Pyomo, whose HiGHS object reports each improving
+        solution and, periodically, the bound to the callbacks of the solve. That object and its callback events are
+        internals of Pyomo and highspy: when a version lacks them, the solve only records its final state."""
+        from pyomo.contrib.appsi.solvers import Highs
+
+        opt = Highs()
+        opt.config.time_limit = time_limit
+        opt.config.mip_gap = mip_gap
+        opt.config.warmstart = initial_solution.assignment is not None
+        opt.config.load_solution = False
+        opt.config.stream_solver = self.verbose >= 2
+        opt.set_instance(model_instance)
+
+        def on_event(event) -> None:
+            if record(event.data_out.running_time, event.data_out.mip_primal_bound, event.data_out.mip_dual_bound):
+                event.interrupt()
+
+        highs = getattr(opt, '_solver_model', None)
+        events = [getattr(highs, name, None) for name in ('cbMipImprovingSolution', 'cbMipInterrupt')]
+        streaming = all(hasattr(event, 'subscribe') for event in events)
+        if streaming:
+            for event in events:
+                event.subscribe(on_event)
+        start = time.perf_counter()
+        results = opt.solve(model_instance)
+        incumbent = results.best_feasible_objective
+        if incumbent is not None:
+            results.solution_loader.load_vars()
+        bound = results.best_objective_bound
+        incumbent = math.inf if incumbent is None else incumbent
+        bound = -math.inf if bound is None else bound
+        if not streaming:
+            record(time.perf_counter() - start, incumbent, bound)
+        return results.termination_condition.name, incumbent, bound
+
+    def _solve_with_limits(self, model_instance, initial_solution: Solution, time_limit: float,
+                           mip_gap: Optional[float]) -> Tuple[str, float, float]:
+        """Solves with the limits passed as options of the solver, which reports only its final state."""
+        if self.solver not in self.limit_options:
+            raise ValueError(f"No time limit option known for solver {self.solver}, "
+                             f"available: {['appsi_highs'] + list(self.limit_options)}")
+        time_option, gap_option = self.limit_options[self.solver]
+        opt = pyo.SolverFactory(self.solver)
+        opt.options[time_option] = math.ceil(time_limit) if self.solver == 'glpk' else time_limit
+        if mip_gap is not None:
+            opt.options[gap_option] = mip_gap
+        warm_start: bool = initial_solution.assignment is not None and opt.warm_start_capable()
+        solve_options = {'warmstart': True} if warm_start else {}
+        results = opt.solve(model_instance, tee=(self.verbose >= 2), load_solutions=False, **solve_options)
+        incumbent = math.inf
+        if len(results.solution) > 0:
+            model_instance.solutions.load_from(results)
+            incumbent = pyo.value(model_instance.OBJ)
+        bound = results.problem.lower_bound
+        bound = -math.inf if bound is None or not math.isfinite(bound) else float(bound)
+        return str(results.solver.termination_condition), incumbent, bound
+
+    @staticmethod
+    def _assignment(model_instance) -> np.ndarray:
+        """Server (0-based position in the pool) of each VM, from the values of the x variables."""
+        assignment = np.full(len(model_instance.I_vm), -1, dtype=np.int32)
+        for (i_vm, j_server), x in model_instance.x.items():
+            if x.value is not None and x.value > 0.5:
+                assignment[i_vm - 1] = j_server - 1
+        return assignment
+
+    @staticmethod
+    def _model_pool(pool: ServerPool) -> ServerPool:
+        """Pool the model takes its servers from: a pool of a single server specification without loads stands for
+        that specification, in as many copies as needed (e.g. the pool of `Data(path, specs, 1)`), and a fleet for
+        its listed servers only."""
+        if len(pool.spec_capacities) == 1 and pool.n_loaded == 0:
+            return ServerPool(pool.server_specs)
+        return pool
+
+    def _initial_solution(self, data: Data) -> Solution:
+        """First-Fit solution in the servers the model can use (see `_model_pool`)."""
+        return FirstFitAlgo(segregate_classes=self.segregate_classes).solve(data.vm_data,
+                                                                            self._model_pool(data.server_pool))
+
+    def _create_instance(self, data: Data, initial_solution: Solution):
+        if initial_solution.oversize_vms is not None and len(initial_solution.oversize_vms) > 0:
+            raise ValueError(f"{len(initial_solution.oversize_vms)} VMs fit in no server")
+        pool = self._model_pool(data.server_pool)
+        # Up to the last server used by the solution, loaded servers included
+        m_servers = max(initial_solution.n_servers, pool.n_loaded)
+        if initial_solution.assignment is not None:
+            m_servers = max(m_servers, int(initial_solution.assignment.max(initial=-1)) + 1)
+        data_dict = self._format_data(data, m_servers)
+        self._print(f"Instianting model with {len(data.vm_data)} VMs, {m_servers} servers "
+                    f"and {len(pool.server_specs)} server specification(s)...")
+        model_instance = self.model.create_instance(data_dict)
+        for j_server in np.flatnonzero((pool.loads(0, m_servers) != 0).any(axis=1)):
+            model_instance.y[int(j_server) + 1].fix(1)
+        if initial_solution.assignment is not None:
+            self._set_initial_values(model_instance, initial_solution.assignment, pool)
+        return model_instance
+
+    def _set_initial_values(self, model_instance, assignment: np.ndarray, pool: ServerPool) -> None:
+        """Sets the variables to the values of the placement. With identical empty servers, the used servers are
+        numbered from 1 in order, which satisfies the symmetry breaking constraints."""
+        if len(pool.spec_capacities) == 1 and pool.n_loaded == 0:
+            _, servers = np.unique(assignment, return_inverse=True)
+        else:
+            servers = assignment
+        used = np.zeros(len(model_instance.J_server), dtype=bool)
+        used[servers] = True
+        used[:pool.n_loaded] |= (pool.initial_loads != 0).any(axis=1)
+        for i_vm in model_instance.I_vm:
+            for j_server in model_instance.J_server:
+                model_instance.x[i_vm, j_server].value = int(servers[i_vm - 1] + 1 == j_server)
+        for j_server in model_instance.J_server:
+            model_instance.y[j_server].value = int(used[j_server - 1])
+        # Servers hosting no VM of the second class of a pair are on the side of the first class
+        for a_class, b_class in model_instance.P_pair:
+            second_class_servers = {servers[i_vm - 1] + 1 for i_vm in model_instance.class_vms[b_class]}
+            for j_server in model_instance.J_server:
+                model_instance.u[a_class, b_class, j_server].value = int(j_server not in second_class_servers)
+
+    def _format_data(self, data: Data, m_servers: int) -> dict:
 
         # VM data
         data_dict = {
@@ -116,18 +418,43 @@ class NominalModel:
             }
         }
 
-        # Server data
-        if len(data.server_data) == 1:
-            # Initialize with as many servers as vms
-            m_servers = len(data.vm_data) // 2
+        # Anti-affinity groups, by position of the VMs (groups of a single VM constrain nothing)
+        groups = [vm_positions for vm_positions in anti_affinity_group_positions(data.vm_data) if len(vm_positions) > 1]
+        data_dict[None].update({
+            'G_group': {None: list(range(1, len(groups) + 1))},
+            'group_vms': {g_group + 1: [i_vm + 1 for i_vm in vm_positions]
+                          for g_group, vm_positions in enumerate(groups)}
+        })
+
+        # Classes of service, for the incompatible pairs of classes both present
+        if self.segregate_classes:
+            vm_classes = data.vm_data[class_column]
+            pairs = [(a_class, b_class) for a_class, b_class in incompatible_classes
+                     if (vm_classes == a_class).any() and (vm_classes == b_class).any()]
+            classes = sorted({vm_class for pair in pairs for vm_class in pair})
             data_dict[None].update({
-                'm_servers': {None: m_servers},
-                'cpu_capacity': {j_server+1: data.server_data['vCPU'][0] for j_server in range(m_servers)},
-                'memory_capacity': {j_server+1: data.server_data['Memory'][0] for j_server in range(m_servers)},
-                'storage_capacity': {j_server+1: data.server_data['Storage'][0] for j_server in range(m_servers)}
+                'K_class': {None: classes},
+                'class_vms': {vm_class: (np.flatnonzero(vm_classes.to_numpy() == vm_class) + 1).tolist()
+                              for vm_class in classes},
+                'P_pair': {None: pairs}
             })
-        else:
-            raise NotImplemented("Case with multiple server capacities not yet implemented")
+
+        # Server data: the capacity left by the initial load of each of the first m servers of the pool
+        pool = self._model_pool(data.server_pool)
+        if pool.max_servers is not None and m_servers > pool.max_servers:
+            raise ValueError(f"The model needs {m_servers} servers, the pool has {pool.max_servers}")
+        capacities = pool.capacities(0, m_servers)
+        loads = pool.loads(0, m_servers)
+        space_left = capacities - loads
+        empty = (loads == 0).all(axis=1)
+        interchangeable = empty[:-1] & empty[1:] & (capacities[:-1] == capacities[1:]).all(axis=1)
+        data_dict[None].update({
+            'm_servers': {None: m_servers},
+            'cpu_capacity': dict(enumerate(space_left[:, 0].tolist(), start=1)),
+            'memory_capacity': dict(enumerate(space_left[:, 1].tolist(), start=1)),
+            'storage_capacity': dict(enumerate(space_left[:, 2].tolist(), start=1)),
+            'interchangeable': dict(enumerate(interchangeable.tolist(), start=1))
+        })
         return data_dict
 
     def _print(self, message: str):
@@ -161,9 +488,9 @@ if __name__ == '__main__':
     # Use a subset of the VMs
     data.subset_vms(10, seed=42)
 
-    # Launch MIP solver
-    model = NominalModel(linear_relaxation=True)
-    model, solution = model.solve(data)
+    # Launch MIP solver, starting from a First-Fit solution
+    model = NominalModel(linear_relaxation=True, symmetry_breaking=True, aggregated_linking=True)
+    model, solution = model.solve(data, FirstFitAlgo().solve(data.vm_data, ServerPool(data.server_pool.server_specs)))
     print(solution)
 
 
@@ -0,0 +1,131 @@
+import time
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import Bounds, LinearConstraint, OptimizeResult, milp
+
+from vm_placement.algorithms.approximation.first_fit import FirstFitAlgo
+from vm_placement.data_handling.aggregation import aggregate_vm_types, expand_type_placements
+from vm_placement.data_handling.data_loader import Data
+from vm_placement.data_handling.processing import resource_columns
+from vm_placement.data_handling.server_pool import ServerPool
+
+
+class TypeCountModel:
+    """Nominal model over VM types instead of individual VMs, solved with HiGHS through scipy.
+
+    Identical VMs are collapsed into types with multiplicities (see `aggregate_vm_types`), and the variables are
+    z[t, j], the integer number of VMs of type t in server j (at column t * m_servers + j), followed by y[j]
+    (server j used). This removes the symmetry between identical VMs of the nominal model:
+        min sum_j y[j]
+        sum_j z[t, j] = count[t]                                  for each type t
+        sum_t requirement[t, r] * z[t, j] <= capacity[r] * y[j]   for each server j and resource r
+        y[j] >= y[j + 1]                                          (servers are used in order)
+    The number of servers m_servers is the one First-Fit needs, in copies of the server specification. After
+    solving, `assignment` holds the server of each VM, by position. Only pools of a single server specification
+    without initial loads are supported.
+    """
+    def __init__(self, linear_relaxation: bool = False, time_limit: Optional[float] = None, verbose: int = 1):
+        self.linear_relaxation: bool = linear_relaxation
+        self.time_limit: Optional[float] = time_limit
+        self.verbose: int = verbose
+        self.build_time: Optional[float] = None
+        self.solve_time: Optional[float] = None
+        self.assignment: Optional[np.ndarray] = None
+
+    def solve(self, data: Data) -> OptimizeResult:
+        start = time.perf_counter()
+        vm_types, vm_type = aggregate_vm_types(data.vm_data)
+        m_servers = self._count_servers(data)
+        costs, constraint, integrality, bounds = self._build(data, vm_types[resource_columns].to_numpy(dtype=float),
+                                                             vm_types['count'].to_numpy(), m_servers)
+        self.build_time = time.perf_counter() - start
+        self._print(f"Built model with {len(vm_types)} VM types for {len(data.vm_data)} VMs and {m_servers} servers "
+                    f"in {self.build_time:.2f}s")
+
+        options = {'disp': self.verbose >= 2}
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+        start = time.perf_counter()
+        result = milp(costs, constraints=constraint, integrality=integrality, bounds=bounds, options=options)
+        self.solve_time = time.perf_counter() - start
+        self._print(f"Solved in {self.solve_time:.2f}s: {result.message}")
+        self._print(f"Best solution found: {result.fun} (bound: {getattr(result, 'mip_dual_bound', None)})")
+
+        if result.x is not None and not self.linear_relaxation:
+            type_server_counts = np.rint(result.x[:len(vm_types) * m_servers]).astype(np.int64)
+            placements = np.flatnonzero(type_server_counts)
+            self.assignment = expand_type_placements(vm_type, placements // m_servers, placements % m_servers,
+                                                     type_server_counts[placements])
+        return result
+
+    def _count_servers(self, data: Data) -> int:
+        """Number of servers of a First-Fit solution, in as many copies of the server specification as needed."""
+        if data.server_pool.n_loaded > 0:
+            raise ValueError("Servers with initial loads are not supported, see NominalModel")
+        solution = FirstFitAlgo().solve(data.vm_data, ServerPool(data.server_pool.server_specs))
+        if len(solution.oversize_vms) > 0:
+            raise ValueError(f"{len(solution.oversize_vms)} VMs fit in no server")
+        return solution.n_servers
+
+    def _build(self, data: Data, requirements: np.ndarray, counts: np.ndarray, m_servers: int):
+        server_specs = data.server_pool.server_specs
+        if len(server_specs) != 1:
+            raise NotImplementedError("Case with multiple server capacities not yet implemented")
+        capacity: np.ndarray = server_specs[resource_columns].to_numpy(dtype=float)[0]
+        n_types, n_resources = requirements.shape
+        n_z = n_types * m_servers
+        z_columns = np.arange(n_z)
+        z_servers = np.tile(np.arange(m_servers), n_types)
+        y_columns = n_z + np.arange(m_servers)
+
+        # All the VMs of each type are placed
+        demand = sp.coo_matrix((np.ones(n_z), (np.repeat(np.arange(n_types), m_servers), z_columns)),
+                               shape=(n_types, n_z + m_servers))
+
+        # Capacity of the used servers, for each resource
+        capacity_rows = (np.arange(n_resources)[:, None] * m_servers + z_servers).ravel()
+        capacity_values = np.repeat(requirements.T, m_servers, axis=1).ravel()
+        capacity_matrix = sp.coo_matrix(
+            (np.concatenate([capacity_values, -np.repeat(capacity, m_servers)]),
+             (np.concatenate([capacity_rows, np.arange(n_resources * m_servers)]),
+              np.concatenate([np.tile(z_columns, n_resources), np.tile(y_columns, n_resources)]))),
+            shape=(n_resources * m_servers, n_z + m_servers))
+
+        # Symmetry breaking: y[j] - y[j + 1] >= 0
+        n_pairs = max(m_servers - 1, 0)
+        symmetry = sp.coo_matrix((np.concatenate([np.ones(n_pairs), -np.ones(n_pairs)]),
+                                  (np.tile(np.arange(n_pairs), 2), np.concatenate([y_columns[:-1], y_columns[1:]]))),
+                                 shape=(n_pairs, n_z + m_servers))
+
+        constraint = LinearConstraint(
+            sp.vstack([demand, capacity_matrix, symmetry], format='csr'),
+            lb=np.concatenate([counts, np.full(n_resources * m_servers, -np.inf), np.zeros(n_pairs)]),
+            ub=np.concatenate([counts, np.zeros(n_resources * m_servers), np.full(n_pairs, np.inf)])
+        )
+        costs = np.concatenate([np.zeros(n_z), np.ones(m_servers)])
+        integrality = np.concatenate([np.full(n_z, 0 if self.linear_relaxation else 1), np.ones(m_servers)])
+        bounds = Bounds(np.zeros(n_z + m_servers), np.concatenate([np.repeat(counts, m_servers), np.ones(m_servers)]))
+        return costs, constraint, integrality, bounds
+
+    def _print(self, message: str):
+        if self.verbose > 0:
+            print(message)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    # Specify server capacity
+    server_capacity = pd.DataFrame({
+        'vCPU': [64],
+        'Memory': [512],
+        'Storage': [2048]
+    })
+    data = Data('data/vm_data.csv', server_capacity)
+    # Remove oversize VMs
+    data.filter_vms_by_resource('Storage', 2048)
+
+    model = TypeCountModel(time_limit=60)
+    result = model.solve(data)